@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
 # -------------------------------------------------------------------
@@ -159,7 +160,7 @@ def _normalize_raw_value(val: Any) -> str | None:
     return str(val).strip().lower() or None
 
 
-def _choose_fallback(categories: list[str]) -> str:
+def choose_fallback(categories: list[str]) -> str:
     """
     Pick a fallback label that matches one of the configured categories.
     Preference: unknown -> other -> last category.
@@ -170,34 +171,96 @@ def _choose_fallback(categories: list[str]) -> str:
     return categories[-1] if categories else "unknown"
 
 
-def annotate_categorical_columns(df: pd.DataFrame) -> pd.DataFrame:
+def _compile_lookup(cfg: dict[str, Any]) -> tuple[dict[str, int | str], int]:
     """
-    Apply annotation rules to known categorical columns.
+    Precompile one column's mapping to normalized raw value -> category code.
+
+    Mapping targets that are not configured categories are kept as labels so they can be
+    reported if they ever occur. Also returns the fallback category's code.
+    """
+    categories = cfg["categories"]
+    index = {c: i for i, c in enumerate(categories)}
+
+    lookup: dict[str, int | str] = {
+        raw: index.get(label, label) for raw, label in cfg["mapping"].items()
+    }
+
+    return lookup, index[choose_fallback(categories)]
+
+
+# column -> (normalized raw value -> category code, fallback code)
+_LOOKUPS: dict[str, tuple[dict[str, int | str], int]] = {
+    col: _compile_lookup(cfg) for col, cfg in ANNOTATION_CONFIG.items()
+}
+
+
+def _annotate_column(values: pd.Series, col: str, cfg: dict[str, Any]) -> pd.Categorical:
     """
-    df = df.copy()
+    Map one raw column onto its canonical labels, as a categorical over the configured categories.
+
+    Only the distinct raw values are normalized and looked up; rows are then mapped through
+    their factorized codes.
+    """
+    lookup, fallback = _LOOKUPS[col]
+
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+
+    # one code per distinct value, plus a trailing entry for missing values (code -1)
+    unique_codes = np.full(len(uniques) + 1, fallback, dtype=np.int64)
+    invalid: set[str] = set()
+
+    for i, raw in enumerate(uniques):
+        raw_norm = _normalize_raw_value(raw)
+        if raw_norm is None:
+            continue
+
+        code = lookup.get(raw_norm, fallback)
+        if isinstance(code, str):
+            invalid.add(code)
+        else:
+            unique_codes[i] = code
+
+    if invalid:
+        raise RuntimeError(f"{col} produced values not in categories: {sorted(invalid)}")
 
+    return pd.Categorical.from_codes(unique_codes[codes], categories=cfg["categories"])
+
+
+def annotate_categorical_batch(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Apply annotation rules to one batch of rows, in place.
+
+    Every batch gets the full configured category list, so batches concatenate into categorical
+    columns without materializing the string labels. Call finalize_categorical_columns on the
+    assembled frame to get the same categories annotate_categorical_columns produces.
+    """
     for col, cfg in ANNOTATION_CONFIG.items():
         if col not in df.columns:
             continue  # skip if column not found in dataset
 
-        categories = cfg["categories"]
-        mapping = cfg["mapping"]
+        df[col] = _annotate_column(df[col], col, cfg)
 
-        # determine fallback category
-        fallback = _choose_fallback(categories)
-
-        # normalize raw values
-        normalized = df[col].map(_normalize_raw_value)
+    return df
 
-        def map_value(raw_norm: str | None) -> str:
-            if raw_norm is None:
-                return fallback
-            return mapping.get(raw_norm, fallback)
 
-        df[col] = normalized.map(map_value).astype("category")
+def finalize_categorical_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Restrict annotated columns to their observed categories (sorted, unordered), in place.
+    """
+    for col in ANNOTATION_CONFIG:
+        if col not in df.columns:
+            continue
 
-        invalid = set(df[col].dropna().unique()) - set(categories)
-        if invalid:
-            raise RuntimeError(f"{col} produced values not in categories: {sorted(invalid)}")
+        observed = df[col].cat.remove_unused_categories().cat.categories
+        df[col] = df[col].cat.set_categories(sorted(observed), ordered=False)
 
     return df
+
+
+def annotate_categorical_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Apply annotation rules to known categorical columns.
+    """
+    df = annotate_categorical_batch(df.copy())
+
+    return finalize_categorical_columns(df)
@@ -13,11 +13,24 @@ HP_PENALTY = "penalty"
 HP_CLASS_WEIGHT = "class-weight"
 HP_LR_SCHEDULE = "sgd-learning-rate"
 HP_ETA0 = "sgd-eta0"
+HP_LOCAL_STEPS = "local-steps"
+HP_BATCH_SIZE = "batch-size"
+HP_MAX_SAMPLES = "max-samples-per-round"
+HP_SERVER_LR = "server-lr"
+
+DEFAULT_STREAM_BATCH_SIZE = 256  # rows per partial_fit step when batch-size is 0
 
 TRAIN_SPLIT = "train_split"
 EVAL_SPLIT = "eval_split"
+DATA_FRACTION = "data-fraction"  # share of the local training rows a round fits on (fidelity)
 
 CONFIG_KEY = "config"
+ARRAYS_KEY = "arrays"
+METRICS_KEY = "metrics"
+MEMBERS_KEY = "members"  # batched messages: ids of the population members the message carries
+
+# supported dtypes for feature matrices, scoring and parameter transport
+FEATURE_DTYPES = ("float64", "float32")
 
 
 class DataSplit(str, Enum):
@@ -27,6 +40,34 @@ class DataSplit(str, Enum):
     TRAIN_VAL = "train_val"
 
 
+class FeatureLayout(str, Enum):
+    DENSE = "dense"
+    SPARSE = "sparse"  # CSR: numeric block followed by the one-hot block
+
+
+class Trainer(str, Enum):
+    SKLEARN = "sklearn"  # sklearn SGDClassifier
+    NUMPY = "numpy"  # mini-batched NumPy SGD (fedlearn.common.sgd)
+
+
+class Aggregation(str, Enum):
+    SYNC = "sync"  # FedAvg: every round waits for all sampled nodes
+    BUFFERED = "buffered"  # FedBuff-style: aggregate once buffer-size updates arrive
+
+
+class AggregationReducer(str, Enum):
+    MEAN = "mean"  # FedAvg: mean weighted by num-examples
+    TRIMMED_MEAN = "trimmed_mean"  # coordinate-wise mean without the trim-fraction extremes
+    MEDIAN = "median"  # coordinate-wise median
+
+
+class ServerOptimizer(str, Enum):
+    FEDAVG = "fedavg"  # x + server-lr * delta; server-lr 1.0 is plain FedAvg
+    FEDAVGM = "fedavgm"  # server momentum
+    FEDADAM = "fedadam"  # Adam on the round deltas
+    FEDYOGI = "fedyogi"  # Yogi on the round deltas
+
+
 @dataclass(frozen=True)
 class HParams:
     local_epochs: int
@@ -34,6 +75,19 @@ class HParams:
     class_weight_cfg: str
     sgd_learning_rate: str
     sgd_eta0_cfg: float
+    # sample-budgeted local training; all 0 keeps full passes over the split (local_epochs)
+    local_steps: int = 0
+    batch_size: int = 0
+    max_samples_per_round: int = 0
+    # step size of the server optimizer applied to each round's aggregate
+    server_lr: float = 1.0
+
+    def __post_init__(self):
+        for name in ("local_steps", "batch_size", "max_samples_per_round"):
+            if getattr(self, name) < 0:
+                raise ValueError(f"{name} must be >= 0, got {getattr(self, name)}")
+        if self.server_lr <= 0.0:
+            raise ValueError(f"server_lr must be > 0, got {self.server_lr}")
 
     @property
     def class_weight(self) -> str | None:
@@ -45,6 +99,32 @@ class HParams:
             return self.sgd_eta0_cfg
         return 0.0
 
+    @property
+    def sample_budgeted(self) -> bool:
+        """
+        True if a round trains on a bounded sample stream instead of local_epochs full passes.
+        """
+        return self.local_steps > 0 or self.max_samples_per_round > 0
+
+    @property
+    def stream_batch_size(self) -> int:
+        return self.batch_size or DEFAULT_STREAM_BATCH_SIZE
+
+    def stream_samples(self) -> int:
+        """
+        Number of rows a budgeted round streams through partial_fit.
+
+        local_steps mini-batches of stream_batch_size rows, capped at max_samples_per_round; with
+        only the cap set, the round streams exactly max_samples_per_round rows.
+        """
+        if self.local_steps > 0:
+            samples = self.local_steps * self.stream_batch_size
+            if self.max_samples_per_round > 0:
+                samples = min(samples, self.max_samples_per_round)
+            return samples
+
+        return self.max_samples_per_round
+
     def to_config(
             self,
             train_split: DataSplit = DataSplit.TRAIN,
@@ -56,6 +136,10 @@ class HParams:
             HP_CLASS_WEIGHT: str(self.class_weight_cfg),
             HP_LR_SCHEDULE: str(self.sgd_learning_rate),
             HP_ETA0: float(self.sgd_eta0_cfg),
+            HP_LOCAL_STEPS: int(self.local_steps),
+            HP_BATCH_SIZE: int(self.batch_size),
+            HP_MAX_SAMPLES: int(self.max_samples_per_round),
+            HP_SERVER_LR: float(self.server_lr),
             TRAIN_SPLIT: train_split.value,
             EVAL_SPLIT: eval_split.value,
         })
@@ -68,6 +152,10 @@ class HParams:
             class_weight_cfg=str(cfg.get(HP_CLASS_WEIGHT, "none")).strip().lower(),
             sgd_learning_rate=str(cfg.get(HP_LR_SCHEDULE, "optimal")).strip().lower(),
             sgd_eta0_cfg=float(cfg.get(HP_ETA0, 0.0)),
+            local_steps=int(cfg.get(HP_LOCAL_STEPS, 0)),
+            batch_size=int(cfg.get(HP_BATCH_SIZE, 0)),
+            max_samples_per_round=int(cfg.get(HP_MAX_SAMPLES, 0)),
+            server_lr=float(cfg.get(HP_SERVER_LR, 1.0)),
         )
 
     @staticmethod
@@ -88,17 +176,136 @@ class HParams:
 
         return HParams.from_config(merged)
 
+    @staticmethod
+    def from_member(message: Message, context: Context, member: int) -> "HParams":
+        """
+        HParams of one member of a batched message: its own config over the shared one.
+        """
+        merged = dict(context.run_config)
+
+        for key in (CONFIG_KEY, member_key(CONFIG_KEY, member)):
+            cfg: ConfigRecord | None = message.content.get(key)
+            if cfg is not None:
+                merged.update(cfg)
+
+        return HParams.from_config(merged)
+
+
+def member_key(record_key: str, member: int) -> str:
+    """
+    RecordDict key of one population member's record in a batched message, e.g. "arrays.3".
+    """
+    return f"{record_key}.{int(member)}"
+
 
 @dataclass(frozen=True)
 class ServerSettings:
     num_rounds: int
     fraction_train: float
     fraction_evaluate: float
+    feature_dtype: str = "float64"  # dtype model arrays are sent to clients in
+    aggregation: Aggregation = Aggregation.SYNC
+    buffer_size: int = 2  # buffered: updates per aggregation (K of N)
+    staleness_exponent: float = 0.5  # buffered: stale updates weigh (1 + staleness) ** -exponent
+    reducer: AggregationReducer = AggregationReducer.MEAN
+    trim_fraction: float = 0.1  # trimmed_mean: share of values dropped at each end
+    server_optimizer: ServerOptimizer = ServerOptimizer.FEDAVG
+    server_momentum: float = 0.9  # fedavgm momentum, beta1 of fedadam / fedyogi
 
 
 def get_server_settings(context: Context) -> ServerSettings:
+    feature_dtype = str(context.run_config.get("feature-dtype", "float64")).strip().lower()
+    if feature_dtype not in FEATURE_DTYPES:
+        raise ValueError(f"Unknown feature-dtype {feature_dtype!r}. Valid: {sorted(FEATURE_DTYPES)}")
+
+    aggregation = str(context.run_config.get("aggregation", Aggregation.SYNC.value)).strip().lower()
+    try:
+        aggregation = Aggregation(aggregation)
+    except ValueError:
+        raise ValueError(
+            f"Unknown aggregation {aggregation!r}. Valid: {[a.value for a in Aggregation]}"
+        ) from None
+
+    buffer_size = int(context.run_config.get("buffer-size", 2))
+    if buffer_size < 1:
+        raise ValueError(f"buffer-size must be >= 1, got {buffer_size}")
+
+    staleness_exponent = float(context.run_config.get("staleness-exponent", 0.5))
+    if staleness_exponent < 0.0:
+        raise ValueError(f"staleness-exponent must be >= 0, got {staleness_exponent}")
+
+    reducer = str(context.run_config.get("aggregation-reducer", AggregationReducer.MEAN.value)).strip().lower()
+    try:
+        reducer = AggregationReducer(reducer)
+    except ValueError:
+        raise ValueError(
+            f"Unknown aggregation-reducer {reducer!r}. Valid: {[r.value for r in AggregationReducer]}"
+        ) from None
+
+    trim_fraction = float(context.run_config.get("trim-fraction", 0.1))
+    if not 0.0 <= trim_fraction < 0.5:
+        raise ValueError(f"trim-fraction must be in [0, 0.5), got {trim_fraction}")
+
+    server_optimizer = str(context.run_config.get("server-optimizer", ServerOptimizer.FEDAVG.value)).strip().lower()
+    try:
+        server_optimizer = ServerOptimizer(server_optimizer)
+    except ValueError:
+        raise ValueError(
+            f"Unknown server-optimizer {server_optimizer!r}. Valid: {[o.value for o in ServerOptimizer]}"
+        ) from None
+
+    server_momentum = float(context.run_config.get("server-momentum", 0.9))
+    if not 0.0 <= server_momentum < 1.0:
+        raise ValueError(f"server-momentum must be in [0, 1), got {server_momentum}")
+
     return ServerSettings(
         num_rounds=int(context.run_config["num-server-rounds"]),
         fraction_train=float(context.run_config.get("fraction-train", 1.0)),
         fraction_evaluate=float(context.run_config.get("fraction-evaluate", 1.0)),
+        feature_dtype=feature_dtype,
+        aggregation=aggregation,
+        buffer_size=buffer_size,
+        staleness_exponent=staleness_exponent,
+        reducer=reducer,
+        trim_fraction=trim_fraction,
+        server_optimizer=server_optimizer,
+        server_momentum=server_momentum,
+    )
+
+
+@dataclass(frozen=True)
+class ConvergenceSettings:
+    metric: str
+    direction: str
+    min_delta: float
+    patience: int
+    warmup_rounds: int
+    terminate: bool
+
+
+def _as_bool(value: object) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def get_convergence_settings(context: Context) -> ConvergenceSettings | None:
+    """
+    Read convergence controls from run_config, or None if detect-convergence is off.
+    """
+    rc = context.run_config
+    if not _as_bool(rc.get("detect-convergence", False)):
+        return None
+
+    direction = str(rc.get("convergence-direction", "max")).strip().lower()
+    if direction not in ("max", "min"):
+        raise ValueError(f"convergence-direction must be 'max' or 'min', got {direction!r}")
+
+    return ConvergenceSettings(
+        metric=str(rc.get("convergence-metric", "roc_auc")),
+        direction=direction,
+        min_delta=float(rc.get("convergence-min-delta", 0.001)),
+        patience=int(rc.get("convergence-patience", 3)),
+        warmup_rounds=int(rc.get("convergence-warmup-rounds", 3)),
+        terminate=_as_bool(rc.get("terminate-on-convergence", True)),
     )
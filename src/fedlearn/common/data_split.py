@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+import threading
+from collections.abc import Iterator
 from pathlib import Path
 
 import duckdb
@@ -7,8 +11,12 @@ import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
-from fedlearn.common.annotation import annotate_categorical_columns
-from fedlearn.common.preprocessing import ALL_FEATURES
+from fedlearn.common.annotation import ANNOTATION_CONFIG, choose_fallback, finalize_categorical_columns
+from fedlearn.common.config import DataSplit
+from fedlearn.common.duckdb_pool import DuckDBPool
+from fedlearn.common.preprocessing import ALL_FEATURES, CATEGORICAL_FEATURES, NUMERIC_FEATURES
+
+logger = logging.getLogger(__name__)
 
 # Constants
 
@@ -35,78 +43,291 @@ SPLIT_RANDOM_STATE = 42
 TEST_SIZE = 0.2
 VAL_SIZE_WITHIN_TRAINVAL = 0.25  # 0.25 of remaining 80% => 20% overall
 
+# materialized split assignment (see materialize_splits)
+SPLIT_TABLE = "client_splits"
+SPLIT_META_TABLE = "client_splits_meta"
+STORED_SPLITS = (DataSplit.TRAIN, DataSplit.VALIDATION, DataSplit.TEST)
+
+# rows per streamed batch when loading a partition (rounded up to whole DuckDB vectors)
+PARTITION_BATCH_ROWS = 65_536
+DUCKDB_VECTOR_SIZE = 2048
+
+# characters stripped before categorical lookup: every code point str.isspace() accepts,
+# so SQL trim() matches str.strip() (incl. NBSP and the other Unicode spaces)
+_STRIP_CODE_POINTS = (
+    *range(0x09, 0x0E), *range(0x1C, 0x21), 0x85, 0xA0, 0x1680, *range(0x2000, 0x200B),
+    0x2028, 0x2029, 0x202F, 0x205F, 0x3000,
+)
+_SQL_STRIP_CHARS = " || ".join(f"chr({code})" for code in _STRIP_CODE_POINTS)
+
+SplitTuple = tuple[
+    pd.DataFrame, pd.Series,
+    pd.DataFrame, pd.Series,
+    pd.DataFrame, pd.Series,
+]
+
+# one split of one partition: (X, y)
+SplitXY = tuple[pd.DataFrame, pd.Series]
+
+# shared read-only connection used by every loader in this module
+_DUCKDB_POOL = DuckDBPool(DUCKDB_PATH)
+
+# process-level split cache:
+#   (client_key, split, random_state, test_size, val_size) -> (duckdb fingerprint, (X, y))
+_PARTITION_CACHE: dict[tuple[str, DataSplit, int, float, float], tuple[tuple[int, int], SplitXY]] = {}
+_PARTITION_CACHE_LOCK = threading.Lock()
+
 
-def load_client_partition(client_key: str) -> pd.DataFrame:
+def configure_duckdb(
+        threads: int | None = None,
+        memory_limit: str | None = None,
+        ttl: float | None = None,
+) -> None:
     """
-    Load only this client's partition from DuckDB.
+    Size the shared DuckDB connection (threads=0 / empty memory_limit keep DuckDB's defaults).
+    """
+    _DUCKDB_POOL.configure(threads=threads or None, memory_limit=memory_limit or None, ttl=ttl)
 
-    The mapping is:
-      partition-id -> client bucket -> list of raw regions.
 
-    Example:
-      partition-id=0 -> "client_midwest" -> ["Midwest"]
-      partition-id=1 -> "client_south"   -> ["South"]
-      partition-id=2 -> "client_other"   -> ["West", "Northeast", NULL]
+def close_duckdb() -> None:
+    """
+    Release the shared DuckDB connection held by this process (e.g. before writing to the file).
+    """
+    _DUCKDB_POOL.close()
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _annotation_sql(col: str, cfg: dict) -> str:
+    """
+    Compile one ANNOTATION_CONFIG entry into a SQL expression producing an ENUM column.
+
+    Mirrors annotate_categorical_columns: the raw value is cast to text, trimmed and lowercased,
+    mapped to its canonical label, and anything unmapped or NULL becomes the fallback category.
+    """
+    categories = cfg["categories"]
+    fallback = choose_fallback(categories)
+
+    invalid = sorted(set(cfg["mapping"].values()) - set(categories))
+    if invalid:
+        raise RuntimeError(f"{col} maps to values not in categories: {invalid}")
+
+    normalized = f"lower(trim(CAST({col} AS VARCHAR), {_SQL_STRIP_CHARS}))"
+    whens = " ".join(
+        f"WHEN {_sql_literal(raw)} THEN {_sql_literal(label)}"
+        for raw, label in cfg["mapping"].items()
+    )
+    enum_sql = ", ".join(_sql_literal(c) for c in categories)
+
+    return f"CAST(CASE {normalized} {whens} ELSE {_sql_literal(fallback)} END AS ENUM({enum_sql})) AS {col}"
+
+
+def _region_filter(client_key: str) -> tuple[str, list[str]]:
+    """
+    Return the WHERE clause (and its parameters) selecting one client's regions.
     """
     if client_key not in CLIENT_REGION_MAP:
         raise KeyError(f"Unknown client key: {client_key!r}")
 
     regions = CLIENT_REGION_MAP[client_key]
 
-    conn = duckdb.connect(DUCKDB_PATH, read_only=True)
-    try:
-        include_null = None in regions
-        real_regions = [r for r in regions if r is not None]
+    include_null = None in regions
+    real_regions = [r for r in regions if r is not None]
+
+    where_clauses: list[str] = []
+    params: list[str] = []
 
-        where_clauses: list[str] = []
-        params: list[str] = []
+    if real_regions:
+        placeholders = ", ".join(["?"] * len(real_regions))
+        where_clauses.append(f"{REGION_COL} IN ({placeholders})")
+        params.extend(real_regions)
 
-        if real_regions:
-            placeholders = ", ".join(["?"] * len(real_regions))
-            where_clauses.append(f"{REGION_COL} IN ({placeholders})")
-            params.extend(real_regions)
+    if include_null:
+        where_clauses.append(f"{REGION_COL} IS NULL")
+
+    where_sql = " OR ".join(where_clauses) if where_clauses else "TRUE"
+
+    return where_sql, params
+
+
+def compile_partition_query(client_key: str, split: DataSplit | None = None) -> tuple[str, list[str]]:
+    """
+    Compile the SELECT for one client's partition.
 
-        if include_null:
-            where_clauses.append(f"{REGION_COL} IS NULL")
+    The query projects NUMERIC_FEATURES, the annotated CATEGORICAL_FEATURES and the target
+    (in ALL_FEATURES order), so DuckDB returns rows already annotated. Without a split it
+    filters to the client's regions; with one it joins the materialized split table and
+    returns only that split, in the order train_test_split produced it. Returns the SQL and
+    its positional parameters.
+    """
+    select_exprs = {col: col for col in NUMERIC_FEATURES}
+    select_exprs.update({col: _annotation_sql(col, ANNOTATION_CONFIG[col]) for col in CATEGORICAL_FEATURES})
+    select_sql = ",\n    ".join([*(select_exprs[col] for col in ALL_FEATURES), TARGET_COL])
 
-        where_sql = " OR ".join(where_clauses) if where_clauses else "TRUE"
+    if split is None:
+        where_sql, params = _region_filter(client_key)
 
         # noinspection SqlNoDataSourceInspection
-        query = f"SELECT * FROM {VIEW_NAME} WHERE {where_sql} ORDER BY patientunitstayid"
+        query = (
+            f"SELECT\n    {select_sql}\n"
+            f"FROM {VIEW_NAME}\n"
+            f"WHERE {where_sql}\n"
+            f"ORDER BY patientunitstayid"
+        )
+        return query, params
+
+    if split not in STORED_SPLITS:
+        raise ValueError(f"Unsupported split for a partition query: {split!r}")
+    if client_key not in CLIENT_REGION_MAP:
+        raise KeyError(f"Unknown client key: {client_key!r}")
 
-        df = conn.execute(query, params).df()
-    finally:
-        conn.close()
+    # noinspection SqlNoDataSourceInspection
+    query = (
+        f"SELECT\n    {select_sql}\n"
+        f"FROM {VIEW_NAME} AS v\n"
+        f"JOIN {SPLIT_TABLE} AS s ON s.patientunitstayid = v.patientunitstayid\n"
+        f"WHERE s.client_key = ? AND s.split = ?\n"
+        f"ORDER BY s.split_rank"
+    )
+    return query, [client_key, split.value]
 
-    # normalize pandas.NA -> np.nan so sklearn imputers are happy
-    df = df.where(df.notna(), np.nan)
 
-    # ensure categorical columns have right categories
-    df = annotate_categorical_columns(df)
+def _fetch_partition_chunks(
+        client_key: str,
+        batch_rows: int,
+        split: DataSplit | None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the raw DuckDB result chunks of one partition query (not NA-normalized).
+    """
+    if batch_rows <= 0:
+        raise ValueError(f"batch_rows must be positive, got {batch_rows}")
 
-    return df
+    query, params = compile_partition_query(client_key, split)
+    vectors_per_batch = max(1, -(-int(batch_rows) // DUCKDB_VECTOR_SIZE))
 
+    with _DUCKDB_POOL.cursor() as cursor:
+        result = cursor.execute(query, params)
 
-def _split_xy(df: pd.DataFrame) -> tuple[
-    pd.DataFrame, pd.Series,
-    pd.DataFrame, pd.Series,
-    pd.DataFrame, pd.Series,
-]:
+        while True:
+            chunk = result.fetch_df_chunk(vectors_per_batch)
+            if chunk.empty:
+                break
+
+            yield chunk
+            # release the chunk before the next one is fetched
+            del chunk
+
+
+def iter_client_partition_batches(
+        client_key: str,
+        batch_rows: int = PARTITION_BATCH_ROWS,
+        split: DataSplit | None = None,
+) -> Iterator[pd.DataFrame]:
     """
-    Split one client partition into train/val/test (60/20/20).
+    Stream one client's partition (or one split of it) from DuckDB in batches of about batch_rows rows.
+
+    Annotation and projection run inside DuckDB (see compile_partition_query); each batch is
+    only NA-normalized here. Categorical columns carry the full configured category list.
     """
-    if df.empty:
-        raise RuntimeError("No rows found for partition")
+    for chunk in _fetch_partition_chunks(client_key, batch_rows, split):
+        # normalize pandas.NA -> np.nan so sklearn imputers are happy
+        yield chunk.where(chunk.notna(), np.nan)
 
-    y = df[TARGET_COL]
 
-    feat_cols = list(ALL_FEATURES)
-    missing = [c for c in feat_cols if c not in df.columns]
-    if missing:
-        raise RuntimeError(f"Partition is missing expected feature columns: {missing}")
+def _column_values(values: pd.Series) -> tuple[np.ndarray, pd.Index | None]:
+    """
+    NA-normalized values of one chunk column as a NumPy array, plus its categories if categorical.
 
-    X = df[feat_cols]
+    Categoricals are returned as codes (-1 for missing); NumPy-backed columns already hold NaN
+    for missing values and are returned without a copy.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    if isinstance(values.dtype, np.dtype):
+        return values.to_numpy(), None
+    # extension dtypes: normalize pandas.NA -> np.nan as iter_client_partition_batches does
+    return values.where(values.notna(), np.nan).to_numpy(), None
+
+
+def load_client_partition(
+        client_key: str,
+        batch_rows: int = PARTITION_BATCH_ROWS,
+        split: DataSplit | None = None,
+) -> pd.DataFrame:
+    """
+    Load only this client's partition from DuckDB.
 
+    The mapping is:
+      partition-id -> client bucket -> list of raw regions.
+
+    Example:
+      partition-id=0 -> "client_midwest" -> ["Midwest"]
+      partition-id=1 -> "client_south"   -> ["South"]
+      partition-id=2 -> "client_other"   -> ["West", "Northeast", NULL]
+
+    Only ALL_FEATURES and the target are read, streamed in batches of batch_rows rows. If split
+    is given, only that split's rows are read from the materialized split table. Each column
+    is preallocated from the query's row count and filled batch by batch (categoricals as
+    codes, NA-normalized per column), so no batch outlives its copy into the output and no
+    full-frame concat or NA copy is made.
+    """
+    query, params = compile_partition_query(client_key, split)
+    with _DUCKDB_POOL.cursor() as cursor:
+        row = cursor.execute(f"SELECT count(*) FROM ({query})", params).fetchone()
+    n_rows = 0 if row is None else int(row[0])
+
+    columns: dict[str, np.ndarray] = {}
+    categories: dict[str, pd.Index] = {}
+    filled = 0
+
+    for chunk in _fetch_partition_chunks(client_key, batch_rows, split):
+        stop = filled + len(chunk)
+        if stop > n_rows:
+            raise RuntimeError(f"Partition {client_key!r} returned more than the {n_rows} rows it counted")
+
+        for col in chunk.columns:
+            arr, cats = _column_values(chunk[col])
+            if cats is not None:
+                if col not in categories:
+                    categories[col] = cats
+                elif not cats.equals(categories[col]):
+                    raise RuntimeError(f"Categories of {col!r} changed between partition batches")
+
+            out = columns.get(col)
+            if out is None:
+                out = columns[col] = np.empty(n_rows, dtype=arr.dtype)
+            elif not np.can_cast(arr.dtype, out.dtype):
+                # e.g. an integer column that turns float in a batch with NULLs
+                out = columns[col] = out.astype(np.result_type(out.dtype, arr.dtype))
+            out[filled:stop] = arr
+
+        filled = stop
+        del chunk
+
+    if not columns:
+        return pd.DataFrame(columns=[*ALL_FEATURES, TARGET_COL])
+
+    df = pd.DataFrame(
+        {
+            col: pd.Categorical.from_codes(arr[:filled], categories=categories[col]) if col in categories
+            else arr[:filled]
+            for col, arr in columns.items()
+        },
+        copy=False,
+    )
+
+    return finalize_categorical_columns(df)
+
+
+def _train_val_test_split(X: pd.DataFrame, y: pd.Series) -> SplitTuple:
+    """
+    Split rows into train/val/test (60/20/20), stratified on y.
+
+    The assignment depends only on y and the seed, not on the columns of X.
+    """
     stratify_y = y if y.nunique() > 1 else None
 
     X_trainval, X_test, y_trainval, y_test = train_test_split(
@@ -130,15 +351,266 @@ def _split_xy(df: pd.DataFrame) -> tuple[
     return X_train, y_train, X_val, y_val, X_test, y_test
 
 
-def get_client_train_val_test_by_key(client_key: str) -> tuple[
-    pd.DataFrame, pd.Series,
-    pd.DataFrame, pd.Series,
-    pd.DataFrame, pd.Series,
-]:
+def _split_xy(df: pd.DataFrame) -> SplitTuple:
+    """
+    Split one client partition into train/val/test (60/20/20).
+    """
+    if df.empty:
+        raise RuntimeError("No rows found for partition")
+
+    y = df[TARGET_COL]
+
+    feat_cols = list(ALL_FEATURES)
+    missing = [c for c in feat_cols if c not in df.columns]
+    if missing:
+        raise RuntimeError(f"Partition is missing expected feature columns: {missing}")
+
+    return _train_val_test_split(df[feat_cols], y)
+
+
+def ids_sha256(ids: np.ndarray) -> str:
+    """
+    sha256 hex digest of a patientunitstayid sequence (order-sensitive).
+    """
+    return hashlib.sha256(np.ascontiguousarray(ids, dtype=np.int64).tobytes()).hexdigest()
+
+
+def _partition_ids(conn: duckdb.DuckDBPyConnection, client_key: str) -> np.ndarray:
+    """
+    patientunitstayids of one client's partition, sorted.
+    """
+    where_sql, params = _region_filter(client_key)
+
+    # noinspection SqlNoDataSourceInspection
+    result = conn.execute(
+        f"SELECT patientunitstayid FROM {VIEW_NAME} WHERE {where_sql} ORDER BY patientunitstayid",
+        params,
+    )
+    return np.asarray(result.fetchnumpy()["patientunitstayid"])
+
+
+def _assign_splits(
+        conn: duckdb.DuckDBPyConnection,
+        client_key: str,
+) -> tuple[np.ndarray, dict[DataSplit, np.ndarray]]:
+    """
+    Split one client's patientunitstayids like the in-memory loader; return (sorted ids, ids per split).
+    """
+    where_sql, params = _region_filter(client_key)
+
+    # noinspection SqlNoDataSourceInspection
+    ids = conn.execute(
+        f"SELECT patientunitstayid, {TARGET_COL} FROM {VIEW_NAME} WHERE {where_sql} ORDER BY patientunitstayid",
+        params,
+    ).df()
+
+    if ids.empty:
+        raise RuntimeError(f"No rows found for partition {client_key!r}")
+
+    X_train, _, X_val, _, X_test, _ = _train_val_test_split(ids[["patientunitstayid"]], ids[TARGET_COL])
+
+    return ids["patientunitstayid"].to_numpy(), {
+        split: X_part["patientunitstayid"].to_numpy()
+        for split, X_part in zip(STORED_SPLITS, (X_train, X_val, X_test))
+    }
+
+
+def materialize_splits(conn: duckdb.DuckDBPyConnection) -> dict[str, dict[str, int]]:
+    """
+    Write the train/val/test assignment of every client partition into DuckDB.
+
+    SPLIT_TABLE gets one row per patientunitstayid with its client, split and split_rank (row
+    position within the split). The assignment comes from the same stratified, seeded
+    train_test_split calls the in-memory loader uses, so split loaders return the same rows in
+    the same order. SPLIT_META_TABLE records the split settings and, per client, the row count
+    and sha256 of the sorted patientunitstayids, used to detect a stale table. Returns the split
+    sizes per client.
+    """
+    assignments: list[pd.DataFrame] = []
+    meta_rows: list[dict[str, object]] = []
+    counts: dict[str, dict[str, int]] = {}
+
+    for client_key in CLIENT_KEYS:
+        partition_ids, split_ids = _assign_splits(conn, client_key)
+
+        counts[client_key] = {}
+        for split, ids in split_ids.items():
+            assignments.append(pd.DataFrame({
+                "patientunitstayid": ids,
+                "client_key": client_key,
+                "split": split.value,
+                "split_rank": np.arange(len(ids), dtype=np.int64),
+            }))
+            counts[client_key][split.value] = len(ids)
+
+        meta_rows.append({
+            "client_key": client_key,
+            "n_rows": len(partition_ids),
+            "ids_sha256": ids_sha256(partition_ids),
+            "random_state": SPLIT_RANDOM_STATE,
+            "test_size": TEST_SIZE,
+            "val_size": VAL_SIZE_WITHIN_TRAINVAL,
+        })
+
+    split_df = pd.concat(assignments, axis=0, ignore_index=True)
+    meta_df = pd.DataFrame(meta_rows)
+
+    conn.register("split_df", split_df)
+    conn.register("meta_df", meta_df)
+    try:
+        conn.execute(f"CREATE OR REPLACE TABLE {SPLIT_TABLE} AS SELECT * FROM split_df")
+        conn.execute(f"CREATE OR REPLACE TABLE {SPLIT_META_TABLE} AS SELECT * FROM meta_df")
+    finally:
+        conn.unregister("split_df")
+        conn.unregister("meta_df")
+
+    return counts
+
+
+def _has_materialized_splits(client_key: str) -> bool:
+    """
+    True if SPLIT_TABLE exists and matches the current split settings and partition rows.
+
+    The partition's sorted patientunitstayids are hashed and compared with SPLIT_META_TABLE, so
+    a refreshed DuckDB with a different set of stays (even of the same size) is detected.
+    """
+    with _DUCKDB_POOL.cursor() as cursor:
+        tables = {
+            row[0]
+            for row in cursor.execute(
+                "SELECT table_name FROM information_schema.tables WHERE table_name IN (?, ?)",
+                [SPLIT_TABLE, SPLIT_META_TABLE],
+            ).fetchall()
+        }
+        if tables != {SPLIT_TABLE, SPLIT_META_TABLE}:
+            return False
+
+        result = cursor.execute(f"SELECT * FROM {SPLIT_META_TABLE} WHERE client_key = ?", [client_key])
+        row = result.fetchone()
+        if row is None:
+            return False
+
+        # tables written before ids_sha256 was recorded lack the column and count as stale
+        meta = dict(zip([col[0] for col in result.description], row))
+        settings = (meta.get("random_state"), meta.get("test_size"), meta.get("val_size"))
+        if settings != (SPLIT_RANDOM_STATE, TEST_SIZE, VAL_SIZE_WITHIN_TRAINVAL):
+            return False
+
+        current_ids = _partition_ids(cursor, client_key)
+
+    return meta.get("n_rows") == len(current_ids) and meta.get("ids_sha256") == ids_sha256(current_ids)
+
+
+def _load_splits(client_key: str, split: DataSplit, batch_rows: int) -> dict[DataSplit, SplitXY]:
+    """
+    Load the requested split from the split table, or every split via the in-memory fallback.
+    """
+    if _has_materialized_splits(client_key):
+        df = load_client_partition(client_key, batch_rows, split=split)
+        if df.empty:
+            raise RuntimeError(f"No rows found for {split.value} split of partition {client_key!r}")
+
+        return {split: (df[list(ALL_FEATURES)], df[TARGET_COL])}
+
+    logger.info("No current %s table; splitting partition %s in memory", SPLIT_TABLE, client_key)
+
+    X_train, y_train, X_val, y_val, X_test, y_test = _split_xy(load_client_partition(client_key, batch_rows))
+
+    return {
+        DataSplit.TRAIN: (X_train, y_train),
+        DataSplit.VALIDATION: (X_val, y_val),
+        DataSplit.TEST: (X_test, y_test),
+    }
+
+
+def duckdb_fingerprint() -> tuple[int, int]:
+    """
+    Return (mtime_ns, size) of the DuckDB file, used to invalidate cached partitions.
+    """
+    stat = DUCKDB_PATH.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_client_split_ids(client_key: str) -> dict[DataSplit, np.ndarray]:
+    """
+    patientunitstayids of each stored split of one client, in the row order get_client_split returns.
+
+    Read from the materialized split table when it is current, else split in memory.
+    """
+    if _has_materialized_splits(client_key):
+        with _DUCKDB_POOL.cursor() as cursor:
+            # noinspection SqlNoDataSourceInspection
+            df = cursor.execute(
+                f"SELECT split, patientunitstayid FROM {SPLIT_TABLE} WHERE client_key = ? ORDER BY split_rank",
+                [client_key],
+            ).df()
+        return {split: df.loc[df["split"] == split.value, "patientunitstayid"].to_numpy() for split in STORED_SPLITS}
+
+    with _DUCKDB_POOL.cursor() as cursor:
+        return _assign_splits(cursor, client_key)[1]
+
+
+def clear_partition_cache() -> None:
+    """
+    Drop all cached client partitions held by this process.
+    """
+    with _PARTITION_CACHE_LOCK:
+        _PARTITION_CACHE.clear()
+
+
+def get_client_split(
+        client_key: str,
+        split: DataSplit,
+        use_cache: bool = True,
+        batch_rows: int = PARTITION_BATCH_ROWS,
+) -> SplitXY:
+    """
+    Return (X, y) for one split (TRAIN, VALIDATION or TEST) of one logical client.
+
+    With a materialized split table only the requested split is read from DuckDB. Splits are
+    cached per process, keyed by client key, split and split settings, and invalidated when
+    the DuckDB file changes (mtime/size). Returned frames are shared between callers and must
+    be treated as read-only.
+    """
+    if split not in STORED_SPLITS:
+        raise ValueError(f"Unsupported split: {split!r}")
+
+    if not use_cache:
+        return _load_splits(client_key, split, batch_rows)[split]
+
+    key = (client_key, split, SPLIT_RANDOM_STATE, TEST_SIZE, VAL_SIZE_WITHIN_TRAINVAL)
+    fingerprint = duckdb_fingerprint()
+
+    with _PARTITION_CACHE_LOCK:
+        cached = _PARTITION_CACHE.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        if cached is not None:
+            logger.info("DuckDB file changed; reloading %s split for %s", split.value, client_key)
+
+        loaded = _load_splits(client_key, split, batch_rows)
+        for loaded_split, xy in loaded.items():
+            _PARTITION_CACHE[(client_key, loaded_split, *key[2:])] = (fingerprint, xy)
+
+    return loaded[split]
+
+
+def get_client_train_val_test_by_key(
+        client_key: str,
+        use_cache: bool = True,
+        batch_rows: int = PARTITION_BATCH_ROWS,
+) -> SplitTuple:
     """
     Return local train/val/test split for one logical client.
+
+    See get_client_split for caching; returned frames must be treated as read-only.
     """
-    return _split_xy(load_client_partition(client_key))
+    X_train, y_train = get_client_split(client_key, DataSplit.TRAIN, use_cache, batch_rows)
+    X_val, y_val = get_client_split(client_key, DataSplit.VALIDATION, use_cache, batch_rows)
+    X_test, y_test = get_client_split(client_key, DataSplit.TEST, use_cache, batch_rows)
+
+    return X_train, y_train, X_val, y_val, X_test, y_test
 
 
 def get_client_train_union() -> tuple[pd.DataFrame, pd.Series]:
@@ -153,7 +625,7 @@ def get_client_train_union() -> tuple[pd.DataFrame, pd.Series]:
     y_parts: list[pd.Series] = []
 
     for client_key in CLIENT_KEYS:
-        X_train, y_train, _, _, _, _ = get_client_train_val_test_by_key(client_key)
+        X_train, y_train = get_client_split(client_key, DataSplit.TRAIN)
         X_parts.append(X_train)
         y_parts.append(y_train)
 
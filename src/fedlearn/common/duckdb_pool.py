@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+# Constants
+
+DEFAULT_CONNECTION_TTL = 300.0  # seconds a shared connection is reused before it is reopened
+
+
+class DuckDBPool:
+    """
+    Process-level read-only connection to one DuckDB file, handing out a cursor per caller.
+
+    The database is opened once and reused, so the file open, catalog load and view binding
+    are not repeated per query. Every cursor() call gets its own DuckDB cursor, which makes
+    concurrent use from several threads safe. The shared connection is reopened when it is
+    older than ttl seconds, when the file changes on disk, or when threads / memory_limit are
+    reconfigured. Reopening waits until no cursor is in use, so in-flight queries are never
+    cut off.
+    """
+
+    def __init__(
+            self,
+            path: Path,
+            *,
+            threads: int | None = None,
+            memory_limit: str | None = None,
+            ttl: float = DEFAULT_CONNECTION_TTL,
+    ):
+        self.path = path
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self.ttl = float(ttl)
+
+        self._lock = threading.Lock()
+        self._conn: duckdb.DuckDBPyConnection | None = None
+        self._opened_at = 0.0
+        self._fingerprint: tuple[int, int] | None = None
+        self._active = 0
+        self._stale = False
+
+    def configure(
+            self,
+            *,
+            threads: int | None = None,
+            memory_limit: str | None = None,
+            ttl: float | None = None,
+    ) -> None:
+        """
+        Update DuckDB settings; the shared connection is reopened with them once idle.
+        """
+        if threads is not None and threads < 0:
+            raise ValueError(f"duckdb threads must be >= 0, got {threads}")
+
+        with self._lock:
+            if (threads, memory_limit) != (self.threads, self.memory_limit):
+                self.threads = threads
+                self.memory_limit = memory_limit
+                self._stale = True
+            if ttl is not None:
+                self.ttl = float(ttl)
+
+    def _file_fingerprint(self) -> tuple[int, int]:
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _config(self) -> dict[str, str | int]:
+        config: dict[str, str | int] = {}
+        if self.threads:
+            config["threads"] = int(self.threads)
+        if self.memory_limit:
+            config["memory_limit"] = str(self.memory_limit)
+        return config
+
+    def _close_locked(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _acquire(self) -> duckdb.DuckDBPyConnection:
+        fingerprint = self._file_fingerprint()
+
+        with self._lock:
+            expired = time.monotonic() - self._opened_at > self.ttl
+            changed = fingerprint != self._fingerprint
+
+            if self._conn is not None and self._active == 0 and (self._stale or expired or changed):
+                self._close_locked()
+
+            if self._conn is None:
+                logger.debug("Opening DuckDB %s read-only (config=%s)", self.path, self._config())
+                self._conn = duckdb.connect(self.path, read_only=True, config=self._config())
+                self._opened_at = time.monotonic()
+                self._fingerprint = fingerprint
+                self._stale = False
+
+            self._active += 1
+
+            return self._conn.cursor()
+
+    def _release(self, cursor: duckdb.DuckDBPyConnection) -> None:
+        cursor.close()
+
+        with self._lock:
+            self._active -= 1
+
+    @contextmanager
+    def cursor(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """
+        Yield a cursor on the shared read-only connection, closed on exit.
+        """
+        cursor = self._acquire()
+        try:
+            yield cursor
+        finally:
+            self._release(cursor)
+
+    def close(self) -> None:
+        """
+        Close the shared connection (if idle) so the file can be opened for writing.
+        """
+        with self._lock:
+            if self._active == 0:
+                self._close_locked()
+            else:
+                self._stale = True
@@ -0,0 +1,422 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import TypeAlias, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+from fedlearn.common.config import DataSplit, FeatureLayout
+from fedlearn.common.data_split import (
+    CLIENT_KEYS,
+    PARTITION_BATCH_ROWS,
+    SPLIT_RANDOM_STATE,
+    STORED_SPLITS,
+    TEST_SIZE,
+    VAL_SIZE_WITHIN_TRAINVAL,
+    SplitXY,
+    duckdb_fingerprint,
+    get_client_split,
+    get_client_split_ids,
+    ids_sha256,
+)
+from fedlearn.common.model import FEATURE_LAYOUT, PREPROC_PATH, PROJECT_ROOT, load_preprocessor
+
+logger = logging.getLogger(__name__)
+
+# Constants
+
+FEATURE_STORE_DIR = PROJECT_ROOT / "data" / "feature_store"
+MANIFEST_NAME = "manifest.json"
+FEATURE_STORE_VERSION = 3
+
+# preprocessed feature matrix: dense (n, n_features) array or CSR matrix
+FeatureMatrix: TypeAlias = Union[np.ndarray, sp.csr_matrix]
+# preprocessed (X, y) of one split
+ProcessedSplit = tuple[FeatureMatrix, np.ndarray]
+
+# process-level caches
+#   path -> ((mtime_ns, size), sha256 hex digest)
+_DIGEST_CACHE: dict[Path, tuple[tuple[int, int], str]] = {}
+#   (client_key, split, preprocessor digest, layout, dtype) -> (source split frames, processed split)
+_PROCESSED_CACHE: dict[
+    tuple[str, DataSplit, str, FeatureLayout, str],
+    tuple[tuple[SplitXY, ...], ProcessedSplit],
+] = {}
+_PROCESSED_CACHE_LOCK = threading.Lock()
+#   (store dir, client_key, layout, dtype)
+#     -> (manifest fingerprint, preprocessor digest, duckdb fingerprint, mapped splits or None)
+_STORE_CACHE: dict[
+    tuple[Path, str, FeatureLayout, str],
+    tuple[tuple[int, int], str, tuple[int, int], dict[DataSplit, ProcessedSplit] | None],
+] = {}
+_STORE_CACHE_LOCK = threading.Lock()
+
+
+def file_digest(path: Path) -> str:
+    """
+    Return the sha256 digest of a file, recomputed only when its mtime/size change.
+    """
+    stat = path.stat()
+    fingerprint = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _DIGEST_CACHE.get(path)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    _DIGEST_CACHE[path] = (fingerprint, digest)
+
+    return digest
+
+
+def resolve_feature_layout(value: object = None) -> FeatureLayout:
+    """
+    Parse a feature-layout setting; empty or "auto" selects the saved preprocessor's layout.
+    """
+    text = str(value or "").strip().lower()
+    if text in ("", "auto"):
+        return FEATURE_LAYOUT
+
+    try:
+        return FeatureLayout(text)
+    except ValueError as ex:
+        raise ValueError(f"Unknown feature-layout {text!r}. Valid: ['auto', 'dense', 'sparse']") from ex
+
+
+def _freeze(X: FeatureMatrix) -> FeatureMatrix:
+    """
+    Mark a cached matrix read-only so callers cannot mutate shared state.
+    """
+    if isinstance(X, sp.csr_matrix):
+        for arr in (X.data, X.indices, X.indptr):
+            arr.setflags(write=False)
+    else:
+        X.setflags(write=False)
+    return X
+
+
+def _to_layout(X, layout: FeatureLayout, dtype: np.dtype) -> FeatureMatrix:
+    """
+    Convert a preprocessor output to the requested layout and dtype.
+    """
+    if layout is FeatureLayout.SPARSE:
+        return sp.csr_matrix(X, dtype=dtype)
+    if sp.issparse(X):
+        return X.toarray().astype(dtype, copy=False)
+    return np.asarray(X, dtype=dtype)
+
+
+def _stack_rows(parts: list[FeatureMatrix]) -> FeatureMatrix:
+    if sp.issparse(parts[0]):
+        return sp.vstack(parts, format="csr")
+    return np.concatenate(parts, axis=0)
+
+
+def _transform_split(
+        sources: tuple[SplitXY, ...],
+        preprocessor,
+        layout: FeatureLayout,
+        dtype: np.dtype,
+) -> ProcessedSplit:
+    """
+    Run the frozen preprocessor over one split; several sources are stacked in order.
+    """
+    # the transform is row-wise, so TRAIN_VAL is just TRAIN followed by VALIDATION
+    X_parts = [_to_layout(preprocessor.transform(X), layout, dtype) for X, _ in sources]
+    y_parts = [y.to_numpy() for _, y in sources]
+
+    if len(sources) == 1:
+        return _freeze(X_parts[0]), _freeze(y_parts[0])
+
+    return _freeze(_stack_rows(X_parts)), _freeze(np.concatenate(y_parts, axis=0))
+
+
+def _split_settings() -> dict[str, float]:
+    return {
+        "random_state": SPLIT_RANDOM_STATE,
+        "test_size": TEST_SIZE,
+        "val_size": VAL_SIZE_WITHIN_TRAINVAL,
+    }
+
+
+def _save_npy(path: Path, arr: np.ndarray) -> None:
+    """
+    Write an .npy file atomically (temp file, then rename).
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+def _data_fingerprint(client_key: str) -> dict[str, dict[str, object]]:
+    """
+    Row count and sha256 of the patientunitstayids (in row order) of each stored split of one client.
+    """
+    return {
+        split.value: {
+            "n_rows": int(len(ids)),
+            "ids_sha256": ids_sha256(ids),
+        }
+        for split, ids in get_client_split_ids(client_key).items()
+    }
+
+
+def export_feature_store(
+        preprocessor,
+        store_dir: Path = FEATURE_STORE_DIR,
+        layout: FeatureLayout = FEATURE_LAYOUT,
+        dtype: np.dtype | type = np.float64,
+) -> Path:
+    """
+    Write every client's preprocessed splits as .npy files plus a JSON manifest.
+
+    Each client's rows are ordered TRAIN, VALIDATION, TEST, so every split (including
+    TRAIN_VAL) is a contiguous row range of the same files. Dense layouts are stored as one
+    X.npy; sparse layouts as the CSR arrays X_data.npy, X_indices.npy and X_indptr.npy. The
+    manifest records the layout, dtype, row ranges, preprocessor.pkl hash and split
+    settings, and per client the row count and patientunitstayid hash of every split; it is
+    written last, so readers never see a manifest pointing at partial files. A change of the
+    DuckDB data (a refreshed database or re-run materialize_splits) invalidates the store until
+    it is re-exported. Returns the manifest path.
+    """
+    store_dir.mkdir(parents=True, exist_ok=True)
+    dtype = np.dtype(dtype)
+
+    clients: dict[str, dict[str, object]] = {}
+    n_features: int | None = None
+
+    for client_key in CLIENT_KEYS:
+        client_dir = store_dir / client_key
+        client_dir.mkdir(exist_ok=True)
+
+        X_parts: list[FeatureMatrix] = []
+        y_parts: list[np.ndarray] = []
+        rows: dict[str, list[int]] = {}
+        start = 0
+
+        for split in STORED_SPLITS:
+            X, y = get_client_split(client_key, split)
+            X_parts.append(_to_layout(preprocessor.transform(X), layout, dtype))
+            y_parts.append(y.to_numpy())
+            rows[split.value] = [start, start + len(X)]
+            start += len(X)
+
+        X_all = _stack_rows(X_parts)
+        y_all = np.concatenate(y_parts, axis=0)
+        n_features = int(X_all.shape[1])
+
+        if layout is FeatureLayout.SPARSE:
+            files = {name: f"{client_key}/X_{name}.npy" for name in ("data", "indices", "indptr")}
+            for name, rel in files.items():
+                _save_npy(store_dir / rel, getattr(X_all, name))
+        else:
+            files = {"dense": f"{client_key}/X.npy"}
+            _save_npy(store_dir / files["dense"], X_all)
+
+        _save_npy(client_dir / "y.npy", y_all)
+
+        clients[client_key] = {
+            "X": files,
+            "y": f"{client_key}/y.npy",
+            "n_rows": int(start),
+            "rows": rows,
+            "data": _data_fingerprint(client_key),
+        }
+
+    manifest = {
+        "version": FEATURE_STORE_VERSION,
+        "preprocessor_sha256": file_digest(PREPROC_PATH),
+        "layout": layout.value,
+        "n_features": n_features,
+        "dtype": dtype.name,
+        "split": _split_settings(),
+        "clients": clients,
+    }
+
+    manifest_path = store_dir / MANIFEST_NAME
+    tmp = manifest_path.with_name(MANIFEST_NAME + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, manifest_path)
+
+    return manifest_path
+
+
+def _mapped_rows(store_dir: Path, files: dict[str, str], n_features: int, layout: FeatureLayout):
+    """
+    Return a function slicing rows [start, stop) out of one client's memory-mapped X.
+    """
+    if layout is FeatureLayout.DENSE:
+        X_all = np.load(store_dir / files["dense"], mmap_mode="r")
+        return lambda start, stop: X_all[start:stop]
+
+    data = np.load(store_dir / files["data"], mmap_mode="r")
+    indices = np.load(store_dir / files["indices"], mmap_mode="r")
+    indptr = np.load(store_dir / files["indptr"], mmap_mode="r")
+
+    def rows(start: int, stop: int) -> sp.csr_matrix:
+        # data/indices stay views of the mapped files; only the row pointers are rebased
+        lo, hi = int(indptr[start]), int(indptr[stop])
+        X = sp.csr_matrix(
+            (data[lo:hi], indices[lo:hi], np.asarray(indptr[start:stop + 1]) - lo),
+            shape=(stop - start, n_features),
+            copy=False,
+        )
+        X.indptr.setflags(write=False)
+        return X
+
+    return rows
+
+
+def _open_feature_store(
+        client_key: str,
+        digest: str,
+        layout: FeatureLayout,
+        dtype: np.dtype,
+        store_dir: Path = FEATURE_STORE_DIR,
+) -> dict[DataSplit, ProcessedSplit] | None:
+    """
+    Memory-map one client's exported splits, or return None if there is no usable store.
+
+    The store is used only if its manifest matches the current preprocessor hash, the split
+    settings, the requested layout and dtype, and the client's split rows in DuckDB (row
+    counts and patientunitstayid hashes, rechecked whenever the DuckDB file changes). Splits
+    are read-only row slices of the mapped files, so they share the page cache with every
+    other process on the host.
+    """
+    manifest_path = store_dir / MANIFEST_NAME
+    try:
+        stat = manifest_path.stat()
+    except FileNotFoundError:
+        return None
+
+    fingerprint = (stat.st_mtime_ns, stat.st_size)
+    data_version = duckdb_fingerprint()
+    key = (store_dir, client_key, layout, dtype.name)
+
+    with _STORE_CACHE_LOCK:
+        cached = _STORE_CACHE.get(key)
+        if cached is not None and cached[:3] == (fingerprint, digest, data_version):
+            return cached[3]
+
+        with manifest_path.open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        entry = manifest.get("clients", {}).get(client_key)
+        if (
+                manifest.get("version") != FEATURE_STORE_VERSION
+                or manifest.get("preprocessor_sha256") != digest
+                or manifest.get("split") != _split_settings()
+                or manifest.get("layout") != layout.value
+                or manifest.get("dtype") != dtype.name
+                or entry is None
+        ):
+            logger.info(
+                "Feature store at %s does not match %s (%s, %s); preprocessing in process",
+                store_dir,
+                client_key,
+                layout.value,
+                dtype.name,
+            )
+            _STORE_CACHE[key] = (fingerprint, digest, data_version, None)
+            return None
+
+        if entry.get("data") != _data_fingerprint(client_key):
+            logger.warning(
+                "Feature store at %s was exported from other %s rows than DuckDB now holds; "
+                "preprocessing in process (re-run compute_model_metadata to re-export)",
+                store_dir,
+                client_key,
+            )
+            _STORE_CACHE[key] = (fingerprint, digest, data_version, None)
+            return None
+
+        X_rows = _mapped_rows(store_dir, entry["X"], int(manifest["n_features"]), layout)
+        y_all = np.load(store_dir / entry["y"], mmap_mode="r")
+
+        rows = {DataSplit(name): bounds for name, bounds in entry["rows"].items()}
+        splits = {
+            split: (X_rows(start, stop), y_all[start:stop])
+            for split, (start, stop) in rows.items()
+        }
+
+        # TRAIN and VALIDATION are adjacent, so TRAIN_VAL is a view as well
+        start, stop = rows[DataSplit.TRAIN][0], rows[DataSplit.VALIDATION][1]
+        splits[DataSplit.TRAIN_VAL] = (X_rows(start, stop), y_all[start:stop])
+
+        logger.info("Memory-mapped %s feature store for %s (%d rows)", layout.value, client_key, int(entry["n_rows"]))
+
+        _STORE_CACHE[key] = (fingerprint, digest, data_version, splits)
+
+    return splits
+
+
+def get_client_processed_split(
+        client_key: str,
+        split: DataSplit,
+        batch_rows: int = PARTITION_BATCH_ROWS,
+        layout: FeatureLayout = FEATURE_LAYOUT,
+        dtype: np.dtype | type = np.float64,
+) -> ProcessedSplit:
+    """
+    Return the preprocessed feature matrix and labels for one split of one client.
+
+    The fitted preprocessor is frozen, so each split is transformed once and cached per
+    process, keyed by the preprocessor.pkl hash; only the requested split's rows are loaded.
+    TRAIN_VAL is TRAIN followed by VALIDATION. The entry is rebuilt if the underlying split is
+    reloaded. If an up-to-date feature store was exported (see export_feature_store), the
+    split is served from it memory-mapped instead. X is a dense array or a CSR matrix,
+    depending on layout, in the given dtype. Returned arrays are read-only.
+    """
+    digest = file_digest(PREPROC_PATH)
+    dtype = np.dtype(dtype)
+
+    stored = _open_feature_store(client_key, digest, layout, dtype)
+    if stored is not None:
+        return stored[split]
+
+    parts = (DataSplit.TRAIN, DataSplit.VALIDATION) if split is DataSplit.TRAIN_VAL else (split,)
+    sources = tuple(get_client_split(client_key, part, batch_rows=batch_rows) for part in parts)
+    key = (client_key, split, digest, layout, dtype.name)
+
+    with _PROCESSED_CACHE_LOCK:
+        cached = _PROCESSED_CACHE.get(key)
+        if cached is not None and all(a is b for a, b in zip(cached[0], sources)):
+            return cached[1]
+
+        logger.info(
+            "Preprocessing %s split of %s (preprocessor=%s, layout=%s, dtype=%s)",
+            split.value,
+            client_key,
+            digest[:12],
+            layout.value,
+            dtype.name,
+        )
+
+        processed = _transform_split(sources, load_preprocessor(), layout, dtype)
+
+        # drop entries for stale preprocessors of this client split, layout and dtype
+        for stale in [k for k in _PROCESSED_CACHE if k[:2] == (client_key, split) and k[3:] == key[3:]]:
+            del _PROCESSED_CACHE[stale]
+
+        _PROCESSED_CACHE[key] = (sources, processed)
+
+    return processed
+
+
+def clear_processed_cache() -> None:
+    """
+    Drop all cached preprocessed splits held by this process.
+    """
+    with _PROCESSED_CACHE_LOCK:
+        _PROCESSED_CACHE.clear()
+
+    with _STORE_CACHE_LOCK:
+        _STORE_CACHE.clear()
@@ -5,21 +5,31 @@ from typing import Any
 
 import numpy as np
 from flwr.common import MetricRecord
+from scipy.special import expit
 from sklearn.exceptions import NotFittedError
-from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
 
 from fedlearn.common.model import CLASSES
 
 logger = logging.getLogger(__name__)
 
 
-def compute_binary_metrics(model, X, y) -> dict[str, float]:
+def _decision_scores(model, X) -> np.ndarray:
     """
-    Compute binary model metrics (accuracy, log loss, ROC-AUC) with failure flags.
+    Return the positive-class decision scores (logits) for X in a single model pass.
     """
-    y_pred = model.predict(X)
-    acc = float(accuracy_score(y, y_pred))
+    if hasattr(model, "decision_function"):
+        return np.asarray(model.decision_function(X), dtype=np.float64).ravel()
+
+    # probability-only models: map P(y=1) back to logits
+    proba = np.asarray(model.predict_proba(X), dtype=np.float64)[:, 1]
+    with np.errstate(divide="ignore"):
+        return np.log(proba) - np.log1p(-proba)
 
+
+def _get_labels(model) -> np.ndarray:
+    """
+    Return the class labels of the model (or its classifier step), defaulting to CLASSES.
+    """
     labels = getattr(model, "classes_", None)
     if labels is None and hasattr(model, "named_steps"):
         clf = model.named_steps.get("classifier")
@@ -28,18 +38,57 @@ def compute_binary_metrics(model, X, y) -> dict[str, float]:
     if labels is None:
         labels = CLASSES
 
-    log_loss_failed = 0.0
-    try:
-        y_proba = model.predict_proba(X)
-        loss = float(log_loss(y, y_proba, labels=labels))
-    except (ValueError, AttributeError, NotFittedError):
-        loss = float("nan")
-        log_loss_failed = 1.0
+    return np.asarray(labels)
+
+
+def _log_sigmoid(x: np.ndarray) -> np.ndarray:
+    """
+    Numerically stable log(sigmoid(x)).
+    """
+    return -np.logaddexp(0.0, -x)
+
+
+def binary_log_loss(y_pos: np.ndarray, scores: np.ndarray) -> float:
+    """
+    Mean binary log loss from decision scores.
+
+    Per-sample terms are clipped like sklearn's log_loss (probabilities clipped to [eps, 1 - eps]).
+    """
+    eps = np.finfo(np.float64).eps
+    nll = -np.where(y_pos, _log_sigmoid(scores), _log_sigmoid(-scores))
+    return float(np.mean(np.clip(nll, -np.log1p(-eps), -np.log(eps))))
+
+
+def binary_roc_auc(y_pos: np.ndarray, y_score: np.ndarray) -> float:
+    """
+    Sort-based ROC-AUC (Mann-Whitney U with tie-averaged ranks).
+    """
+    n_pos = int(np.count_nonzero(y_pos))
+    n_neg = int(y_pos.size - n_pos)
+
+    # average 1-based rank of each distinct score, then scatter back to samples
+    _, inverse, counts = np.unique(y_score, return_inverse=True, return_counts=True)
+    avg_rank = np.cumsum(counts) - (counts - 1) / 2.0
+    rank_sum_pos = float(np.sum(avg_rank[inverse][y_pos]))
+
+    return (rank_sum_pos - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg)
+
+
+def _score_metrics(y_true: np.ndarray, scores: np.ndarray, labels: np.ndarray) -> dict[str, float]:
+    """
+    Derive log loss and ROC-AUC (with failure flags) from one decision score vector.
+    """
+    y_pos = y_true == labels[-1]
+    valid = bool(np.all(np.isin(y_true, labels))) and not np.isnan(scores).any()
+
+    if valid:
+        loss, log_loss_failed = binary_log_loss(y_pos, scores), 0.0
+    else:
+        loss, log_loss_failed = float("nan"), 1.0
 
-    roc_auc, roc_auc_failed = compute_roc_auc(y, model, X)
+    roc_auc, roc_auc_failed = _roc_auc_from_scores(y_true, y_pos, scores) if valid else (0.5, 1.0)
 
     return {
-        "accuracy": acc,
         "loss": loss,
         "roc_auc": roc_auc,
         "log-loss-failed": log_loss_failed,
@@ -47,6 +96,37 @@ def compute_binary_metrics(model, X, y) -> dict[str, float]:
     }
 
 
+def _roc_auc_from_scores(y_true: np.ndarray, y_pos: np.ndarray, scores: np.ndarray) -> tuple[float, float]:
+    """
+    ROC-AUC with the (0.5, 1.0) fallback when it cannot be computed.
+    """
+    # AUC requires both classes
+    if len(np.unique(y_true)) < 2:
+        return 0.5, 1.0
+
+    # rank on probabilities (not raw scores) so saturated predictions tie exactly as before
+    return binary_roc_auc(y_pos, expit(scores)), 0.0
+
+
+def compute_binary_metrics(model, X, y) -> dict[str, float]:
+    """
+    Compute binary model metrics (accuracy, log loss, ROC-AUC) with failure flags.
+
+    The decision scores are computed once and all metrics are derived from that one vector.
+    """
+    labels = _get_labels(model)
+    y_true = np.asarray(y)
+
+    scores = _decision_scores(model, X)
+    y_pred = labels[(scores > 0).astype(np.intp)]
+    acc = float(np.mean(y_pred == y_true))
+
+    return {
+        "accuracy": acc,
+        **_score_metrics(y_true, scores, labels),
+    }
+
+
 def compute_roc_auc(y_true, model, X) -> tuple[float, float]:
     """
     Compute ROC-AUC safely for binary classification.
@@ -54,27 +134,18 @@ def compute_roc_auc(y_true, model, X) -> tuple[float, float]:
     Returns:
         (roc_auc, failed_flag). If the score cannot be computed, a fallback value of (0.5, 1.0) is returned.
     """
-    # AUC requires both classes
-    if len(np.unique(y_true)) < 2:
-        return 0.5, 1.0
+    y_true = np.asarray(y_true)
+    labels = _get_labels(model)
 
-    # try probability scores first
-    if hasattr(model, "predict_proba"):
-        try:
-            y_score = model.predict_proba(X)[:, 1]
-            return float(roc_auc_score(y_true, y_score)), 0.0
-        except ValueError:
-            pass
+    try:
+        scores = _decision_scores(model, X)
+    except (ValueError, AttributeError, NotFittedError):
+        return 0.5, 1.0
 
-    # fallback to decision scores
-    if hasattr(model, "decision_function"):
-        try:
-            y_score = model.decision_function(X)
-            return float(roc_auc_score(y_true, y_score)), 0.0
-        except ValueError:
-            pass
+    if np.isnan(scores).any() or not np.all(np.isin(y_true, labels)):
+        return 0.5, 1.0
 
-    return 0.5, 1.0
+    return _roc_auc_from_scores(y_true, y_true == labels[-1], scores)
 
 
 def metricrecord_to_dict(mrec: MetricRecord) -> dict[str, Any]:
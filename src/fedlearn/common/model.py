@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 import json
+import threading
+from collections.abc import Iterator, Sequence
+from copy import deepcopy
 from pathlib import Path
 from typing import Any
 
@@ -10,8 +13,10 @@ import pandas as pd
 from sklearn.compose import ColumnTransformer
 from sklearn.linear_model import SGDClassifier
 from sklearn.pipeline import Pipeline
+from sklearn.utils import compute_class_weight
 
-from fedlearn.common.config import HParams
+from fedlearn.common.config import FEATURE_DTYPES, FeatureLayout, HParams, Trainer
+from fedlearn.common.sgd import NumpySGDClassifier
 
 # Constants
 
@@ -27,20 +32,52 @@ with META_PATH.open("r", encoding="utf-8") as f:
 N_FEATURES: int = int(META["n_features"])
 CLASSES: np.ndarray = np.array(META["classes"], dtype=np.int64)
 INIT_INTERCEPT: np.ndarray = np.array(META["intercept"], dtype=np.float64)
+# layout the saved preprocessor produces (older metadata files predate sparse support)
+FEATURE_LAYOUT = FeatureLayout(META.get("feature_layout", FeatureLayout.DENSE.value))
 
+# process-level preprocessor cache: path -> ((mtime_ns, size), fitted transformer)
+_PREPROCESSOR_CACHE: dict[Path, tuple[tuple[int, int], Any]] = {}
+_PREPROCESSOR_LOCK = threading.Lock()
 
-def _load_preprocessor():
+
+def load_preprocessor(path: Path = PREPROC_PATH, copy: bool = False):
     """
     Load the pre-fitted preprocessing pipeline.
+
+    The pickle is deserialized once per process and reloaded only when the file's mtime/size
+    change. The shared fitted transformer is returned by default; pass copy=True to get a
+    private deep copy that is safe to mutate.
+    """
+    stat = path.stat()
+    fingerprint = (stat.st_mtime_ns, stat.st_size)
+
+    with _PREPROCESSOR_LOCK:
+        cached = _PREPROCESSOR_CACHE.get(path)
+        if cached is None or cached[0] != fingerprint:
+            cached = (fingerprint, joblib.load(path))
+            _PREPROCESSOR_CACHE[path] = cached
+
+    preprocessor = cached[1]
+
+    return deepcopy(preprocessor) if copy else preprocessor
+
+
+def resolve_feature_dtype(value: object = None) -> np.dtype:
     """
-    return joblib.load(PREPROC_PATH)
+    Parse a feature-dtype setting (float64 | float32); empty selects float64.
+    """
+    text = str(value or "float64").strip().lower()
+    if text not in FEATURE_DTYPES:
+        raise ValueError(f"Unknown feature-dtype {text!r}. Valid: {sorted(FEATURE_DTYPES)}")
+
+    return np.dtype(text)
 
 
 def get_input_feature_names() -> np.ndarray:
     """
     Return the feature column names in order that the preprocessor expects.
     """
-    preprocessor = _load_preprocessor()
+    preprocessor = load_preprocessor()
 
     if isinstance(preprocessor, Pipeline):
         for name, step in preprocessor.named_steps.items():
@@ -69,20 +106,31 @@ def get_input_feature_names() -> np.ndarray:
     return np.array(feature_names, dtype=object)
 
 
-def get_model(hp: HParams) -> Pipeline:
+def resolve_trainer(value: object = None) -> Trainer:
+    """
+    Parse a trainer setting (sklearn | numpy); empty selects sklearn.
+    """
+    text = str(value or Trainer.SKLEARN.value).strip().lower()
+    try:
+        return Trainer(text)
+    except ValueError as ex:
+        raise ValueError(f"Unknown trainer {text!r}. Valid: {[t.value for t in Trainer]}") from ex
+
+
+def get_model(hp: HParams, trainer: Trainer = Trainer.SKLEARN) -> Pipeline:
     """
     Create the global sklearn model to be trained federatedly.
+
+    trainer selects the classifier step: sklearn's SGDClassifier or the NumPy implementation
+    of the same log-loss SGD (same parameters, penalties and schedules).
     """
     args: dict[str, Any] = dict(
-        loss="log_loss",
         penalty=hp.penalty,
         max_iter=hp.local_epochs,  # how many epochs each client runs per round
         tol=None,
         class_weight=hp.class_weight,
         learning_rate=hp.sgd_learning_rate,
-        n_jobs=-1,
         random_state=42,
-        warm_start=True,
     )
 
     # eta0 is only valid/used for certain schedules and must be > 0
@@ -92,20 +140,69 @@ def get_model(hp: HParams) -> Pipeline:
             raise ValueError(f"sgd-eta0 must be > 0 for {hp.sgd_learning_rate}, got {eta0}")
         args["eta0"] = eta0
 
-    model = SGDClassifier(**args)
+    if trainer == Trainer.NUMPY:
+        if hp.batch_size > 0:
+            args["batch_size"] = hp.batch_size
+        model = NumpySGDClassifier(**args)
+    else:
+        model = SGDClassifier(loss="log_loss", n_jobs=-1, warm_start=True, **args)
     model.classes_ = CLASSES
 
     return Pipeline(
         steps=[
-            ("preprocessor", _load_preprocessor()),
+            ("preprocessor", load_preprocessor()),
             ("classifier", model),
         ]
     )
 
 
-def set_initial_params(pipeline: Pipeline) -> None:
+def iter_sample_batches(
+        n_rows: int,
+        n_samples: int,
+        batch_size: int,
+        rng: np.random.Generator,
+) -> Iterator[np.ndarray]:
+    """
+    Yield sorted row-index batches for a stream of n_samples rows drawn from n_rows.
+
+    The stream walks through seeded permutations of all rows (a fresh one per pass), so rows
+    repeat only once every row has been drawn; the last batch may be shorter.
+    """
+    n_passes = -(-n_samples // n_rows)
+    stream = np.concatenate([rng.permutation(n_rows) for _ in range(n_passes)])[:n_samples]
+
+    for start in range(0, n_samples, batch_size):
+        # sorted indices gather faster and partial_fit reshuffles within the batch anyway
+        yield np.sort(stream[start:start + batch_size])
+
+
+def partial_fit_stream(clf, X, y: np.ndarray, hp: HParams, seed: Sequence[int]) -> int:
+    """
+    Train clf in place with partial_fit on a bounded, seeded mini-batch stream from (X, y).
+
+    The round's cost is set by hp.stream_samples() rows in batches of hp.stream_batch_size,
+    independent of the size of X. "balanced" class weights are computed once on the full y,
+    since partial_fit cannot derive them from a single batch. Returns the number of rows streamed.
+    """
+    n_samples = hp.stream_samples()
+    if n_samples <= 0 or X.shape[0] == 0:
+        return 0
+
+    if hp.class_weight == "balanced":
+        weights = compute_class_weight("balanced", classes=CLASSES, y=y)
+        clf.class_weight = dict(zip(CLASSES.tolist(), weights.tolist()))
+
+    rng = np.random.default_rng(list(seed))
+
+    for idx in iter_sample_batches(X.shape[0], n_samples, hp.stream_batch_size, rng):
+        clf.partial_fit(X[idx], y[idx], classes=CLASSES)
+
+    return n_samples
+
+
+def set_initial_params(pipeline: Pipeline, dtype: np.dtype | type = np.float64) -> None:
     """
-    Initialize the model's parameters using model_meta.json.
+    Initialize the model's parameters (in the given dtype) using model_meta.json.
 
     Uses:
       - N_FEATURES: preprocessed feature dimension
@@ -120,50 +217,66 @@ def set_initial_params(pipeline: Pipeline) -> None:
     if n_classes <= 2:
         # binary case: SGDClassifier stores coef_ as (1, n_features)
         # and intercept_ as a single bias term of shape (1,)
-        clf.coef_ = np.zeros((1, N_FEATURES), dtype=np.float64)
+        clf.coef_ = np.zeros((1, N_FEATURES), dtype=dtype)
 
         if INIT_INTERCEPT.size > 0:
             b0 = float(INIT_INTERCEPT.ravel()[0])
         else:
             b0 = 0.0
 
-        clf.intercept_ = np.array([b0], dtype=np.float64)
+        clf.intercept_ = np.array([b0], dtype=dtype)
     else:
         # multiclass case: shape (n_classes, n_features) and (n_classes,)
-        clf.coef_ = np.zeros((n_classes, N_FEATURES), dtype=np.float64)
+        clf.coef_ = np.zeros((n_classes, N_FEATURES), dtype=dtype)
 
         if INIT_INTERCEPT.shape == (n_classes,):
-            clf.intercept_ = INIT_INTERCEPT.astype(np.float64).copy()
+            clf.intercept_ = INIT_INTERCEPT.astype(dtype)
         else:
             raise RuntimeError(
                 f"INIT_INTERCEPT shape {INIT_INTERCEPT.shape} does not match number of classes {n_classes}"
             )
 
 
-def get_model_params(pipeline: Pipeline) -> list[np.ndarray]:
+def get_model_params(
+        pipeline: Pipeline,
+        copy: bool = True,
+        dtype: np.dtype | type | None = None,
+) -> list[np.ndarray]:
     """
     Extract model parameters as a list of NumPy arrays.
 
-    The order and shapes must match what set_model_params() expects.
+    The order and shapes must match what set_model_params() expects. With copy=False the
+    classifier's own arrays are returned, e.g. when they are serialized right away. A dtype
+    casts both arrays to it (sklearn keeps intercept_ in float64 even when coef_ is float32).
     """
     clf: SGDClassifier = pipeline.named_steps["classifier"]
 
     if not hasattr(clf, "coef_"):
         raise RuntimeError("Classifier has no coef_. Did you call set_initial_params?")
 
-    return [clf.coef_.copy(), clf.intercept_.copy()]
+    convert = np.array if copy else np.asarray
+    return [convert(clf.coef_, dtype=dtype), convert(clf.intercept_, dtype=dtype)]
 
 
-def set_model_params(pipeline: Pipeline, params: list[np.ndarray]) -> None:
+def set_model_params(
+        pipeline: Pipeline,
+        params: list[np.ndarray],
+        dtype: np.dtype | type | None = None,
+        copy: bool = True,
+) -> None:
     """
     Set model parameters from a list of NumPy arrays.
 
     Args:
         pipeline: The Pipeline whose classifier will be modified.
         params: [coef, intercept] as NumPy arrays.
+        dtype: Optional dtype to store the parameters in (default: keep the incoming dtype).
+        copy: If False, adopt the given arrays when they already have the dtype (the caller
+            must not reuse them, since training updates them in place).
     """
     clf: SGDClassifier = pipeline.named_steps["classifier"]
     coef, intercept = params
-    clf.coef_ = coef.copy()
-    clf.intercept_ = intercept.copy()
+    convert = np.array if copy else np.asarray
+    clf.coef_ = convert(coef, dtype=dtype)
+    clf.intercept_ = convert(intercept, dtype=dtype)
     clf.classes_ = CLASSES
@@ -102,9 +102,12 @@ NUMERIC_FEATURES: list[str] = [
 ALL_FEATURES: list[str] = (NUMERIC_FEATURES + CATEGORICAL_FEATURES)
 
 
-def build_preprocessor() -> ColumnTransformer:
+def build_preprocessor(sparse: bool = False) -> ColumnTransformer:
     """
     Build a preprocessing pipeline with a fixed, annotation-aware schema.
+
+    With sparse=True the one-hot block stays sparse and the output is always a CSR matrix
+    (numeric columns followed by the one-hot columns), instead of a dense array.
     """
     # schema integrity checks
     overlap = set(NUMERIC_FEATURES) & set(CATEGORICAL_FEATURES)
@@ -127,7 +130,7 @@ def build_preprocessor() -> ColumnTransformer:
 
     categorical_pipeline = Pipeline([
         ("imputer", SimpleImputer(strategy="most_frequent")),
-        ("onehot", OneHotEncoder(categories=categories_per_feature, handle_unknown="ignore", sparse_output=False)),
+        ("onehot", OneHotEncoder(categories=categories_per_feature, handle_unknown="ignore", sparse_output=sparse)),
     ])
 
     preprocessor = ColumnTransformer(
@@ -135,6 +138,8 @@ def build_preprocessor() -> ColumnTransformer:
             ("numerical", numeric_pipeline, NUMERIC_FEATURES),
             ("categorical", categorical_pipeline, CATEGORICAL_FEATURES),
         ],
+        # 1.0 forces CSR output whenever any block is sparse, 0.0 always stacks dense
+        sparse_threshold=1.0 if sparse else 0.0,
     )
 
     return preprocessor
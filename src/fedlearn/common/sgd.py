@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.special import expit
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+# Constants
+
+DEFAULT_ALPHA = 1e-4  # SGDClassifier defaults
+DEFAULT_L1_RATIO = 0.15
+DEFAULT_BATCH_SIZE = 128
+MIN_ADAPTIVE_ETA = 1e-6
+
+PENALTIES = ("l2", "l1", "elasticnet")
+SCHEDULES = ("optimal", "constant", "adaptive")
+
+
+class NumpySGDClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Binary logistic-regression SGD in vectorized NumPy, a drop-in for the SGDClassifier we use.
+
+    Same penalties, schedules and class weights as SGDClassifier's log_loss; each step applies
+    batch_size per-sample updates computed against the same weights (batch_size=1 is plain SGD).
+    """
+
+    def __init__(
+            self,
+            *,
+            penalty: str = "l2",
+            alpha: float = DEFAULT_ALPHA,
+            l1_ratio: float = DEFAULT_L1_RATIO,
+            learning_rate: str = "optimal",
+            eta0: float = 0.0,
+            max_iter: int = 5,
+            tol: float | None = None,
+            n_iter_no_change: int = 5,
+            class_weight: str | None = None,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            shuffle: bool = True,
+            random_state: int | None = 42,
+    ):
+        self.penalty = penalty
+        self.alpha = alpha
+        self.l1_ratio = l1_ratio
+        self.learning_rate = learning_rate
+        self.eta0 = eta0
+        self.max_iter = max_iter
+        self.tol = tol
+        self.n_iter_no_change = n_iter_no_change
+        self.class_weight = class_weight
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.random_state = random_state
+
+    def _validate(self) -> None:
+        if self.penalty not in PENALTIES:
+            raise ValueError(f"Unknown penalty {self.penalty!r}. Valid: {list(PENALTIES)}")
+        if self.learning_rate not in SCHEDULES:
+            raise ValueError(f"Unknown learning_rate {self.learning_rate!r}. Valid: {list(SCHEDULES)}")
+        if self.learning_rate != "optimal" and self.eta0 <= 0.0:
+            raise ValueError(f"eta0 must be > 0 for {self.learning_rate}, got {self.eta0}")
+        if not (self.class_weight is None or self.class_weight == "balanced" or isinstance(self.class_weight, dict)):
+            raise ValueError(f"class_weight must be None, 'balanced' or a dict, got {self.class_weight!r}")
+        if self.batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {self.batch_size}")
+
+    def _l1_ratio(self) -> float:
+        if self.penalty == "l2":
+            return 0.0
+        if self.penalty == "l1":
+            return 1.0
+        return float(self.l1_ratio)
+
+    def _class_weights(self, y_pos: np.ndarray) -> tuple[float, float]:
+        """
+        (negative, positive) class weights for this fit.
+        """
+        if isinstance(self.class_weight, dict):
+            return (
+                float(self.class_weight.get(self.classes_[0], 1.0)),
+                float(self.class_weight.get(self.classes_[1], 1.0)),
+            )
+        if self.class_weight != "balanced":
+            return 1.0, 1.0
+
+        n_pos = int(np.count_nonzero(y_pos))
+        n_neg = int(y_pos.size - n_pos)
+        if n_pos == 0 or n_neg == 0:
+            raise ValueError("class_weight='balanced' needs both classes in the fit data")
+
+        return y_pos.size / (2.0 * n_neg), y_pos.size / (2.0 * n_pos)
+
+    def _step_sizes(self, t: float, n: int, eta: float) -> np.ndarray:
+        """
+        Per-sample step sizes for samples t, t + 1, ..., t + n - 1.
+        """
+        if self.learning_rate != "optimal":
+            return np.full(n, eta)
+
+        alpha = float(self.alpha)
+        typw = np.sqrt(1.0 / np.sqrt(alpha))
+        # log loss gradient at (y=1, p=-typw) is below 1, so eta at the first sample is typw
+        optimal_init = 1.0 / (typw * alpha)
+
+        return 1.0 / (alpha * (optimal_init + t - 1.0 + np.arange(n)))
+
+    def _batch_decays(self, etas: np.ndarray, l1_ratio: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Fold the per-sample l2 decay into per-batch factors.
+
+        Returns (total, after): total[k] scales the weights once for batch k, and after[i] is the
+        decay still applied to sample i's update by the samples that follow it in its batch.
+        """
+        batch = int(self.batch_size)
+        n = etas.size
+        n_batches = -(-n // batch)
+
+        decay = np.ones(n_batches * batch)
+        decay[:n] = np.maximum(0.0, 1.0 - (1.0 - l1_ratio) * etas * float(self.alpha))
+        decay = decay.reshape(n_batches, batch)
+
+        # suffix products within each batch: suffix[k, i] = prod(decay[k, i:])
+        suffix = np.cumprod(decay[:, ::-1], axis=1)[:, ::-1]
+        after = np.ones_like(decay)
+        after[:, :-1] = suffix[:, 1:]
+
+        return suffix[:, 0], after.ravel()[:n]
+
+    def _set_classes(self, y: np.ndarray, classes=None) -> None:
+        if not hasattr(self, "classes_"):
+            self.classes_ = np.unique(y) if classes is None else np.asarray(classes)
+        if len(self.classes_) != 2:
+            raise ValueError(f"NumpySGDClassifier is binary only, got classes {self.classes_}")
+
+    def fit(self, X, y) -> "NumpySGDClassifier":
+        """
+        Run max_iter epochs from the current coef_/intercept_ (zeros if unset).
+        """
+        self._validate()
+        y = np.asarray(y)
+        self._set_classes(y)
+
+        self.t_ = 1.0
+        self.n_iter_ = self._sgd(X, y, int(self.max_iter))
+
+        return self
+
+    def partial_fit(self, X, y, classes=None) -> "NumpySGDClassifier":
+        """
+        Run one epoch over X, continuing the learning-rate schedule from earlier calls.
+        """
+        self._validate()
+        if self.class_weight == "balanced":
+            raise ValueError(
+                "class_weight 'balanced' is not supported for partial_fit; pass the weights "
+                "computed on the full data as a dict instead"
+            )
+
+        y = np.asarray(y)
+        self._set_classes(y, classes)
+
+        if not hasattr(self, "t_"):
+            self.t_ = 1.0
+        self.n_iter_ = self._sgd(X, y, 1)
+
+        return self
+
+    def _sgd(self, X, y: np.ndarray, n_epochs: int) -> int:
+        """
+        Run up to n_epochs epochs starting at self.t_; update coef_, intercept_ and t_ in place.
+
+        Returns the number of epochs run (fewer than n_epochs only when tol stops training).
+        """
+        n_samples, n_features = X.shape
+        coef = getattr(self, "coef_", None)
+        if coef is None:
+            dtype = np.dtype(np.float64)
+            w = np.zeros(n_features, dtype=dtype)
+        else:
+            dtype = coef.dtype
+            w = np.array(coef, dtype=dtype).ravel()
+        b = float(np.ravel(getattr(self, "intercept_", [0.0]))[0])
+
+        sparse = sp.issparse(X)
+        if sparse:
+            X = sp.csr_matrix(X)
+
+        y_pos = y == self.classes_[1]
+        y_sign = np.where(y_pos, 1.0, -1.0)
+        w_neg, w_pos = self._class_weights(y_pos)
+        sample_cw = np.where(y_pos, w_pos, w_neg)
+
+        alpha = float(self.alpha)
+        l1_ratio = self._l1_ratio()
+        intercept_decay = 0.01 if sparse else 1.0
+        rng = np.random.RandomState(self.random_state)
+        batch = int(self.batch_size)
+
+        eta = float(self.eta0)
+        t = float(self.t_)
+        u = 0.0
+        q = np.zeros(n_features, dtype=np.float64) if l1_ratio > 0.0 else None
+        tol = -np.inf if self.tol is None else float(self.tol)
+        best_objective = np.inf
+        no_improvement = 0
+
+        n_iter = 0
+        for _ in range(n_epochs):
+            order = rng.permutation(n_samples) if self.shuffle else np.arange(n_samples)
+            # CSR rows are reordered once per epoch (row fancy-indexing is costly for CSR), while
+            # dense batches are gathered one at a time so they stay in cache for both products
+            X_epoch = X[order] if sparse else X
+            y_epoch = y_sign[order]
+
+            etas = self._step_sizes(t, n_samples, eta)
+            totals, after = self._batch_decays(etas, l1_ratio)
+            # per-sample update before the logistic factor: eta * y * class weight
+            scaled = etas * y_epoch * sample_cw[order]
+            objective = 0.0
+
+            for k, start in enumerate(range(0, n_samples, batch)):
+                stop = min(start + batch, n_samples)
+                Xb = X_epoch[start:stop] if sparse else X[order[start:stop]]
+                yb = y_epoch[start:stop]
+
+                p = Xb @ w + b
+                # -d(log loss)/dp is y * sigmoid(-y * p); it never exceeds 1, so no clipping is needed
+                updates = scaled[start:stop] * expit(-yb * p)
+
+                if tol > -np.inf:
+                    objective += float(np.sum(np.logaddexp(0.0, -yb * p)))
+
+                w *= dtype.type(totals[k])
+                w += Xb.T @ (updates * after[start:stop]).astype(dtype, copy=False)
+                b += float(np.sum(updates)) * intercept_decay
+
+                if q is not None:
+                    u += l1_ratio * alpha * float(np.sum(etas[start:stop]))
+                    z = w.astype(np.float64)
+                    shrunk = np.where(
+                        z > 0.0,
+                        np.maximum(0.0, z - (u + q)),
+                        np.where(z < 0.0, np.minimum(0.0, z + (u - q)), z),
+                    )
+                    q += shrunk - z
+                    w[:] = shrunk
+
+            t += n_samples
+            n_iter += 1
+
+            if not np.isfinite(b) or not np.all(np.isfinite(w)):
+                raise ValueError(
+                    f"Floating-point under-/overflow occurred at epoch #{n_iter}. "
+                    "Scaling input data with StandardScaler or MinMaxScaler might help."
+                )
+
+            if tol > -np.inf:
+                objective /= n_samples
+                no_improvement = no_improvement + 1 if objective > best_objective - tol else 0
+                best_objective = min(best_objective, objective)
+
+                if no_improvement >= self.n_iter_no_change:
+                    if self.learning_rate == "adaptive" and eta > MIN_ADAPTIVE_ETA:
+                        eta /= 5.0
+                        no_improvement = 0
+                    else:
+                        break
+
+        self.coef_ = w.reshape(1, -1)
+        self.intercept_ = np.array([b], dtype=dtype)
+        self.t_ = t
+
+        return n_iter
+
+    def decision_function(self, X) -> np.ndarray:
+        return np.asarray(X @ self.coef_.ravel()).ravel() + self.intercept_[0]
+
+    def predict_proba(self, X) -> np.ndarray:
+        p1 = expit(self.decision_function(X))
+        return np.column_stack([1.0 - p1, p1])
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[(self.decision_function(X) > 0).astype(np.intp)]
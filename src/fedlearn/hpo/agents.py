@@ -1,24 +1,28 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 import math
 import os
+import re
 from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dataclasses import dataclass, field
-from typing import Any, Literal, get_args
+from pathlib import Path
+from typing import Any, Literal, Protocol, get_args
 
 from agents import Agent, ModelSettings, Runner
 from flwr.app import ArrayRecord, ConfigRecord
 from flwr.common.message import Message
 from flwr.common.record.metricrecord import MetricRecord
 from flwr.serverapp import Grid
-from flwr.serverapp.strategy import FedAvg
 from openai import OpenAIError
 from pydantic import BaseModel, Field, ValidationError, model_validator
 
 from fedlearn.common.config import DataSplit, HParams
 from fedlearn.common.metrics import metricrecord_to_dict
+from fedlearn.hpo.strategies import BufferedFedAvg, MonitoredFedAvg
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +34,35 @@ Schedule = Literal["optimal", "constant", "adaptive"]
 ALLOWED_PENALTIES = list(get_args(Penalty))
 ALLOWED_SCHEDULES = list(get_args(Schedule))
 
+# budget knobs the agent may set when the run trains on a bounded sample stream
+AGENT_LOCAL_STEPS_RANGE = (10, 500)
+AGENT_BATCH_SIZE_RANGE = (32, 1024)
+
+AGENT_INSTRUCTIONS = (
+    "You are an expert federated learning hyperparameter controller. "
+    "Each round, propose the next training hyperparameters. "
+    "You only see aggregated metrics and prior choices. "
+    "Goal: maximize roc_auc while keeping loss low and training stable. "
+    "Do not overreact to one noisy round. "
+    "Early rounds may explore more; later rounds should prefer smaller, conservative changes. "
+    "Treat penalty and learning-rate schedule changes as major changes. "
+    "Prefer adjusting local_epochs or eta0 before changing penalty or schedule. "
+    "local_steps, batch_size and max_samples_per_round set the per-round training budget; change them only when search_space lists a range for them, otherwise return their current values. "
+    "server_lr is the step size of the server optimizer applied to each round's aggregate; change it only when search_space lists a range for it, otherwise return its current value. "
+    "Use constant learning rate only when there is clear evidence that the current learning-rate approach is underperforming. "
+    "Set exploit=1 only when you are intentionally keeping or only slightly adjusting a configuration that has shown stable or improving performance across multiple recent rounds, and avoid exploit=1 too early in training. "
+    "Set exploit=0 when you are testing a meaningfully different configuration. "
+    "If best_seen is provided, use it mainly in later rounds as an anchor unless there is strong evidence to explore elsewhere. "
+)
+
+# matches the "[agentic_hpo] decision: ..." line logged by AgenticFedAvg.configure_train
+DECISION_LOG_RE = re.compile(
+    r"\[agentic_hpo\] decision: round=(?P<round>\d+) exploit=(?P<exploit>\S+) .*?"
+    r"hp=\{epochs=(?P<epochs>\d+) penalty=(?P<penalty>\S+) lr=(?P<lr>\S+) eta0=(?P<eta0>[^}\s]+)"
+    r"(?: steps=(?P<steps>\d+) batch=(?P<batch>\d+) samples=(?P<samples>\d+))?"
+    r"(?: server_lr=(?P<server_lr>[^}\s]+))?\}"
+)
+
 
 def _safe_float(x: Any) -> float | None:
     return float(x) if isinstance(x, (int, float)) else None
@@ -55,6 +88,10 @@ class AgenticHPOProposal(BaseModel):
     penalty: Penalty
     sgd_learning_rate: Schedule
     sgd_eta0: float = Field(ge=0.0, le=1e-2)
+    local_steps: int = Field(ge=0, le=AGENT_LOCAL_STEPS_RANGE[1])
+    batch_size: int = Field(ge=0, le=AGENT_BATCH_SIZE_RANGE[1])
+    max_samples_per_round: int = Field(ge=0)
+    server_lr: float = Field(gt=0.0)
     exploit: Literal[0, 1]
 
     @model_validator(mode="after")
@@ -66,50 +103,292 @@ class AgenticHPOProposal(BaseModel):
         return self
 
 
+def _canonical(obj: Any) -> Any:
+    """
+    Normalize a state payload for hashing: floats rounded so rerun noise does not miss the cache.
+    """
+    if isinstance(obj, float):
+        return round(obj, 6)
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    return obj
+
+
+def payload_hash(payload: dict[str, Any]) -> str:
+    """
+    Return the sha256 of the canonical JSON form of a controller state payload.
+    """
+    text = json.dumps(_canonical(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ProposalBackend(Protocol):
+    """
+    Source of next-round proposals for AgenticHPOController.
+
+    Implementations raise (ValueError, TypeError, ValidationError, OpenAIError, RuntimeError)
+    when no valid proposal can be produced; the controller then falls back to base_hp.
+    """
+
+    def propose(self, payload: dict[str, Any]) -> AgenticHPOProposal:
+        ...
+
+
+class OpenAIProposalBackend:
+    """
+    Proposals from an LLM agent via the OpenAI Agents SDK.
+    """
+
+    def __init__(self, model: str, temperature: float):
+        self._agent = Agent(
+            name="Federated HPO controller",
+            instructions=AGENT_INSTRUCTIONS,
+            model=model,
+            model_settings=ModelSettings(temperature=temperature),
+            output_type=AgenticHPOProposal,
+        )
+
+    def propose(self, payload: dict[str, Any]) -> AgenticHPOProposal:
+        prompt = (
+            "Choose next-round federated training hyperparameters.\n"
+            "Return only the structured output.\n\n"
+            f"STATE JSON:\n{json.dumps(payload, indent=2)}"
+        )
+
+        result = Runner.run_sync(self._agent, prompt)
+        proposal = result.final_output
+
+        if not isinstance(proposal, AgenticHPOProposal):
+            raise TypeError(f"Unexpected output type: {type(proposal)}")
+
+        return proposal
+
+
+class RuleBasedProposalBackend:
+    """
+    Deterministic local stand-in for the LLM that follows the same phase rules.
+
+    Exploration cycles through a fixed set of configurations; stabilization keeps improving
+    configurations, nudges eta0/local_epochs when metrics worsen and returns to best_seen late.
+    """
+
+    EXPLORE_CONFIGS: tuple[tuple[int, str, str, float], ...] = (
+        (5, "l2", "adaptive", 1e-3),
+        (8, "elasticnet", "adaptive", 3e-3),
+        (3, "l2", "constant", 1e-3),
+        (6, "l1", "adaptive", 5e-4),
+        (4, "l2", "optimal", 0.0),
+    )
+
+    def propose(self, payload: dict[str, Any]) -> AgenticHPOProposal:
+        rnd = int(payload["round"])
+        current = payload["current_hp"]
+        summary = payload.get("history_summary") or {}
+        best_seen = payload.get("best_seen")
+
+        if payload.get("phase") == "exploration":
+            epochs, penalty, schedule, eta0 = self.EXPLORE_CONFIGS[rnd % len(self.EXPLORE_CONFIGS)]
+            return AgenticHPOProposal(
+                local_epochs=epochs,
+                penalty=penalty,
+                sgd_learning_rate=schedule,
+                sgd_eta0=eta0,
+                **self._untuned(current),
+                exploit=0,
+            )
+
+        auc_last = summary.get("auc_last")
+        auc_delta = summary.get("auc_delta_5")
+
+        # late phase: fall back to the best configuration if recent rounds trail it
+        if (
+                payload.get("late_phase")
+                and best_seen is not None
+                and isinstance(auc_last, (int, float))
+                and auc_last < float(best_seen["roc_auc"]) - 0.005
+        ):
+            hp = best_seen["hp"]
+            return AgenticHPOProposal(
+                local_epochs=int(hp["local_epochs"]),
+                penalty=hp["penalty"],
+                sgd_learning_rate=hp["sgd_learning_rate"],
+                sgd_eta0=float(hp["sgd_eta0_cfg"]),
+                **self._untuned(hp),
+                exploit=1,
+            )
+
+        epochs = int(current["local_epochs"])
+        schedule = str(current["sgd_learning_rate"])
+        eta0 = float(current["sgd_eta0_cfg"])
+        exploit = 1
+
+        # worsening: change one small dimension (eta0 first, then local_epochs)
+        if not summary.get("plateau") and isinstance(auc_delta, (int, float)) and auc_delta < 0.0:
+            exploit = 0
+            if schedule in ("constant", "adaptive"):
+                eta0 = min(max(eta0 * 0.5, 1e-4), 1e-2)
+            else:
+                epochs = max(epochs - 1, 3)
+
+        return AgenticHPOProposal(
+            local_epochs=min(max(epochs, 3), 8),
+            penalty=current["penalty"],
+            sgd_learning_rate=schedule,
+            sgd_eta0=eta0,
+            **self._untuned(current),
+            exploit=exploit,
+        )
+
+    @staticmethod
+    def _untuned(hp: dict[str, Any]) -> dict[str, Any]:
+        """
+        Keep the training budget and server_lr of hp (the rules only tune epochs, schedule and eta0).
+        """
+        return {
+            "local_steps": int(hp.get("local_steps", 0)),
+            "batch_size": int(hp.get("batch_size", 0)),
+            "max_samples_per_round": int(hp.get("max_samples_per_round", 0)),
+            "server_lr": float(hp.get("server_lr", 1.0)),
+        }
+
+
+class ReplayProposalBackend:
+    """
+    Reproduce the decisions of a past agentic run from its log.
+
+    The first "[agentic_hpo] decision" line per round is used; rounds without a logged decision
+    (or with exploit=NA, i.e. no accepted proposal) are reported as unavailable.
+    """
+
+    def __init__(self, log_path: Path):
+        self._by_round: dict[int, AgenticHPOProposal] = {}
+
+        with log_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                m = DECISION_LOG_RE.search(line)
+                if m is None or m["exploit"] == "NA":
+                    continue
+
+                rnd = int(m["round"])
+                if rnd in self._by_round:
+                    continue
+
+                self._by_round[rnd] = AgenticHPOProposal(
+                    local_epochs=int(m["epochs"]),
+                    penalty=m["penalty"],
+                    sgd_learning_rate=m["lr"],
+                    sgd_eta0=float(m["eta0"]),
+                    # logs from before budgeted training have no budget fields
+                    local_steps=int(m["steps"] or 0),
+                    batch_size=int(m["batch"] or 0),
+                    max_samples_per_round=int(m["samples"] or 0),
+                    server_lr=float(m["server_lr"] or 1.0),
+                    exploit=int(m["exploit"]),
+                )
+
+        logger.info("Replay backend loaded %d decisions from %s", len(self._by_round), log_path)
+
+    def propose(self, payload: dict[str, Any]) -> AgenticHPOProposal:
+        rnd = int(payload["round"])
+
+        proposal = self._by_round.get(rnd)
+        if proposal is None:
+            raise ValueError(f"No logged decision for round {rnd}")
+
+        return proposal.model_copy()
+
+
+class CachedProposalBackend:
+    """
+    On-disk proposal cache keyed by the canonical hash of the state payload.
+
+    With inner=None the cache is read-only, so previously seen states can be answered offline.
+    """
+
+    def __init__(self, inner: ProposalBackend | None, cache_dir: Path, namespace: dict[str, Any]):
+        self._inner = inner
+        self._cache_dir = cache_dir
+        self._namespace = namespace
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def propose(self, payload: dict[str, Any]) -> AgenticHPOProposal:
+        key = payload_hash({"backend": self._namespace, "payload": payload})
+        path = self._cache_dir / f"{key}.json"
+
+        if path.exists():
+            logger.info("[agentic_hpo] proposal cache hit: round=%s key=%s", payload.get("round"), key[:12])
+            return AgenticHPOProposal.model_validate_json(path.read_text(encoding="utf-8"))
+
+        if self._inner is None:
+            raise ValueError(f"Proposal cache miss for round {payload.get('round')} and no live backend")
+
+        proposal = self._inner.propose(payload)
+
+        # write-then-rename so concurrent runs never read a partial entry
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(proposal.model_dump_json(), encoding="utf-8")
+        os.replace(tmp, path)
+
+        return proposal
+
+
 @dataclass(slots=True)
 class AgenticHPOController:
     """
-    LLM-based controller that proposes next-round HParams from aggregated history.
+    Controller that proposes next-round HParams from aggregated history.
+
+    Proposals come from a pluggable backend: the OpenAI agent (default), a deterministic local
+    rule-based stand-in, or a replay of a past run's log. Setting cache_dir adds an on-disk cache
+    keyed by the state payload hash in front of the live backend.
     """
     model: str = "gpt-5.2"
     temperature: float = 0.2
     total_rounds: int = 20
     max_history_rounds: int = 12
+    backend: str = "openai"
+    cache_dir: Path | None = None
+    replay_log: Path | None = None
+    server_lr_range: tuple[float, float] | None = None  # None keeps server_lr fixed
 
-    _enabled: bool = field(init=False)
-    _agent: Agent | None = field(init=False, default=None)
+    _backend: ProposalBackend | None = field(init=False, default=None)
     _exploit_by_round: dict[int, int] = field(init=False, default_factory=dict)
+    _executor: ThreadPoolExecutor | None = field(init=False, default=None)
 
     def __post_init__(self) -> None:
-        # if no key configured, allow FL to run (seed-only behavior)
-        self._enabled = bool(os.environ.get("OPENAI_API_KEY", "").strip())
-
-        if not self._enabled:
-            logger.warning("Agent disabled (OPENAI_API_KEY missing); using base_hp only")
-            return
-
-        logger.info("Agent enabled (OPENAI_API_KEY found)")
-
-        self._agent = Agent(
-            name="Federated HPO controller",
-            instructions=(
-                "You are an expert federated learning hyperparameter controller. "
-                "Each round, propose the next training hyperparameters. "
-                "You only see aggregated metrics and prior choices. "
-                "Goal: maximize roc_auc while keeping loss low and training stable. "
-                "Do not overreact to one noisy round. "
-                "Early rounds may explore more; later rounds should prefer smaller, conservative changes. "
-                "Treat penalty and learning-rate schedule changes as major changes. "
-                "Prefer adjusting local_epochs or eta0 before changing penalty or schedule. "
-                "Use constant learning rate only when there is clear evidence that the current learning-rate approach is underperforming. "
-                "Set exploit=1 only when you are intentionally keeping or only slightly adjusting a configuration that has shown stable or improving performance across multiple recent rounds, and avoid exploit=1 too early in training. "
-                "Set exploit=0 when you are testing a meaningfully different configuration. "
-                "If best_seen is provided, use it mainly in later rounds as an anchor unless there is strong evidence to explore elsewhere. "
-            ),
-            model=self.model,
-            model_settings=ModelSettings(temperature=self.temperature),
-            output_type=AgenticHPOProposal,
-        )
+        backend = self.backend.strip().lower()
+        inner: ProposalBackend | None = None
+
+        if backend == "openai":
+            # if no key configured, allow FL to run (seed-only or cache-only behavior)
+            if os.environ.get("OPENAI_API_KEY", "").strip():
+                logger.info("Agent enabled (OPENAI_API_KEY found)")
+                inner = OpenAIProposalBackend(self.model, self.temperature)
+            elif self.cache_dir is None:
+                logger.warning("Agent disabled (OPENAI_API_KEY missing); using base_hp only")
+                return
+            else:
+                logger.warning("OPENAI_API_KEY missing; serving proposals from cache only")
+        elif backend == "rules":
+            logger.info("Agent using local rule-based backend")
+            inner = RuleBasedProposalBackend()
+        elif backend == "replay":
+            if self.replay_log is None:
+                raise ValueError("agent-backend='replay' requires agent-replay-log")
+            inner = ReplayProposalBackend(self.replay_log)
+        else:
+            raise ValueError(f"Unknown agent backend {backend!r}. Valid: ['openai', 'replay', 'rules']")
+
+        if self.cache_dir is not None and backend != "replay":
+            logger.info("Agent proposal cache at %s", self.cache_dir)
+            self._backend = CachedProposalBackend(
+                inner,
+                self.cache_dir,
+                namespace={"backend": backend, "model": self.model, "temperature": self.temperature},
+            )
+        else:
+            self._backend = inner
 
     def get_exploit(self, server_round: int) -> int | None:
         return self._exploit_by_round.get(int(server_round))
@@ -164,7 +443,7 @@ class AgenticHPOController:
         """
         Return next-round HParams, falling back to base_hp on any failure.
         """
-        if not self._enabled or self._agent is None:
+        if self._backend is None:
             return base_hp
 
         recent = history[-self.max_history_rounds:]
@@ -210,6 +489,8 @@ class AgenticHPOController:
                 "penalty": ALLOWED_PENALTIES,
                 "sgd_learning_rate": ALLOWED_SCHEDULES,
                 "sgd_eta0": "if constant/adaptive: [1e-4, 1e-2]; if optimal: 0.0",
+                **self._budget_search_space(base_hp),
+                "server_lr": list(self.server_lr_range) if self.server_lr_range else "fixed: keep current",
                 "exploit": [0, 1],
             },
             "current_hp": {
@@ -218,6 +499,10 @@ class AgenticHPOController:
                 "class_weight_cfg": base_hp.class_weight_cfg,
                 "sgd_learning_rate": base_hp.sgd_learning_rate,
                 "sgd_eta0_cfg": base_hp.sgd_eta0_cfg,
+                "local_steps": base_hp.local_steps,
+                "batch_size": base_hp.batch_size,
+                "max_samples_per_round": base_hp.max_samples_per_round,
+                "server_lr": base_hp.server_lr,
             },
             "best_seen": (
                 {
@@ -234,18 +519,8 @@ class AgenticHPOController:
             "rules": rules,
         }
 
-        prompt = (
-            "Choose next-round federated training hyperparameters.\n"
-            "Return only the structured output.\n\n"
-            f"STATE JSON:\n{json.dumps(payload, indent=2)}"
-        )
-
         try:
-            result = Runner.run_sync(self._agent, prompt)
-            proposal = result.final_output
-
-            if not isinstance(proposal, AgenticHPOProposal):
-                raise TypeError(f"Unexpected output type: {type(proposal)}")
+            proposal = self._backend.propose(payload)
 
             if force_explore:
                 proposal.exploit = 0
@@ -255,7 +530,7 @@ class AgenticHPOController:
         except (ValidationError, ValueError, TypeError) as e:
             logger.warning("Agent proposal invalid; falling back. err=%s", e)
             return base_hp
-        except (OpenAIError, RuntimeError):
+        except (OpenAIError, RuntimeError, OSError):
             logger.exception("Agent call failed; falling back to base_hp.")
             return base_hp
 
@@ -265,18 +540,128 @@ class AgenticHPOController:
             class_weight_cfg=base_hp.class_weight_cfg,
             sgd_learning_rate=proposal.sgd_learning_rate,
             sgd_eta0_cfg=proposal.sgd_eta0,
+            **self._budget_from(proposal, base_hp),
+            server_lr=self._server_lr_from(proposal, base_hp),
+        )
+
+    @staticmethod
+    def _budget_search_space(base_hp: HParams) -> dict[str, Any]:
+        """
+        Budget knobs in the agent's search space: tunable only if the run trains on a sample budget.
+        """
+        if not base_hp.sample_budgeted:
+            return {
+                "local_steps": "fixed: keep current",
+                "batch_size": "fixed: keep current",
+                "max_samples_per_round": "fixed: keep current",
+            }
+
+        cap = base_hp.max_samples_per_round
+        return {
+            "local_steps": list(AGENT_LOCAL_STEPS_RANGE) if base_hp.local_steps > 0 else "fixed: keep current",
+            "batch_size": list(AGENT_BATCH_SIZE_RANGE),
+            "max_samples_per_round": f"at most {cap}" if cap > 0 else "fixed: keep current",
+        }
+
+    @staticmethod
+    def _budget_from(proposal: AgenticHPOProposal, base_hp: HParams) -> dict[str, int]:
+        """
+        Apply the proposal's budget knobs within the limits of _budget_search_space.
+
+        Runs without a sample budget keep base_hp's values, and a budgeted run never loses its
+        budget: local_steps stays in range and max_samples_per_round never exceeds the current cap.
+        """
+        if not base_hp.sample_budgeted:
+            return {
+                "local_steps": base_hp.local_steps,
+                "batch_size": base_hp.batch_size,
+                "max_samples_per_round": base_hp.max_samples_per_round,
+            }
+
+        local_steps = base_hp.local_steps
+        if local_steps > 0:
+            lo, hi = AGENT_LOCAL_STEPS_RANGE
+            local_steps = min(max(proposal.local_steps, lo), hi)
+
+        cap = base_hp.max_samples_per_round
+        max_samples = min(proposal.max_samples_per_round or cap, cap) if cap > 0 else 0
+
+        lo, hi = AGENT_BATCH_SIZE_RANGE
+        batch_size = min(max(proposal.batch_size, lo), hi) if proposal.batch_size > 0 else base_hp.batch_size
+
+        return {
+            "local_steps": local_steps,
+            "batch_size": batch_size,
+            "max_samples_per_round": max_samples,
+        }
+
+    def _server_lr_from(self, proposal: AgenticHPOProposal, base_hp: HParams) -> float:
+        """
+        Proposed server_lr clamped to server_lr_range, or base_hp's if it is not tuned.
+        """
+        if self.server_lr_range is None:
+            return base_hp.server_lr
+
+        lo, hi = self.server_lr_range
+        return min(max(float(proposal.server_lr), lo), hi)
+
+    def submit_next(
+            self,
+            *,
+            base_hp: HParams,
+            server_round: int,
+            history: list[dict[str, Any]],
+    ) -> Future[HParams]:
+        """
+        Request next-round HParams in the background.
+
+        Proposals run one at a time on a dedicated worker thread; the future resolves to
+        base_hp on any failure, like propose_next.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="agentic-hpo")
+
+        return self._executor.submit(
+            self.propose_next,
+            base_hp=base_hp,
+            server_round=server_round,
+            history=list(history),
         )
 
+    def shutdown(self) -> None:
+        """
+        Stop the background worker, dropping any proposal that has not started yet.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
 
-class AgenticFedAvg(FedAvg):
+class AgenticFedAvg(MonitoredFedAvg):
     """
     FedAvg strategy that uses an LLM controller to choose HParams each round.
+
+    In async mode the agent call is taken off the round's critical path: while round r trains
+    and evaluates, the proposal for round r + 1 is computed speculatively from the metrics
+    aggregated so far (i.e. up to round r - 1). If it is not ready within proposal_deadline
+    seconds when round r + 1 starts, the previous round's HParams are kept.
     """
 
-    def __init__(self, *, seed_hp: HParams, controller: AgenticHPOController, **kwargs):
+    def __init__(
+            self,
+            *,
+            seed_hp: HParams,
+            controller: AgenticHPOController,
+            async_proposals: bool = False,
+            proposal_deadline: float = 30.0,
+            **kwargs,
+    ):
         super().__init__(**kwargs)
         self.seed_hp = seed_hp
         self.controller = controller
+        self.async_proposals = async_proposals
+        self.proposal_deadline = float(proposal_deadline)
+        self._pending: tuple[int, Future[HParams]] | None = None
         self._hp_by_round: dict[int, HParams] = {}
         self._history: list[dict[str, Any]] = []
         self._best_hp: HParams = seed_hp
@@ -300,6 +685,42 @@ class AgenticFedAvg(FedAvg):
     def get_best_round(self) -> int:
         return self._best_round
 
+    def _resolve_pending(self, server_round: int, base_hp: HParams) -> tuple[HParams, bool]:
+        """
+        Return (hp, accepted) for the speculative proposal of this round, or base_hp if it is
+        missing or misses the deadline.
+        """
+        pending = self._pending
+        if pending is None or pending[0] != server_round:
+            return base_hp, False
+
+        try:
+            return pending[1].result(timeout=self.proposal_deadline), True
+        except FutureTimeoutError:
+            logger.warning(
+                "[agentic_hpo] proposal for round=%d missed the %.3gs deadline; keeping base_hp",
+                server_round,
+                self.proposal_deadline,
+            )
+            return base_hp, False
+
+    def _submit_speculative(self, server_round: int, hp: HParams) -> None:
+        """
+        Start the proposal for the next round while this round trains and evaluates.
+        """
+        next_round = server_round + 1
+        if next_round > self.controller.total_rounds:
+            return
+
+        if self._pending is not None and not self._pending[1].done():
+            logger.info("[agentic_hpo] previous proposal still running; skipping request for round=%d", next_round)
+            return
+
+        self._pending = (
+            next_round,
+            self.controller.submit_next(base_hp=hp, server_round=next_round, history=self._history),
+        )
+
     def configure_train(
             self,
             server_round: int,
@@ -313,21 +734,32 @@ class AgenticFedAvg(FedAvg):
         rnd = int(server_round)
 
         base_hp = self._base_hp_for_round(rnd)
-        hp = base_hp if rnd == 1 else self.controller.propose_next(
-            base_hp=base_hp,
-            server_round=rnd,
-            history=self._history,
-        )
+        accepted = True
+
+        if rnd == 1:
+            hp = base_hp
+        elif self.async_proposals:
+            hp, accepted = self._resolve_pending(rnd, base_hp)
+        else:
+            hp = self.controller.propose_next(
+                base_hp=base_hp,
+                server_round=rnd,
+                history=self._history,
+            )
 
         self._hp_by_round[rnd] = hp
 
-        exploit = self.controller.get_exploit(rnd)
+        if self.async_proposals:
+            self._submit_speculative(rnd, hp)
+
+        exploit = self.controller.get_exploit(rnd) if accepted else None
         last = self._history[-1]["metrics"] if self._history else {}
         prev_auc = last.get("roc_auc")
         prev_loss = last.get("loss")
 
         logger.info(
-            "[agentic_hpo] decision: round=%d exploit=%s prev_auc=%s prev_loss=%s hp={epochs=%d penalty=%s lr=%s eta0=%.6g}",
+            "[agentic_hpo] decision: round=%d exploit=%s prev_auc=%s prev_loss=%s "
+            "hp={epochs=%d penalty=%s lr=%s eta0=%.6g steps=%d batch=%d samples=%d server_lr=%.6g}",
             rnd,
             str(exploit) if exploit is not None else "NA",
             f"{prev_auc:.6f}" if isinstance(prev_auc, (int, float)) else "NA",
@@ -336,8 +768,15 @@ class AgenticFedAvg(FedAvg):
             hp.penalty,
             hp.sgd_learning_rate,
             float(hp.sgd_eta0_cfg),
+            hp.local_steps,
+            hp.batch_size,
+            hp.max_samples_per_round,
+            hp.server_lr,
         )
 
+        if self.server_optimizer is not None:
+            self.server_optimizer.lr = hp.server_lr
+
         hp_cfg = hp.to_config(
             train_split=DataSplit.TRAIN,
             eval_split=DataSplit.VALIDATION,
@@ -396,6 +835,10 @@ class AgenticFedAvg(FedAvg):
                 "penalty": hp.penalty,
                 "sgd_learning_rate": hp.sgd_learning_rate,
                 "sgd_eta0_cfg": hp.sgd_eta0_cfg,
+                "local_steps": hp.local_steps,
+                "batch_size": hp.batch_size,
+                "max_samples_per_round": hp.max_samples_per_round,
+                "server_lr": hp.server_lr,
             },
             "metrics": {k: float(v) for k, v in metrics_dict.items() if isinstance(v, (int, float))},
         }
@@ -431,3 +874,12 @@ class AgenticFedAvg(FedAvg):
             self._best_round = rnd
 
         return mrec
+
+
+class BufferedAgenticFedAvg(BufferedFedAvg, AgenticFedAvg):
+    """
+    AgenticFedAvg with buffered asynchronous aggregation.
+
+    Each round's HParams go to the nodes dispatched in that round; slower nodes finish on the
+    HParams they started with.
+    """
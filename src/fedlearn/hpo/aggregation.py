@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import functools
+import io
+from collections.abc import Callable, Sequence
+
+import numpy as np
+from flwr.common import Array, ArrayRecord
+from flwr.common.constant import SType
+
+from fedlearn.common.config import AggregationReducer
+
+# Constants
+
+DEFAULT_TRIM_FRACTION = 0.1  # trimmed_mean: share of values dropped at each end, per coordinate
+
+# (rows of shape (n_clients, n_params), weights of shape (n_clients,) summing to 1) -> (n_params,)
+Reducer = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def array_view(arr: Array) -> np.ndarray:
+    """
+    Read-only view of a serialized Array's values in place, without the copy Array.numpy() makes.
+    """
+    stream = io.BytesIO(arr.data)
+    version = np.lib.format.read_magic(stream) if arr.stype == SType.NUMPY else None
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+    elif version == (2, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    else:
+        return arr.numpy()
+
+    count = int(np.prod(shape, dtype=np.int64))
+    values = np.frombuffer(arr.data, dtype=dtype, count=count, offset=stream.tell())
+    return values.reshape(shape, order="F" if fortran_order else "C")
+
+
+def weighted_mean(rows: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    FedAvg: weighted mean of the rows as a single matrix-vector product.
+    """
+    return weights @ rows
+
+
+def trimmed_mean(rows: np.ndarray, weights: np.ndarray, trim_fraction: float = DEFAULT_TRIM_FRACTION) -> np.ndarray:
+    """
+    Coordinate-wise mean after dropping the int(trim_fraction * n_clients) smallest and largest values.
+
+    Robust to a minority of outlying updates; the weights are not used.
+    """
+    n = rows.shape[0]
+    cut = int(trim_fraction * n)
+    if cut == 0:
+        return rows.mean(axis=0)
+
+    # one partial sort per coordinate puts the kept values between the two cut points
+    kept = np.partition(rows, (cut, n - cut - 1), axis=0)[cut:n - cut]
+    return kept.mean(axis=0)
+
+
+def coordinate_median(rows: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Coordinate-wise median of the rows; the weights are not used.
+    """
+    return np.median(rows, axis=0)
+
+
+def resolve_reducer(reducer: AggregationReducer | str, trim_fraction: float = DEFAULT_TRIM_FRACTION) -> Reducer:
+    """
+    Reducer function for a configured aggregation-reducer name.
+    """
+    reducer = AggregationReducer(reducer)
+
+    if reducer == AggregationReducer.TRIMMED_MEAN:
+        if not 0.0 <= trim_fraction < 0.5:
+            raise ValueError(f"trim_fraction must be in [0, 0.5), got {trim_fraction}")
+        return functools.partial(trimmed_mean, trim_fraction=float(trim_fraction))
+    if reducer == AggregationReducer.MEDIAN:
+        return coordinate_median
+
+    return weighted_mean
+
+
+class ArenaAggregator:
+    """
+    Aggregates client parameters in a preallocated, contiguous (n_clients, n_params) float64 buffer.
+
+    Every reply's arrays are copied straight from their serialized bytes into one row of the
+    buffer (upcast to float64 on the way), and the rows are reduced in one vectorized call: a
+    weighted matmul for FedAvg, or a robust Reducer such as trimmed_mean / coordinate_median
+    over the same rows. The buffer is reused across rounds and only reallocated when more
+    clients reply than before or the parameter layout changes.
+    """
+
+    def __init__(self, reducer: Reducer = weighted_mean):
+        self.reducer = reducer
+        self._layout: list[tuple[str, tuple[int, ...]]] = []
+        self._offsets: list[int] = [0]
+        self._buffer = np.empty((0, 0), dtype=np.float64)
+
+    @property
+    def n_params(self) -> int:
+        return self._offsets[-1]
+
+    def _set_layout(self, arrays: ArrayRecord) -> None:
+        layout = [(key, tuple(arr.shape)) for key, arr in arrays.items()]
+        if layout == self._layout:
+            return
+
+        self._layout = layout
+        self._offsets = [0]
+        for _, shape in layout:
+            self._offsets.append(self._offsets[-1] + int(np.prod(shape, dtype=np.int64)))
+        self._buffer = np.empty((0, self.n_params), dtype=np.float64)
+
+    def _write(self, row: np.ndarray, arrays: ArrayRecord) -> None:
+        for (key, shape), start, stop in zip(self._layout, self._offsets[:-1], self._offsets[1:]):
+            arr = array_view(arrays[key])
+            if arr.shape != shape:
+                raise ValueError(f"Array {key!r} has shape {arr.shape}, expected {shape}")
+            np.copyto(row[start:stop], arr.reshape(-1))
+
+    def flatten(self, arrays: ArrayRecord) -> np.ndarray:
+        """
+        Copy of arrays as one float64 vector in the aggregator's layout.
+        """
+        self._set_layout(arrays)
+        vector = np.empty(self.n_params, dtype=np.float64)
+        self._write(vector, arrays)
+        return vector
+
+    def unflatten(self, vector: np.ndarray) -> ArrayRecord:
+        """
+        ArrayRecord with the layout of the last loaded records, filled from a flat vector.
+        """
+        return ArrayRecord({
+            key: Array(vector[start:stop].reshape(shape))
+            for (key, shape), start, stop in zip(self._layout, self._offsets[:-1], self._offsets[1:])
+        })
+
+    def load(self, records: Sequence[ArrayRecord]) -> np.ndarray:
+        """
+        Write the records into the buffer; return the (len(records), n_params) view holding them.
+
+        The view is overwritten by the next load().
+        """
+        if not records:
+            raise ValueError("Nothing to aggregate: no records")
+
+        self._set_layout(records[0])
+        if self._buffer.shape[0] < len(records):
+            self._buffer = np.empty((len(records), self.n_params), dtype=np.float64)
+
+        rows = self._buffer[:len(records)]
+        for row, arrays in zip(rows, records):
+            self._write(row, arrays)
+
+        return rows
+
+    def reduce(self, rows: np.ndarray, weights: Sequence[float] | np.ndarray) -> np.ndarray:
+        """
+        Reduce loaded rows with the configured reducer; weights are normalized to sum to 1.
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        total = float(weights.sum())
+        if total <= 0.0:
+            raise ValueError(f"Aggregation weights must sum to > 0, got {total}")
+
+        return self.reducer(rows, weights / total)
+
+    def aggregate(self, records: Sequence[ArrayRecord], weights: Sequence[float] | np.ndarray) -> ArrayRecord:
+        """
+        Reduce the records into one ArrayRecord (float64) with the same keys and shapes.
+        """
+        return self.unflatten(self.reduce(self.load(records), weights))
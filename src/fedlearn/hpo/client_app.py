@@ -1,22 +1,42 @@
 from __future__ import annotations
 
 import logging
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
 
-import pandas as pd
+import numpy as np
 from flwr.app import Context
 from flwr.clientapp import ClientApp
 from flwr.common import ArrayRecord, Message, MetricRecord, RecordDict
 from sklearn.pipeline import Pipeline
 
-from fedlearn.common.config import DataSplit, HParams, CONFIG_KEY, TRAIN_SPLIT, EVAL_SPLIT
-from fedlearn.common.data_split import CLIENT_KEYS, get_client_train_val_test_by_key
+from fedlearn.common.config import DataSplit, FeatureLayout, HParams, Trainer, CONFIG_KEY, TRAIN_SPLIT, EVAL_SPLIT
+from fedlearn.common.config import ARRAYS_KEY, DATA_FRACTION, MEMBERS_KEY, METRICS_KEY, member_key
+from fedlearn.common.data_split import CLIENT_KEYS, PARTITION_BATCH_ROWS, configure_duckdb
+from fedlearn.common.features import get_client_processed_split, resolve_feature_layout
 from fedlearn.common.metrics import compute_binary_metrics
-from fedlearn.common.model import get_model, get_model_params, set_model_params
+from fedlearn.common.model import (
+    get_model,
+    get_model_params,
+    partial_fit_stream,
+    resolve_feature_dtype,
+    resolve_trainer,
+    set_model_params,
+)
 
 app = ClientApp()
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Constants
+
+STREAM_SEED = 42  # base seed of the per-round sample stream in budgeted training
+SUBSAMPLE_SEED = 7  # base seed of the fixed row subset used when data-fraction < 1
+
 
 def _get_client_key(context: Context) -> str:
     """
@@ -32,6 +52,48 @@ def _get_client_key(context: Context) -> str:
         ) from ex
 
 
+def _get_batch_rows(context: Context) -> int:
+    """
+    Rows per streamed batch when this node loads its partition from DuckDB.
+    """
+    return int(context.run_config.get("partition-batch-rows", PARTITION_BATCH_ROWS))
+
+
+def _get_feature_layout(context: Context) -> FeatureLayout:
+    """
+    Dense or sparse (CSR) feature matrices for this run; "auto" follows the saved preprocessor.
+    """
+    return resolve_feature_layout(context.run_config.get("feature-layout", "auto"))
+
+
+def _get_feature_dtype(context: Context) -> np.dtype:
+    """
+    dtype of this run's feature matrices and local model parameters (float64 | float32).
+    """
+    return resolve_feature_dtype(context.run_config.get("feature-dtype", "float64"))
+
+
+def _get_trainer(context: Context) -> Trainer:
+    """
+    Local SGD implementation for this run (sklearn | numpy).
+    """
+    return resolve_trainer(context.run_config.get("trainer", Trainer.SKLEARN.value))
+
+
+def _configure_duckdb(context: Context) -> None:
+    """
+    Apply this node's DuckDB sizing from run_config to the shared connection.
+    """
+    rc = context.run_config
+    ttl = rc.get("duckdb-connection-ttl")
+
+    configure_duckdb(
+        threads=int(rc.get("duckdb-threads", 0)),
+        memory_limit=str(rc.get("duckdb-memory-limit", "")).strip(),
+        ttl=None if ttl is None else float(ttl),
+    )
+
+
 def _get_cfg_value(message: Message, context: Context, key: str, default: str) -> str:
     """
     Read a config value from the incoming message or fallback to run_config.
@@ -44,6 +106,14 @@ def _get_cfg_value(message: Message, context: Context, key: str, default: str) -
     return str(context.run_config.get(key, default))
 
 
+def _get_server_round(message: Message) -> int:
+    """
+    Server round of this message as set by the strategy (0 if absent).
+    """
+    cfg = message.content.get(CONFIG_KEY)
+    return int(cfg.get("server-round", 0)) if cfg is not None else 0
+
+
 def _get_train_split(message: Message, context: Context) -> DataSplit:
     """
     Determine which dataset split should be used for training.
@@ -68,21 +138,121 @@ def _get_eval_split(message: Message, context: Context) -> DataSplit:
         raise ValueError(f"Unknown eval split: {value!r}") from ex
 
 
-def _init_model(message: Message, context: Context, hp: HParams | None = None) -> Pipeline:
+def _get_data_fraction(message: Message, context: Context) -> float:
     """
-    Build model and load incoming model params.
+    Share of the local training rows to fit on (1.0 = all); lower fidelities of HPO use less.
     """
-    incoming_arrays = message.content["arrays"]
+    fraction = float(_get_cfg_value(message, context, DATA_FRACTION, "1.0"))
+    if not 0.0 < fraction <= 1.0:
+        raise ValueError(f"{DATA_FRACTION} must be in (0, 1], got {fraction}")
+    return fraction
+
 
-    if hp is None:
-        hp = HParams.from_message(message, context)
+def _subsample(X, y: np.ndarray, fraction: float, partition_id: int):
+    """
+    Fixed random subset of fraction of the rows (the same rows every round), in original order.
+    """
+    n_rows = X.shape[0]
+    n_keep = max(1, int(round(fraction * n_rows)))
+    if n_keep >= n_rows:
+        return X, y
+
+    rng = np.random.default_rng([SUBSAMPLE_SEED, partition_id])
+    idx = np.sort(rng.permutation(n_rows)[:n_keep])
+    return X[idx], y[idx]
+
+
+def _get_members(message: Message) -> list[int]:
+    """
+    Population members carried by a batched message (empty for a single-model message).
+    """
+    cfg = message.content.get(CONFIG_KEY)
+    if cfg is None or MEMBERS_KEY not in cfg:
+        return []
+    return [int(m) for m in cfg[MEMBERS_KEY]]
+
+
+def _get_member_workers(context: Context, n_members: int) -> int:
+    """
+    Threads sharing the members of a batched message (client-member-workers; 0 = one per core).
+    """
+    workers = int(context.run_config.get("client-member-workers", 0))
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, n_members))
 
-    model = get_model(hp)
-    set_model_params(model, incoming_arrays.to_numpy_ndarrays())
+
+def _map_members(fn: Callable[[int], T], members: list[int], workers: int) -> list[T]:
+    """
+    fn(member) for every member, in member order, on up to workers threads.
+
+    The members only read the shared local matrices, and both trainers spend their time in
+    code that releases the GIL (SGDClassifier's Cython epochs, NumPy's BLAS calls).
+    """
+    if workers <= 1:
+        return [fn(member) for member in members]
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="client-member") as pool:
+        return list(pool.map(fn, members))
+
+
+def _init_model(arrays: ArrayRecord, context: Context, hp: HParams) -> Pipeline:
+    """
+    Build model and load incoming model params.
+    """
+    model = get_model(hp, trainer=_get_trainer(context))
+    # freshly deserialized arrays, so the model can own them
+    set_model_params(model, arrays.to_numpy_ndarrays(), dtype=_get_feature_dtype(context), copy=False)
 
     return model
 
 
+def _fit(
+        arrays: ArrayRecord,
+        hp: HParams,
+        X_fit,
+        y_fit: np.ndarray,
+        message: Message,
+        context: Context,
+) -> tuple[ArrayRecord, MetricRecord]:
+    """
+    Train one model from the incoming arrays on the local fit matrix; return its params and metrics.
+    """
+    model = _init_model(arrays, context, hp)
+    clf = model.named_steps["classifier"]
+
+    # local training on the cached, already-preprocessed matrix
+    if hp.sample_budgeted:
+        # bounded stream seeded per (round, partition), so round cost no longer grows with the split;
+        # members of a batched message share the stream, so they are compared on the same rows
+        seed = (STREAM_SEED, _get_server_round(message), int(context.node_config["partition-id"]))
+        n_streamed = partial_fit_stream(clf, X_fit, y_fit, hp, seed)
+        logger.info("[Client] Streamed %d of %d rows through partial_fit", n_streamed, X_fit.shape[0])
+    else:
+        clf.fit(X_fit, y_fit)  # uses max_iter=local_epochs
+
+    # compute metrics on the local fit dataset
+    metrics_dict = compute_binary_metrics(clf, X_fit, y_fit)
+    metrics_dict["num-examples"] = float(X_fit.shape[0])
+
+    # one transport dtype for every array, whichever trainer produced them
+    params = get_model_params(model, copy=False, dtype=_get_feature_dtype(context))
+    return ArrayRecord(params), MetricRecord(metrics_dict)
+
+
+def _score(arrays: ArrayRecord, hp: HParams, X_eval, y_eval: np.ndarray, context: Context) -> MetricRecord:
+    """
+    Metrics of one model on the local evaluation matrix.
+    """
+    model = _init_model(arrays, context, hp)
+    clf = model.named_steps["classifier"]
+
+    metrics_dict = compute_binary_metrics(clf, X_eval, y_eval)
+    metrics_dict["num-examples"] = float(X_eval.shape[0])
+
+    return MetricRecord(metrics_dict)
+
+
 @app.train()
 def train(message: Message, context: Context) -> Message:
     """
@@ -91,38 +261,66 @@ def train(message: Message, context: Context) -> Message:
     TRAIN_SPLIT determines which dataset is used:
     - TRAIN: fit on local train split
     - TRAIN_VAL: fit on local train + validation splits
+
+    A batched message (MEMBERS_KEY in its config) carries one model per population member
+    under "arrays.<member>" with its HParams under "config.<member>"; every member is trained
+    on the same local matrix, split over client-member-workers threads, and replied as
+    "arrays.<member>" / "metrics.<member>".
     """
     client_key = _get_client_key(context)
-    X_train, y_train, X_val, y_val, _, _ = get_client_train_val_test_by_key(client_key)
-
+    _configure_duckdb(context)
     train_split = _get_train_split(message, context)
 
-    if train_split == DataSplit.TRAIN:
-        X_fit, y_fit = X_train, y_train
-    elif train_split == DataSplit.TRAIN_VAL:
-        X_fit = pd.concat([X_train, X_val], axis=0, ignore_index=True)
-        y_fit = pd.concat([y_train, y_val], axis=0, ignore_index=True)
-    else:
+    if train_split not in (DataSplit.TRAIN, DataSplit.TRAIN_VAL):
         raise ValueError(f"Unsupported training split for train(): {train_split!r}")
 
-    hp = HParams.from_message(message, context)
-    logger.info("[Client] Hyperparams this round: %s, train_split=%s", hp, train_split.value)
+    X_fit, y_fit = get_client_processed_split(
+        client_key,
+        train_split,
+        batch_rows=_get_batch_rows(context),
+        layout=_get_feature_layout(context),
+        dtype=_get_feature_dtype(context),
+    )
+
+    data_fraction = _get_data_fraction(message, context)
+    if data_fraction < 1.0:
+        X_fit, y_fit = _subsample(X_fit, y_fit, data_fraction, int(context.node_config["partition-id"]))
+
+    members = _get_members(message)
+    if members:
+        workers = _get_member_workers(context, len(members))
+        logger.info(
+            "[Client] Training %d batched models on %d threads, train_split=%s, data_fraction=%.3g",
+            len(members),
+            workers,
+            train_split.value,
+            data_fraction,
+        )
+
+        def fit_member(member: int) -> tuple[ArrayRecord, MetricRecord]:
+            hp = HParams.from_member(message, context, member)
+            return _fit(message.content[member_key(ARRAYS_KEY, member)], hp, X_fit, y_fit, message, context)
+
+        reply_content = RecordDict()
+        for member, (arrays, metrics) in zip(members, _map_members(fit_member, members, workers)):
+            reply_content[member_key(ARRAYS_KEY, member)] = arrays
+            reply_content[member_key(METRICS_KEY, member)] = metrics
+
+        return Message(content=reply_content, reply_to=message)
 
-    model = _init_model(message, context, hp)
-    pre = model.named_steps["preprocessor"]
-    clf = model.named_steps["classifier"]
-
-    # local training
-    X_proc = pre.transform(X_fit)
-    clf.fit(X_proc, y_fit)  # uses max_iter=local_epochs
+    hp = HParams.from_message(message, context)
+    logger.info(
+        "[Client] Hyperparams this round: %s, train_split=%s, data_fraction=%.3g",
+        hp,
+        train_split.value,
+        data_fraction,
+    )
 
-    # compute metrics on the local fit dataset
-    metrics_dict = compute_binary_metrics(model, X_fit, y_fit)
-    metrics_dict["num-examples"] = float(len(X_fit))
+    arrays, metrics = _fit(message.content[ARRAYS_KEY], hp, X_fit, y_fit, message, context)
 
     reply_content = RecordDict({
-        "arrays": ArrayRecord(get_model_params(model)),
-        "metrics": MetricRecord(metrics_dict),
+        ARRAYS_KEY: arrays,
+        METRICS_KEY: metrics,
     })
 
     return Message(content=reply_content, reply_to=message)
@@ -136,27 +334,44 @@ def evaluate(message: Message, context: Context) -> Message:
     EVAL_SPLIT determines which dataset is used:
     - VALIDATION: evaluate on local validation split
     - TEST: evaluate on local test split
+
+    A batched message is evaluated per member and replied as "metrics.<member>".
     """
     client_key = _get_client_key(context)
-    _, _, X_val, y_val, X_test, y_test = get_client_train_val_test_by_key(client_key)
-
+    _configure_duckdb(context)
     eval_split = _get_eval_split(message, context)
 
-    if eval_split == DataSplit.VALIDATION:
-        X_eval, y_eval = X_val, y_val
-    elif eval_split == DataSplit.TEST:
-        X_eval, y_eval = X_test, y_test
-    else:
+    if eval_split not in (DataSplit.VALIDATION, DataSplit.TEST):
         raise ValueError(f"Unsupported evaluation split for evaluate(): {eval_split!r}")
 
-    model = _init_model(message, context)
+    X_eval, y_eval = get_client_processed_split(
+        client_key,
+        eval_split,
+        batch_rows=_get_batch_rows(context),
+        layout=_get_feature_layout(context),
+        dtype=_get_feature_dtype(context),
+    )
+
+    members = _get_members(message)
+    if members:
+
+        def score_member(member: int) -> MetricRecord:
+            hp = HParams.from_member(message, context, member)
+            return _score(message.content[member_key(ARRAYS_KEY, member)], hp, X_eval, y_eval, context)
+
+        scores = _map_members(score_member, members, _get_member_workers(context, len(members)))
+
+        reply_content = RecordDict({
+            member_key(METRICS_KEY, member): metrics
+            for member, metrics in zip(members, scores)
+        })
+        return Message(content=reply_content, reply_to=message)
 
     # compute metrics on the evaluation split
-    metrics_dict = compute_binary_metrics(model, X_eval, y_eval)
-    metrics_dict["num-examples"] = float(len(X_eval))
+    metrics = _score(message.content[ARRAYS_KEY], HParams.from_message(message, context), X_eval, y_eval, context)
 
     reply_content = RecordDict({
-        "metrics": MetricRecord(metrics_dict),
+        METRICS_KEY: metrics,
     })
 
     return Message(content=reply_content, reply_to=message)
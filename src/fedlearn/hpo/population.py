@@ -0,0 +1,466 @@
+from __future__ import annotations
+
+import copy
+import logging
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+from flwr.common import ArrayRecord, ConfigRecord, Message, MessageType, MetricRecord, RecordDict
+from flwr.serverapp import Grid
+from flwr.serverapp.strategy.strategy_utils import sample_nodes
+
+from fedlearn.common.config import ARRAYS_KEY, CONFIG_KEY, EVAL_SPLIT, MEMBERS_KEY, METRICS_KEY, TRAIN_SPLIT
+from fedlearn.common.config import HParams, member_key
+from fedlearn.hpo.agents import AGENT_BATCH_SIZE_RANGE, AGENT_LOCAL_STEPS_RANGE, ALLOWED_PENALTIES, ALLOWED_SCHEDULES
+from fedlearn.hpo.server_optimizers import FedOptimizer
+from fedlearn.hpo.strategies import BufferedFedAvg, MonitoredFedAvg, MonitoredResult, cast_arrays
+
+logger = logging.getLogger(__name__)
+
+# Constants
+
+PBT_SEED = 42
+PBT_LOCAL_EPOCHS_RANGE = (3, 8)
+PBT_ETA0_RANGE = (1e-4, 1e-2)
+PBT_PERTURB_FACTORS = (0.8, 1.25)  # explore: continuous HParams are scaled by one of these
+LOSS_PENALTY_WEIGHT = 0.02  # member score = roc_auc - weight * loss, as in the HPO runners
+
+
+def pack_members(members: list[ArrayRecord]) -> ArrayRecord:
+    """
+    One ArrayRecord holding every member's arrays, keyed "<member>/<key>".
+    """
+    return ArrayRecord({
+        f"{member}/{key}": arr
+        for member, arrays in enumerate(members)
+        for key, arr in arrays.items()
+    })
+
+
+def unpack_member(arrays: ArrayRecord, member: int) -> ArrayRecord:
+    """
+    Arrays of one member of a packed population, with their original keys.
+    """
+    prefix = f"{member}/"
+    return ArrayRecord({key[len(prefix):]: arr for key, arr in arrays.items() if key.startswith(prefix)})
+
+
+def hp_config(hp: HParams) -> ConfigRecord:
+    """
+    The HParams keys of hp.to_config(), without the data splits (those stay with the run's config).
+    """
+    return ConfigRecord({k: v for k, v in hp.to_config().items() if k not in (TRAIN_SPLIT, EVAL_SPLIT)})
+
+
+def perturb_hparams(
+        hp: HParams,
+        rng: np.random.Generator,
+        *,
+        resample_probability: float,
+        lr_range: tuple[float, float] | None = None,
+) -> HParams:
+    """
+    PBT explore step on a copied member's HParams.
+
+    Continuous knobs (eta0, the budget knobs, server_lr when lr_range is given) are scaled by
+    0.8 or 1.25 within their search range and local_epochs moves by one; penalty and schedule
+    are each resampled with resample_probability.
+    """
+
+    def scale(value: float, bounds: tuple[float, float]) -> float:
+        factor = PBT_PERTURB_FACTORS[int(rng.integers(len(PBT_PERTURB_FACTORS)))]
+        return float(min(max(value * factor, bounds[0]), bounds[1]))
+
+    penalty = hp.penalty
+    if rng.random() < resample_probability:
+        penalty = str(rng.choice(ALLOWED_PENALTIES))
+
+    schedule = hp.sgd_learning_rate
+    if rng.random() < resample_probability:
+        schedule = str(rng.choice(ALLOWED_SCHEDULES))
+
+    if schedule == "optimal":
+        eta0 = 0.0
+    elif hp.sgd_eta0_cfg > 0.0:
+        eta0 = scale(hp.sgd_eta0_cfg, PBT_ETA0_RANGE)
+    else:
+        eta0 = float(np.exp(rng.uniform(*np.log(PBT_ETA0_RANGE))))
+
+    local_epochs = hp.local_epochs
+    local_steps = hp.local_steps
+    batch_size = hp.batch_size
+    if hp.sample_budgeted:
+        if local_steps > 0:
+            local_steps = int(round(scale(local_steps, AGENT_LOCAL_STEPS_RANGE)))
+        if batch_size > 0:
+            batch_size = int(round(scale(batch_size, AGENT_BATCH_SIZE_RANGE)))
+    else:
+        local_epochs = int(np.clip(local_epochs + rng.choice((-1, 1)), *PBT_LOCAL_EPOCHS_RANGE))
+
+    server_lr = scale(hp.server_lr, lr_range) if lr_range is not None else hp.server_lr
+
+    return replace(
+        hp,
+        local_epochs=local_epochs,
+        penalty=penalty,
+        sgd_learning_rate=schedule,
+        sgd_eta0_cfg=eta0,
+        local_steps=local_steps,
+        batch_size=batch_size,
+        server_lr=server_lr,
+    )
+
+
+@dataclass
+class PopulationMember:
+    """
+    One model of a PBT population.
+
+    schedule holds the HParams its parameters were trained with in every round so far,
+    including the rounds inherited from the members it copied; history holds its own
+    aggregated evaluate metrics per round.
+    """
+    member: int
+    hp: HParams
+    optimizer: FedOptimizer | None = None
+    schedule: dict[int, HParams] = field(default_factory=dict)
+    history: dict[int, MetricRecord] = field(default_factory=dict)
+    score: float = float("-inf")
+
+
+class PopulationFedAvg(MonitoredFedAvg):
+    """
+    Population-based training (Jaderberg et al., 2017) of several federated models in the same rounds.
+
+    Each round sends one batched message per node carrying every member's arrays and HParams
+    (see client_app.train), so the population costs one round trip per round instead of one
+    per member. Every member is aggregated on its own by the strategy's reducer and stepped by
+    its own copy of the server optimizer. Through start() the members travel packed into one
+    ArrayRecord ("<member>/<key>"); after the run result.arrays is the leader's model alone.
+
+    Every exploit_interval rounds (0 disables it) the members are ranked by their last
+    validation score: each member in the bottom truncation share copies the parameters,
+    server-optimizer state and schedule of a random member of the top share (exploit), then
+    perturbs the copied HParams (explore). The metrics reported for a round are those of the
+    current leader, with its id under "member". With exploit disabled the members are simply
+    independent configurations trained side by side (batched HPO trials).
+    """
+
+    def __init__(
+            self,
+            *,
+            population: list[HParams],
+            exploit_interval: int = 4,
+            truncation: float = 0.25,
+            resample_probability: float = 0.25,
+            lr_range: tuple[float, float] | None = None,
+            seed: int = PBT_SEED,
+            **kwargs,
+    ):
+        super().__init__(**kwargs)
+
+        if not population:
+            raise ValueError("population must contain at least one HParams")
+        if exploit_interval < 0:
+            raise ValueError(f"exploit_interval must be >= 0, got {exploit_interval}")
+        if not 0.0 < truncation <= 0.5:
+            raise ValueError(f"truncation must be in (0, 0.5], got {truncation}")
+        if not 0.0 <= resample_probability <= 1.0:
+            raise ValueError(f"resample_probability must be in [0, 1], got {resample_probability}")
+
+        self.population = list(population)
+        self.exploit_interval = int(exploit_interval)
+        self.truncation = float(truncation)
+        self.resample_probability = float(resample_probability)
+        self.lr_range = lr_range
+        self.seed = int(seed)
+
+        self.members: list[PopulationMember] = []
+        self._leader = 0
+        self._rng = np.random.default_rng(self.seed)
+
+    def get_leader(self) -> PopulationMember:
+        return self.members[self._leader]
+
+    def _member_optimizer(self, hp: HParams) -> FedOptimizer | None:
+        """
+        Fresh copy of the strategy's server optimizer, stepping with hp.server_lr.
+        """
+        if self.server_optimizer is None:
+            return None
+
+        optimizer = copy.deepcopy(self.server_optimizer)
+        optimizer.reset()
+        optimizer.lr = hp.server_lr
+        return optimizer
+
+    @staticmethod
+    def _member_score(mrec: MetricRecord) -> float:
+        loss = mrec.get("loss")
+        loss_term = float(loss) if isinstance(loss, (int, float)) else 0.0
+        return float(mrec["roc_auc"]) - LOSS_PENALTY_WEIGHT * loss_term
+
+    def _leader_metrics(self, metrics: dict[int, MetricRecord | None]) -> MetricRecord | None:
+        mrec = metrics.get(self._leader)
+        if mrec is None:
+            return None
+
+        mrec = MetricRecord(dict(mrec))
+        mrec["member"] = self._leader
+        return mrec
+
+    def _member_messages(
+            self,
+            server_round: int,
+            arrays: ArrayRecord,
+            config: ConfigRecord,
+            grid: Grid,
+            message_type: str,
+    ) -> Iterable[Message]:
+        """
+        One batched message per sampled node with every member's arrays and HParams.
+        """
+        if message_type == MessageType.TRAIN:
+            fraction, min_nodes = self.fraction_train, self.min_train_nodes
+        else:
+            fraction, min_nodes = self.fraction_evaluate, self.min_evaluate_nodes
+        if fraction == 0.0:
+            return []
+
+        num_nodes = int(len(list(grid.get_node_ids())) * fraction)
+        node_ids, _ = sample_nodes(grid, self.min_available_nodes, max(num_nodes, min_nodes))
+
+        shared = ConfigRecord(dict(config))
+        shared["server-round"] = server_round
+        shared[MEMBERS_KEY] = [m.member for m in self.members]
+
+        record = RecordDict({CONFIG_KEY: shared})
+        for m in self.members:
+            record[member_key(ARRAYS_KEY, m.member)] = cast_arrays(unpack_member(arrays, m.member), self.transport_dtype)
+            record[member_key(CONFIG_KEY, m.member)] = hp_config(m.hp)
+
+        return self._construct_messages(record, node_ids, message_type)
+
+    def _exploit_and_explore(self, server_round: int, arrays: ArrayRecord) -> ArrayRecord:
+        """
+        Replace the bottom truncation share of the members by perturbed copies of the top share.
+        """
+        if len(self.members) < 2:
+            return arrays
+
+        # at least one member is replaced, so small populations still exploit
+        n_cut = max(1, int(self.truncation * len(self.members)))
+
+        ranked = sorted(self.members, key=lambda m: m.score, reverse=True)
+        top, bottom = ranked[:n_cut], ranked[-n_cut:]
+        models = [unpack_member(arrays, m.member) for m in self.members]
+
+        for m in bottom:
+            source = top[int(self._rng.integers(len(top)))]
+
+            models[m.member] = models[source.member]
+            m.optimizer = copy.deepcopy(source.optimizer)
+            m.schedule = dict(source.schedule)
+            m.hp = perturb_hparams(
+                source.hp,
+                self._rng,
+                resample_probability=self.resample_probability,
+                lr_range=self.lr_range,
+            )
+            if m.optimizer is not None:
+                m.optimizer.lr = m.hp.server_lr
+
+            logger.info(
+                "[pbt_hpo] exploit: round=%d member=%d <- member=%d (score %.6f < %.6f) hp=%s",
+                server_round,
+                m.member,
+                source.member,
+                m.score,
+                source.score,
+                m.hp,
+            )
+
+        return pack_members(models)
+
+    def _train_round(
+            self,
+            grid: Grid,
+            server_round: int,
+            arrays: ArrayRecord,
+            train_config: ConfigRecord,
+            timeout: float,
+    ) -> tuple[ArrayRecord | None, MetricRecord | None]:
+        if self.exploit_interval > 0 and server_round > 1 and (server_round - 1) % self.exploit_interval == 0:
+            arrays = self._exploit_and_explore(server_round, arrays)
+
+        for m in self.members:
+            m.schedule[server_round] = m.hp
+
+        replies = grid.send_and_receive(
+            messages=self._member_messages(server_round, arrays, train_config, grid, MessageType.TRAIN),
+            timeout=timeout,
+        )
+        # batched replies carry one ArrayRecord / MetricRecord per member, so skip the per-reply check
+        valid, _ = self._check_and_log_replies(replies, is_train=True, validate=False)
+        if not valid:
+            return None, None
+
+        contents = [msg.content for msg in valid]
+        models: list[ArrayRecord] = []
+        metrics: dict[int, MetricRecord | None] = {}
+
+        for m in self.members:
+            member_metrics = [RecordDict({METRICS_KEY: c[member_key(METRICS_KEY, m.member)]}) for c in contents]
+            aggregate = self.arena.aggregate(
+                [c[member_key(ARRAYS_KEY, m.member)] for c in contents],
+                self._example_weights(member_metrics),
+            )
+
+            if m.optimizer is not None and not m.optimizer.identity:
+                current = self.arena.flatten(unpack_member(arrays, m.member))
+                aggregate = self.arena.unflatten(m.optimizer.step(current, self.arena.flatten(aggregate)))
+
+            models.append(aggregate)
+            metrics[m.member] = self.train_metrics_aggr_fn(member_metrics, self.weighted_by_key)
+
+        return pack_members(models), self._leader_metrics(metrics)
+
+    def _evaluate_round(
+            self,
+            grid: Grid,
+            server_round: int,
+            arrays: ArrayRecord,
+            evaluate_config: ConfigRecord,
+            timeout: float,
+    ) -> MetricRecord | None:
+        replies = grid.send_and_receive(
+            messages=self._member_messages(server_round, arrays, evaluate_config, grid, MessageType.EVALUATE),
+            timeout=timeout,
+        )
+        valid, _ = self._check_and_log_replies(replies, is_train=False, validate=False)
+        if not valid:
+            return None
+
+        contents = [msg.content for msg in valid]
+        metrics: dict[int, MetricRecord | None] = {}
+
+        for m in self.members:
+            mrec = self.evaluate_metrics_aggr_fn(
+                [RecordDict({METRICS_KEY: c[member_key(METRICS_KEY, m.member)]}) for c in contents],
+                self.weighted_by_key,
+            )
+            m.history[server_round] = mrec
+            m.score = self._member_score(mrec)
+            metrics[m.member] = mrec
+
+            logger.info(
+                "[pbt_hpo] result: round=%d member=%d score=%.6f auc=%.6f hp=%s",
+                server_round,
+                m.member,
+                m.score,
+                float(mrec["roc_auc"]),
+                m.hp,
+            )
+
+        self._leader = max(self.members, key=lambda m: m.score).member
+        logger.info("[pbt_hpo] leader: round=%d member=%d score=%.6f", server_round, self._leader, self.get_leader().score)
+
+        return self._leader_metrics(metrics)
+
+    def _end_run(
+            self,
+            grid: Grid,
+            last_round: int,
+            arrays: ArrayRecord,
+            evaluate_config: ConfigRecord,
+            timeout: float,
+            result: MonitoredResult,
+    ) -> None:
+        if last_round > 0:
+            result.arrays = unpack_member(arrays, self._leader)
+
+    def start(
+            self,
+            grid: Grid,
+            initial_arrays: ArrayRecord,
+            num_rounds: int = 3,
+            timeout: float = 3600,
+            train_config: ConfigRecord | None = None,
+            evaluate_config: ConfigRecord | None = None,
+            evaluate_fn: Callable[[int, ArrayRecord], MetricRecord | None] | None = None,
+    ) -> MonitoredResult:
+        """
+        Train the population from copies of initial_arrays (one model); evaluate_fn sees the packed population.
+        """
+        self._rng = np.random.default_rng(self.seed)
+        self._leader = 0
+        self.members = [
+            PopulationMember(member=member, hp=hp, optimizer=self._member_optimizer(hp))
+            for member, hp in enumerate(self.population)
+        ]
+
+        return super().start(
+            grid=grid,
+            initial_arrays=pack_members([initial_arrays] * len(self.members)),
+            num_rounds=num_rounds,
+            timeout=timeout,
+            train_config=train_config,
+            evaluate_config=evaluate_config,
+            evaluate_fn=evaluate_fn,
+        )
+
+
+class ScheduledFedAvg(MonitoredFedAvg):
+    """
+    FedAvg that follows a per-round HParams schedule, e.g. the one a PBT member was trained with.
+
+    Rounds past the end of the schedule keep its last HParams; the data splits stay those of
+    the run's config.
+    """
+
+    def __init__(self, *, schedule: dict[int, HParams], **kwargs):
+        super().__init__(**kwargs)
+
+        if not schedule:
+            raise ValueError("schedule must contain at least one round")
+
+        self.schedule = dict(schedule)
+
+    def hp_for_round(self, server_round: int) -> HParams:
+        past = [r for r in self.schedule if r <= server_round]
+        return self.schedule[max(past) if past else min(self.schedule)]
+
+    def configure_train(
+            self,
+            server_round: int,
+            arrays: ArrayRecord,
+            config: ConfigRecord,
+            grid: Grid,
+    ) -> Iterable[Message]:
+        hp = self.hp_for_round(server_round)
+        if self.server_optimizer is not None:
+            self.server_optimizer.lr = hp.server_lr
+
+        for k, v in hp_config(hp).items():
+            config[k] = v
+
+        return super().configure_train(server_round, arrays, config, grid)
+
+    def configure_evaluate(
+            self,
+            server_round: int,
+            arrays: ArrayRecord,
+            config: ConfigRecord,
+            grid: Grid,
+    ) -> Iterable[Message]:
+        for k, v in hp_config(self.hp_for_round(server_round)).items():
+            config[k] = v
+
+        return super().configure_evaluate(server_round, arrays, config, grid)
+
+
+class BufferedScheduledFedAvg(BufferedFedAvg, ScheduledFedAvg):
+    """
+    ScheduledFedAvg with buffered asynchronous aggregation.
+    """
@@ -1,26 +1,97 @@
 from __future__ import annotations
 
 import logging
-from typing import Protocol
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Protocol, TypeVar
 
 import optuna
 from flwr.app import ArrayRecord, Context
-from flwr.common import ConfigRecord
+from flwr.common import ConfigRecord, MetricRecord
 from flwr.serverapp import Grid
-from flwr.serverapp.strategy import FedAvg, Result, Strategy
+from flwr.serverapp.strategy import Result, Strategy
 from sklearn.pipeline import Pipeline
 
-from fedlearn.common.config import DataSplit, HParams, ServerSettings, get_server_settings
+from fedlearn.common.config import Aggregation, DataSplit, HParams, ServerSettings, get_convergence_settings, get_server_settings
 from fedlearn.common.config import HP_LOCAL_EPOCHS, HP_PENALTY, HP_LR_SCHEDULE, HP_ETA0
-from fedlearn.common.model import get_model, get_model_params, set_initial_params
-from fedlearn.hpo.agents import AgenticFedAvg, AgenticHPOController
+from fedlearn.common.config import HP_LOCAL_STEPS, HP_BATCH_SIZE, HP_SERVER_LR, DATA_FRACTION
+from fedlearn.common.model import PROJECT_ROOT, get_model, get_model_params, set_initial_params
+from fedlearn.hpo.aggregation import resolve_reducer
+from fedlearn.hpo.server_optimizers import FedOptimizer, server_lr_range
+from fedlearn.hpo.agents import AgenticFedAvg, AgenticHPOController, BufferedAgenticFedAvg
+from fedlearn.hpo.population import BufferedScheduledFedAvg, PopulationFedAvg, ScheduledFedAvg
+from fedlearn.hpo.strategies import BufferedFedAvg, BufferedTrialFedAvg, ConvergenceDetector, MetricSource, MonitoredFedAvg
+from fedlearn.hpo.strategies import TrialFedAvg
 
 logger = logging.getLogger(__name__)
 
+S = TypeVar("S", bound=MonitoredFedAvg)
+
 # Constants
 
 OPTUNA_SEED = 42
 
+# budget search space, used only when the run trains on a sample budget
+HPO_LOCAL_STEPS_RANGE = (10, 500)
+HPO_BATCH_SIZES = [64, 128, 256, 512]
+
+
+def _project_path(value: object) -> Path | None:
+    """
+    Resolve an optional run-config path; relative paths are taken from the project root.
+    """
+    text = str(value or "").strip()
+    if not text:
+        return None
+
+    path = Path(text).expanduser()
+    return path if path.is_absolute() else PROJECT_ROOT / path
+
+
+def _convergence_detector(context: Context, source: MetricSource) -> ConvergenceDetector | None:
+    """
+    Build a fresh convergence detector from run_config, or None if detection is disabled.
+
+    Search phases watch the aggregated VALIDATION (evaluate) metrics. Final phases evaluate on
+    TEST, so they watch the aggregated train metrics instead to keep TEST out of the stopping rule.
+    """
+    settings = get_convergence_settings(context)
+    return None if settings is None else ConvergenceDetector(settings, source=source)
+
+
+def _build_strategy(
+        settings: ServerSettings,
+        hp: HParams,
+        sync_cls: type[S],
+        buffered_cls: type[S],
+        **kwargs,
+) -> S:
+    """
+    Build the synchronous or buffered variant of a strategy, as selected by the aggregation setting.
+
+    The strategy gets its own server optimizer, stepping with hp.server_lr.
+    """
+    kwargs.update(
+        fraction_train=settings.fraction_train,
+        fraction_evaluate=settings.fraction_evaluate,
+        transport_dtype=settings.feature_dtype,
+        reducer=resolve_reducer(settings.reducer, settings.trim_fraction),
+        server_optimizer=FedOptimizer(
+            settings.server_optimizer,
+            lr=hp.server_lr,
+            momentum=settings.server_momentum,
+        ),
+    )
+    if settings.aggregation == Aggregation.BUFFERED:
+        return buffered_cls(
+            buffer_size=settings.buffer_size,
+            staleness_exponent=settings.staleness_exponent,
+            **kwargs,
+        )
+
+    return sync_cls(**kwargs)
+
 
 def _run_fl(
         *,
@@ -36,7 +107,7 @@ def _run_fl(
     """
     model = get_model(hp)
     set_initial_params(model)
-    arrays = ArrayRecord(get_model_params(model))
+    arrays = ArrayRecord(get_model_params(model, copy=False))
 
     result = strategy.start(
         grid=grid,
@@ -45,9 +116,48 @@ def _run_fl(
         evaluate_config=eval_cfg,
         num_rounds=settings.num_rounds,
     )
+
+    stopped_round = getattr(result, "stopped_round", None)
+    if stopped_round is not None:
+        logger.info("Run stopped on convergence after round %d/%d", stopped_round, settings.num_rounds)
+
     return result, model
 
 
+def _run_population(
+        *,
+        grid: Grid,
+        hps: list[HParams],
+        settings: ServerSettings,
+        cfg: ConfigRecord,
+) -> list[dict[int, MetricRecord]]:
+    """
+    Train several configurations side by side in one batched FL execution (no exploit / explore).
+
+    Every round costs one round trip per node for all of them. Returns each configuration's
+    aggregated evaluate metrics per round, in the order of hps.
+    """
+    strategy = _build_strategy(
+        replace(settings, aggregation=Aggregation.SYNC),
+        hps[0],
+        PopulationFedAvg,
+        PopulationFedAvg,
+        population=hps,
+        exploit_interval=0,
+    )
+
+    _run_fl(
+        strategy=strategy,
+        grid=grid,
+        hp=hps[0],
+        settings=settings,
+        train_cfg=cfg,
+        eval_cfg=cfg,
+    )
+
+    return [member.history for member in strategy.members]
+
+
 class ExperimentRunner(Protocol):
     """
     Base class for all experiment runners.
@@ -66,9 +176,12 @@ class BaselineRunner:
         settings = get_server_settings(context)
         base_hp = HParams.from_run_config(context)
 
-        strategy = FedAvg(
-            fraction_train=settings.fraction_train,
-            fraction_evaluate=settings.fraction_evaluate,
+        strategy = _build_strategy(
+            settings,
+            base_hp,
+            MonitoredFedAvg,
+            BufferedFedAvg,
+            convergence=_convergence_detector(context, source="train"),
         )
 
         baseline_cfg = base_hp.to_config(
@@ -91,6 +204,51 @@ class StaticHPORunner:
     Federated training using static hyperparameters (Optuna tuned).
     """
 
+    @staticmethod
+    def _score_round(
+            mrec: MetricRecord,
+            auc_metric: str = "roc_auc",
+            loss_metric: str = "loss",
+            loss_penalty_weight: float = 0.02,
+    ) -> float:
+        """
+        Score a single round's aggregated evaluate metrics like _score_static_trial does.
+        """
+        return float(mrec[auc_metric]) - loss_penalty_weight * float(mrec[loss_metric])
+
+    @staticmethod
+    def _build_pruner(rc: dict, trial_rounds: int) -> optuna.pruners.BasePruner:
+        """
+        Build the Optuna pruner selected by hpo-pruner (none | median | successive_halving | hyperband).
+        """
+        name = str(rc.get("hpo-pruner", "none")).strip().lower()
+        startup_trials = int(rc.get("hpo-pruner-startup-trials", 5))
+        warmup_rounds = int(rc.get("hpo-pruner-warmup-rounds", 1))
+        reduction_factor = int(rc.get("hpo-pruner-reduction-factor", 3))
+
+        if name == "none":
+            return optuna.pruners.NopPruner()
+        if name == "median":
+            return optuna.pruners.MedianPruner(
+                n_startup_trials=startup_trials,
+                n_warmup_steps=warmup_rounds,
+            )
+        if name == "successive_halving":
+            return optuna.pruners.SuccessiveHalvingPruner(
+                min_resource=1,
+                reduction_factor=reduction_factor,
+            )
+        if name == "hyperband":
+            return optuna.pruners.HyperbandPruner(
+                min_resource=1,
+                max_resource=trial_rounds,
+                reduction_factor=reduction_factor,
+            )
+
+        raise ValueError(
+            f"Unknown hpo-pruner {name!r}. Valid: ['hyperband', 'median', 'none', 'successive_halving']"
+        )
+
     @staticmethod
     def _score_static_trial(
             result: Result,
@@ -103,6 +261,22 @@ class StaticHPORunner:
         if not eval_metrics:
             raise RuntimeError("No client evaluate metrics found in Result.")
 
+        return StaticHPORunner._score_eval_metrics(eval_metrics, auc_metric, loss_metric, last_k, loss_penalty_weight)
+
+    @staticmethod
+    def _score_eval_metrics(
+            eval_metrics: dict[int, MetricRecord],
+            auc_metric: str = "roc_auc",
+            loss_metric: str = "loss",
+            last_k: int = 3,
+            loss_penalty_weight: float = 0.02,
+    ) -> float:
+        """
+        Mean roc_auc minus the weighted mean loss over the last last_k rounds of evaluate metrics.
+        """
+        if not eval_metrics:
+            raise RuntimeError("No client evaluate metrics to score.")
+
         rounds = sorted(eval_metrics.keys())
         tail = rounds[-last_k:]
 
@@ -115,8 +289,30 @@ class StaticHPORunner:
         return mean_auc - loss_penalty_weight * mean_loss
 
     @staticmethod
-    def _suggest_hparams(trial: optuna.trial.BaseTrial, base: HParams) -> HParams:
-        local_epochs = trial.suggest_int(HP_LOCAL_EPOCHS, 3, 8)
+    def _suggest_hparams(
+            trial: optuna.trial.BaseTrial,
+            base: HParams,
+            lr_range: tuple[float, float] | None = None,
+    ) -> HParams:
+        """
+        Sample trial HParams.
+
+        When base trains on a sample budget, the budget knobs (local_steps if set, batch_size)
+        are searched in place of local_epochs, which budgeted rounds do not use; the
+        max_samples_per_round cap is always kept from base. server_lr is searched (log-uniform)
+        in lr_range when given, else kept from base.
+        """
+        local_epochs = base.local_epochs
+        local_steps = base.local_steps
+        batch_size = base.batch_size
+
+        if base.sample_budgeted:
+            if base.local_steps > 0:
+                local_steps = trial.suggest_int(HP_LOCAL_STEPS, *HPO_LOCAL_STEPS_RANGE, log=True)
+            batch_size = trial.suggest_categorical(HP_BATCH_SIZE, HPO_BATCH_SIZES)
+        else:
+            local_epochs = trial.suggest_int(HP_LOCAL_EPOCHS, 3, 8)
+
         penalty = trial.suggest_categorical(HP_PENALTY, ["l2", "l1", "elasticnet"])
         lr_sched = trial.suggest_categorical(
             HP_LR_SCHEDULE, ["optimal", "constant", "adaptive"]
@@ -128,14 +324,97 @@ class StaticHPORunner:
             else 0.0
         )
 
+        server_lr = (
+            float(trial.suggest_float(HP_SERVER_LR, *lr_range, log=True))
+            if lr_range is not None
+            else base.server_lr
+        )
+
         return HParams(
             local_epochs=local_epochs,
             penalty=penalty,
             class_weight_cfg=base.class_weight_cfg,
             sgd_learning_rate=lr_sched,
             sgd_eta0_cfg=eta0,
+            local_steps=local_steps,
+            batch_size=batch_size,
+            max_samples_per_round=base.max_samples_per_round,
+            server_lr=server_lr,
         )
 
+    def _optimize_parallel(
+            self,
+            study: optuna.Study,
+            run_trial: Callable[[optuna.Trial, HParams], float],
+            base_hp: HParams,
+            n_trials: int,
+            n_parallel: int,
+            lr_range: tuple[float, float] | None = None,
+    ) -> None:
+        """
+        Run trials in batches of n_parallel concurrent federated runs.
+
+        Each batch is asked and sampled on the calling thread before any result is told, and
+        results are told back in trial order, so the seeded sampler proposes the same trials
+        on every run regardless of thread scheduling.
+        """
+        remaining = n_trials
+
+        with ThreadPoolExecutor(max_workers=n_parallel, thread_name_prefix="hpo-trial") as pool:
+            while remaining > 0:
+                batch = [study.ask() for _ in range(min(n_parallel, remaining))]
+                hps = [self._suggest_hparams(trial, base_hp, lr_range) for trial in batch]
+                futures = [pool.submit(run_trial, trial, hp) for trial, hp in zip(batch, hps)]
+
+                error: BaseException | None = None
+                for trial, future in zip(batch, futures):
+                    try:
+                        study.tell(trial, future.result())
+                    except optuna.TrialPruned:
+                        study.tell(trial, state=optuna.trial.TrialState.PRUNED)
+                    except Exception as ex:
+                        # mirror study.optimize: mark the trial failed, re-raise after the batch
+                        study.tell(trial, state=optuna.trial.TrialState.FAIL)
+                        error = error or ex
+
+                if error is not None:
+                    raise error
+
+                remaining -= len(batch)
+
+    def _optimize_batched(
+            self,
+            study: optuna.Study,
+            run_batch: Callable[[list[HParams]], list[float]],
+            base_hp: HParams,
+            n_trials: int,
+            batch_trials: int,
+            lr_range: tuple[float, float] | None = None,
+    ) -> None:
+        """
+        Run trials in batches of batch_trials configurations trained together in one FL execution.
+
+        A batch travels as one batched message per node and round, so it costs the round trips
+        of a single trial. Trials of a batch are not pruned.
+        """
+        remaining = n_trials
+
+        while remaining > 0:
+            batch = [study.ask() for _ in range(min(batch_trials, remaining))]
+            hps = [self._suggest_hparams(trial, base_hp, lr_range) for trial in batch]
+
+            try:
+                scores = run_batch(hps)
+            except Exception:
+                for trial in batch:
+                    study.tell(trial, state=optuna.trial.TrialState.FAIL)
+                raise
+
+            for trial, score in zip(batch, scores):
+                study.tell(trial, score)
+
+            remaining -= len(batch)
+
     def run(self, grid: Grid, context: Context) -> tuple[Result, Pipeline]:
         """
         Run Optuna-based static HPO with:
@@ -143,6 +422,9 @@ class StaticHPORunner:
         - trial-time evaluation on VALIDATION
         - final training on TRAIN_VAL
         - final evaluation on TEST
+
+        hpo-batch-trials > 1 trains that many trials side by side in one batched FL execution
+        (taking precedence over hpo-parallel-trials).
         """
         settings = get_server_settings(context)
         base_hp = HParams.from_run_config(context)
@@ -150,25 +432,47 @@ class StaticHPORunner:
         n_trials = int(context.run_config.get("hpo-n-trials", 15))
         trial_rounds = int(context.run_config.get("hpo-num-rounds", 5))
         direction = str(context.run_config.get("hpo-direction", "maximize"))
+        n_parallel = max(1, int(context.run_config.get("hpo-parallel-trials", 1)))
+        batch_trials = max(1, int(context.run_config.get("hpo-batch-trials", 1)))
+        lr_range = server_lr_range(settings.server_optimizer)
 
         # shorter settings for each trial
         trial_settings = ServerSettings(
             num_rounds=trial_rounds,
             fraction_train=settings.fraction_train,
             fraction_evaluate=settings.fraction_evaluate,
+            feature_dtype=settings.feature_dtype,
+            aggregation=settings.aggregation,
+            buffer_size=settings.buffer_size,
+            staleness_exponent=settings.staleness_exponent,
+            reducer=settings.reducer,
+            trim_fraction=settings.trim_fraction,
+            server_optimizer=settings.server_optimizer,
+            server_momentum=settings.server_momentum,
         )
 
-        def objective(trial: optuna.Trial) -> float:
-            hp_trial = self._suggest_hparams(trial, base_hp)
+        def report_round(trial: optuna.Trial, server_round: int, mrec: MetricRecord) -> None:
+            trial.report(self._score_round(mrec), step=server_round)
 
+            if trial.should_prune():
+                logger.info("[static_hpo] pruning trial=%d after round=%d", trial.number, server_round)
+                raise optuna.TrialPruned()
+
+        def run_trial(trial: optuna.Trial, hp_trial: HParams) -> float:
             cfg_trial = hp_trial.to_config(
                 train_split=DataSplit.TRAIN,
                 eval_split=DataSplit.VALIDATION,
             )
 
-            trial_strategy = FedAvg(
-                fraction_train=settings.fraction_train,
-                fraction_evaluate=settings.fraction_evaluate,
+            # isolated strategy per trial so concurrent trials never share state or messages
+            trial_strategy = _build_strategy(
+                settings,
+                hp_trial,
+                TrialFedAvg,
+                BufferedTrialFedAvg,
+                trial_number=trial.number,
+                on_evaluate=lambda rnd, mrec: report_round(trial, rnd, mrec),
+                convergence=_convergence_detector(context, source="evaluate"),
             )
 
             result, _ = _run_fl(
@@ -182,31 +486,63 @@ class StaticHPORunner:
 
             return self._score_static_trial(result)
 
+        def run_batch(hps: list[HParams]) -> list[float]:
+            histories = _run_population(
+                grid=grid,
+                hps=hps,
+                settings=trial_settings,
+                cfg=hps[0].to_config(train_split=DataSplit.TRAIN, eval_split=DataSplit.VALIDATION),
+            )
+            return [self._score_eval_metrics(history) for history in histories]
+
+        def objective(trial: optuna.Trial) -> float:
+            return run_trial(trial, self._suggest_hparams(trial, base_hp, lr_range))
+
         study = optuna.create_study(
             direction=direction,
-            sampler=optuna.samplers.TPESampler(seed=OPTUNA_SEED),
+            # constant liar keeps concurrently running trials from proposing the same point
+            sampler=optuna.samplers.TPESampler(seed=OPTUNA_SEED, constant_liar=max(n_parallel, batch_trials) > 1),
+            pruner=self._build_pruner(context.run_config, trial_rounds),
         )
-        study.optimize(objective, n_trials=n_trials)
+
+        if batch_trials > 1:
+            logger.info("[static_hpo] running %d trials, %d per batched run", n_trials, batch_trials)
+            self._optimize_batched(study, run_batch, base_hp, n_trials, batch_trials, lr_range)
+        elif n_parallel > 1:
+            logger.info("[static_hpo] running %d trials, %d at a time", n_trials, n_parallel)
+            self._optimize_parallel(study, run_trial, base_hp, n_trials, n_parallel, lr_range)
+        else:
+            study.optimize(objective, n_trials=n_trials)
 
         # rebuild the best_hp from best_params
         best_hp = self._suggest_hparams(
             optuna.trial.FixedTrial(study.best_params),
             base_hp,
+            lr_range,
         )
 
         logger.info("[static_hpo] best_value=%s, best_params=%s", study.best_value, study.best_params)
 
+        return self._run_final(grid, context, settings, best_hp)
+
+    @staticmethod
+    def _run_final(grid: Grid, context: Context, settings: ServerSettings, best_hp: HParams) -> tuple[Result, Pipeline]:
+        """
+        Full run with the selected static config: train on TRAIN_VAL, evaluate on TEST.
+        """
         best_cfg = best_hp.to_config(
             train_split=DataSplit.TRAIN_VAL,
             eval_split=DataSplit.TEST,
         )
 
-        final_strategy = FedAvg(
-            fraction_train=settings.fraction_train,
-            fraction_evaluate=settings.fraction_evaluate,
+        final_strategy = _build_strategy(
+            settings,
+            best_hp,
+            MonitoredFedAvg,
+            BufferedFedAvg,
+            convergence=_convergence_detector(context, source="train"),
         )
 
-        # full run using the best static config on the final phase
         return _run_fl(
             strategy=final_strategy,
             grid=grid,
@@ -217,6 +553,281 @@ class StaticHPORunner:
         )
 
 
+@dataclass(frozen=True)
+class FidelityRung:
+    rounds: int  # server rounds per configuration
+    data_fraction: float  # share of each client's training rows
+    n_configs: int  # configurations trained at this rung
+
+
+class MultiFidelityHPORunner(StaticHPORunner):
+    """
+    Successive-halving HPO over two fidelities: server rounds and the share of local data.
+
+    mf-n-configs configurations are sampled from the static HPO search space and trained at
+    the lowest fidelity (few rounds on a mf-min-data-fraction subset of every client's train
+    split). After each rung, the best 1 / mf-reduction-factor by _score_static_trial move up to
+    the next rung, which runs reduction-factor times more rounds on a larger share of the data,
+    up to hpo-num-rounds on all of it. Each rung trains its configurations from fresh
+    parameters. The best configuration of the last rung is retrained like StaticHPORunner's.
+
+    With hpo-batch-trials > 1, the configurations of a rung are trained that many at a time
+    in batched FL executions (one round trip per node and round for the whole batch).
+    """
+
+    @staticmethod
+    def _rungs(
+            n_configs: int,
+            min_rounds: int,
+            max_rounds: int,
+            min_fraction: float,
+            reduction_factor: int,
+    ) -> list[FidelityRung]:
+        """
+        Rungs from lowest to full fidelity; rounds grow by reduction_factor and the data fraction
+        geometrically from min_fraction to 1.0, while the configurations shrink by reduction_factor.
+        """
+        eta = reduction_factor
+        top = 0
+        while min_rounds * eta ** (top + 1) <= max_rounds and n_configs // eta ** (top + 1) >= 1:
+            top += 1
+
+        return [
+            FidelityRung(
+                rounds=max(min_rounds, max_rounds // eta ** (top - r)),
+                data_fraction=1.0 if r == top else min_fraction ** ((top - r) / top),
+                n_configs=max(1, n_configs // eta ** r),
+            )
+            for r in range(top + 1)
+        ]
+
+    def run(self, grid: Grid, context: Context) -> tuple[Result, Pipeline]:
+        """
+        Run successive halving on TRAIN / VALIDATION, then the final TRAIN_VAL / TEST run.
+        """
+        settings = get_server_settings(context)
+        base_hp = HParams.from_run_config(context)
+        rc = context.run_config
+
+        n_configs = int(rc.get("mf-n-configs", 27))
+        min_rounds = int(rc.get("mf-min-rounds", 1))
+        max_rounds = int(rc.get("hpo-num-rounds", 5))
+        min_fraction = float(rc.get("mf-min-data-fraction", 0.25))
+        reduction_factor = int(rc.get("mf-reduction-factor", 3))
+        direction = str(rc.get("hpo-direction", "maximize"))
+        n_parallel = max(1, int(rc.get("hpo-parallel-trials", 1)))
+        batch_trials = max(1, int(rc.get("hpo-batch-trials", 1)))
+        lr_range = server_lr_range(settings.server_optimizer)
+
+        if n_configs < 1 or not 1 <= min_rounds <= max_rounds:
+            raise ValueError(
+                f"Need mf-n-configs >= 1 and 1 <= mf-min-rounds <= hpo-num-rounds, "
+                f"got {n_configs}, {min_rounds}, {max_rounds}"
+            )
+        if not 0.0 < min_fraction <= 1.0:
+            raise ValueError(f"mf-min-data-fraction must be in (0, 1], got {min_fraction}")
+        if reduction_factor < 2:
+            raise ValueError(f"mf-reduction-factor must be >= 2, got {reduction_factor}")
+
+        rungs = self._rungs(n_configs, min_rounds, max_rounds, min_fraction, reduction_factor)
+        cost = sum(r.n_configs * r.rounds * r.data_fraction for r in rungs)
+        logger.info(
+            "[multifidelity_hpo] %d rungs (rounds, data fraction, configs): %s; ~%.1f full-data rounds",
+            len(rungs),
+            [(r.rounds, round(r.data_fraction, 3), r.n_configs) for r in rungs],
+            cost,
+        )
+
+        # configurations are all drawn up front, so the sampler only sets the search space
+        study = optuna.create_study(direction=direction, sampler=optuna.samplers.RandomSampler(seed=OPTUNA_SEED))
+        trials = [study.ask() for _ in range(n_configs)]
+        hps = {trial.number: self._suggest_hparams(trial, base_hp, lr_range) for trial in trials}
+
+        def run_config(trial: optuna.Trial, rung: FidelityRung) -> float:
+            hp_trial = hps[trial.number]
+            cfg_trial = hp_trial.to_config(
+                train_split=DataSplit.TRAIN,
+                eval_split=DataSplit.VALIDATION,
+            )
+            cfg_trial[DATA_FRACTION] = float(rung.data_fraction)
+
+            trial_strategy = _build_strategy(
+                settings,
+                hp_trial,
+                TrialFedAvg,
+                BufferedTrialFedAvg,
+                trial_number=trial.number,
+                convergence=_convergence_detector(context, source="evaluate"),
+            )
+
+            result, _ = _run_fl(
+                strategy=trial_strategy,
+                grid=grid,
+                hp=hp_trial,
+                settings=replace(settings, num_rounds=rung.rounds),
+                train_cfg=cfg_trial,
+                eval_cfg=cfg_trial,
+            )
+
+            return self._score_static_trial(result)
+
+        def run_batch(batch: list[optuna.Trial], rung: FidelityRung) -> list[float]:
+            cfg_batch = hps[batch[0].number].to_config(
+                train_split=DataSplit.TRAIN,
+                eval_split=DataSplit.VALIDATION,
+            )
+            cfg_batch[DATA_FRACTION] = float(rung.data_fraction)
+
+            histories = _run_population(
+                grid=grid,
+                hps=[hps[trial.number] for trial in batch],
+                settings=replace(settings, num_rounds=rung.rounds),
+                cfg=cfg_batch,
+            )
+            return [self._score_eval_metrics(history) for history in histories]
+
+        survivors = trials
+        scores: dict[int, float] = {}
+        maximize = direction == "maximize"
+
+        with ThreadPoolExecutor(max_workers=n_parallel, thread_name_prefix="hpo-trial") as pool:
+            for level, rung in enumerate(rungs):
+                if level > 0:
+                    ranked = sorted(survivors, key=lambda t: scores[t.number], reverse=maximize)
+                    survivors = ranked[:rung.n_configs]
+                    for trial in ranked[rung.n_configs:]:
+                        study.tell(trial, state=optuna.trial.TrialState.PRUNED)
+
+                logger.info(
+                    "[multifidelity_hpo] rung=%d rounds=%d data_fraction=%.3g configs=%d",
+                    level,
+                    rung.rounds,
+                    rung.data_fraction,
+                    len(survivors),
+                )
+
+                rung_scores: list[float]
+                if batch_trials > 1:
+                    batches = [survivors[i:i + batch_trials] for i in range(0, len(survivors), batch_trials)]
+                    batch_futures = [pool.submit(run_batch, batch, rung) for batch in batches]
+                    rung_scores = [score for future in batch_futures for score in future.result()]
+                else:
+                    trial_futures = [pool.submit(run_config, trial, rung) for trial in survivors]
+                    rung_scores = [future.result() for future in trial_futures]
+
+                for trial, score in zip(survivors, rung_scores):
+                    scores[trial.number] = score
+                    trial.report(score, step=level)
+
+        for trial in survivors:
+            study.tell(trial, scores[trial.number])
+
+        best_hp = hps[study.best_trial.number]
+        logger.info("[multifidelity_hpo] best_value=%s, best_params=%s", study.best_value, study.best_params)
+
+        return self._run_final(grid, context, settings, best_hp)
+
+
+class PopulationHPORunner:
+    """
+    Population-based training (PBT) of pbt-population federated models in the same rounds.
+
+    Phase 1:
+        The seed HParams and pbt-population - 1 configurations sampled from the static HPO
+        search space train side by side on TRAIN / VALIDATION, batched into one message per
+        node per round; every pbt-interval rounds the weakest members copy and perturb the
+        strongest (PopulationFedAvg)
+
+    Phase 2:
+        Retrain on TRAIN_VAL following the per-round HParams schedule of the final leader
+
+    Final:
+        Evaluate on TEST
+    """
+
+    def run(self, grid: Grid, context: Context) -> tuple[Result, Pipeline]:
+        settings = get_server_settings(context)
+        seed_hp = HParams.from_run_config(context)
+        rc = context.run_config
+
+        population_size = int(rc.get("pbt-population", 8))
+        interval = int(rc.get("pbt-interval", 4))
+        lr_range = server_lr_range(settings.server_optimizer)
+
+        if population_size < 1:
+            raise ValueError(f"pbt-population must be >= 1, got {population_size}")
+
+        study = optuna.create_study(sampler=optuna.samplers.RandomSampler(seed=OPTUNA_SEED))
+        population = [seed_hp] + [
+            StaticHPORunner._suggest_hparams(study.ask(), seed_hp, lr_range)
+            for _ in range(population_size - 1)
+        ]
+
+        if settings.aggregation == Aggregation.BUFFERED:
+            logger.info("[pbt_hpo] the population trains synchronously; buffered aggregation is used for phase 2 only")
+
+        search_cfg = seed_hp.to_config(
+            train_split=DataSplit.TRAIN,
+            eval_split=DataSplit.VALIDATION,
+        )
+
+        strategy = _build_strategy(
+            replace(settings, aggregation=Aggregation.SYNC),
+            seed_hp,
+            PopulationFedAvg,
+            PopulationFedAvg,
+            population=population,
+            exploit_interval=interval,
+            truncation=float(rc.get("pbt-truncation", 0.25)),
+            resample_probability=float(rc.get("pbt-resample-probability", 0.25)),
+            lr_range=lr_range,
+            seed=OPTUNA_SEED,
+            convergence=_convergence_detector(context, source="evaluate"),
+        )
+
+        logger.info("[pbt_hpo] training %d members, exploit/explore every %d rounds", population_size, interval)
+        _run_fl(
+            strategy=strategy,
+            grid=grid,
+            hp=seed_hp,
+            settings=settings,
+            train_cfg=search_cfg,
+            eval_cfg=search_cfg,
+        )
+
+        leader = strategy.get_leader()
+        logger.info(
+            "[pbt_hpo] selected member=%d score=%.6f schedule=%s",
+            leader.member,
+            leader.score,
+            # only the rounds in which the HParams changed
+            {rnd: hp for rnd, hp in sorted(leader.schedule.items()) if leader.schedule.get(rnd - 1) != hp},
+        )
+
+        final_cfg = leader.hp.to_config(
+            train_split=DataSplit.TRAIN_VAL,
+            eval_split=DataSplit.TEST,
+        )
+
+        final_strategy = _build_strategy(
+            settings,
+            leader.schedule[min(leader.schedule)],
+            ScheduledFedAvg,
+            BufferedScheduledFedAvg,
+            schedule=leader.schedule,
+            convergence=_convergence_detector(context, source="train"),
+        )
+
+        return _run_fl(
+            strategy=final_strategy,
+            grid=grid,
+            hp=leader.hp,
+            settings=settings,
+            train_cfg=final_cfg,
+            eval_cfg=final_cfg,
+        )
+
+
 class AgenticHPORunner:
     """
     Federated training with agent-controlled hyperparameters.
@@ -244,26 +855,45 @@ class AgenticHPORunner:
         model = str(rc.get("agent-model", "gpt-5.2"))
         temperature = float(rc.get("agent-temperature", 0.2))
         total_rounds = int(rc.get("num-server-rounds", 20))
+        agent_mode = str(rc.get("agent-mode", "sync")).strip().lower()
+        deadline = float(rc.get("agent-deadline", 30.0))
+
+        if agent_mode not in ("sync", "async"):
+            raise ValueError(f"Unknown agent-mode {agent_mode!r}. Valid: ['async', 'sync']")
+
+        controller = AgenticHPOController(
+            model=model,
+            temperature=temperature,
+            total_rounds=total_rounds,
+            backend=str(rc.get("agent-backend", "openai")),
+            cache_dir=_project_path(rc.get("agent-cache-dir")),
+            replay_log=_project_path(rc.get("agent-replay-log")),
+            server_lr_range=server_lr_range(settings.server_optimizer),
+        )
 
-        strategy = AgenticFedAvg(
+        strategy = _build_strategy(
+            settings,
+            seed_hp,
+            AgenticFedAvg,
+            BufferedAgenticFedAvg,
             seed_hp=seed_hp,
-            controller=AgenticHPOController(
-                model=model,
-                temperature=temperature,
-                total_rounds=total_rounds,
-            ),
-            fraction_train=settings.fraction_train,
-            fraction_evaluate=settings.fraction_evaluate,
+            controller=controller,
+            async_proposals=agent_mode == "async",
+            proposal_deadline=deadline,
+            convergence=_convergence_detector(context, source="evaluate"),
         )
 
-        _, _ = _run_fl(
-            strategy=strategy,
-            grid=grid,
-            hp=seed_hp,
-            settings=settings,
-            train_cfg=search_cfg,
-            eval_cfg=search_cfg,
-        )
+        try:
+            _, _ = _run_fl(
+                strategy=strategy,
+                grid=grid,
+                hp=seed_hp,
+                settings=settings,
+                train_cfg=search_cfg,
+                eval_cfg=search_cfg,
+            )
+        finally:
+            controller.shutdown()
 
         best_hp = strategy.get_best_hp()
 
@@ -282,9 +912,12 @@ class AgenticHPORunner:
             eval_split=DataSplit.TEST,
         )
 
-        final_strategy = FedAvg(
-            fraction_train=settings.fraction_train,
-            fraction_evaluate=settings.fraction_evaluate,
+        final_strategy = _build_strategy(
+            settings,
+            best_hp,
+            MonitoredFedAvg,
+            BufferedFedAvg,
+            convergence=_convergence_detector(context, source="train"),
         )
 
         return _run_fl(
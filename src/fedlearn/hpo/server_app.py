@@ -12,6 +12,7 @@ from flwr.serverapp import Grid, ServerApp
 from fedlearn.common.logging_config import setup_logging
 from fedlearn.common.model import set_model_params
 from fedlearn.hpo.runners import BaselineRunner, StaticHPORunner, AgenticHPORunner, ExperimentRunner
+from fedlearn.hpo.runners import MultiFidelityHPORunner, PopulationHPORunner
 
 app = ServerApp()
 
@@ -24,6 +25,8 @@ RUNNERS: dict[str, Callable[[], ExperimentRunner]] = {
     "baseline": BaselineRunner,
     "static_hpo": StaticHPORunner,
     "agentic_hpo": AgenticHPORunner,
+    "multifidelity_hpo": MultiFidelityHPORunner,
+    "pbt_hpo": PopulationHPORunner,
 }
 
 
@@ -51,7 +54,7 @@ def main(grid: Grid, context: Context) -> None:
 
     # get final global params and save model
     final_params = result.arrays.to_numpy_ndarrays()
-    set_model_params(model, final_params)
+    set_model_params(model, final_params, copy=False)
 
     save_file = CONFIG_DIR / f"{experiment}.pkl"
     logger.info("Saving final model to %s", save_file)
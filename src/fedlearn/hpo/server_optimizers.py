@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import numpy as np
+
+from fedlearn.common.config import ServerOptimizer
+
+# Constants
+
+DEFAULT_SERVER_MOMENTUM = 0.9  # fedavgm momentum, beta1 of fedadam / fedyogi
+ADAPTIVE_BETA2 = 0.99  # fedadam / fedyogi second-moment decay (Reddi et al., 2021)
+ADAPTIVE_TAU = 1e-3  # fedadam / fedyogi adaptivity (denominator floor)
+
+# server-lr search ranges for the agent and Optuna; plain fedavg keeps its lr fixed
+SERVER_LR_RANGES: dict[ServerOptimizer, tuple[float, float]] = {
+    ServerOptimizer.FEDAVGM: (0.1, 2.0),
+    ServerOptimizer.FEDADAM: (1e-3, 1e-1),
+    ServerOptimizer.FEDYOGI: (1e-3, 1e-1),
+}
+
+
+def server_lr_range(optimizer: ServerOptimizer | str) -> tuple[float, float] | None:
+    """
+    Range in which server-lr is tuned for this optimizer, or None if it stays fixed.
+    """
+    return SERVER_LR_RANGES.get(ServerOptimizer(optimizer))
+
+
+class FedOptimizer:
+    """
+    Server-side update rule applied to each round's aggregate (FedOpt, Reddi et al., 2021).
+
+    The aggregate minus the current global model is the round's pseudo-gradient delta:
+      - fedavg:  x + lr * delta (lr = 1 is plain FedAvg)
+      - fedavgm: m = momentum * m + delta; x + lr * m
+      - fedadam: m = momentum * m + (1 - momentum) * delta, v = beta2 * v + (1 - beta2) * delta ** 2;
+                 x + lr * m / (sqrt(v) + tau)
+      - fedyogi: as fedadam with v = v - (1 - beta2) * delta ** 2 * sign(v - delta ** 2)
+
+    The moments are flat float64 vectors updated in place; reset() clears them for a new run.
+    lr may be changed between rounds (e.g. by the agent) without resetting the moments.
+    """
+
+    def __init__(
+            self,
+            optimizer: ServerOptimizer | str = ServerOptimizer.FEDAVG,
+            *,
+            lr: float = 1.0,
+            momentum: float = DEFAULT_SERVER_MOMENTUM,
+            beta2: float = ADAPTIVE_BETA2,
+            tau: float = ADAPTIVE_TAU,
+    ):
+        if lr <= 0.0:
+            raise ValueError(f"server lr must be > 0, got {lr}")
+        if not 0.0 <= momentum < 1.0:
+            raise ValueError(f"server momentum must be in [0, 1), got {momentum}")
+
+        self.optimizer = ServerOptimizer(optimizer)
+        self.lr = float(lr)
+        self.momentum = float(momentum)
+        self.beta2 = float(beta2)
+        self.tau = float(tau)
+
+        self._m: np.ndarray | None = None
+        self._v: np.ndarray | None = None
+
+    @property
+    def identity(self) -> bool:
+        """
+        True if step() returns the aggregate unchanged (plain FedAvg).
+        """
+        return self.optimizer == ServerOptimizer.FEDAVG and self.lr == 1.0
+
+    def reset(self) -> None:
+        self._m = None
+        self._v = None
+
+    def _moments(self, delta: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The (m, v) moment vectors, (re)initialized if unset or shaped unlike delta.
+        """
+        if self._m is None or self._v is None or self._m.shape != delta.shape:
+            self._m = np.zeros_like(delta)
+            self._v = np.full_like(delta, self.tau ** 2)
+        return self._m, self._v
+
+    def step(self, current: np.ndarray, aggregate: np.ndarray) -> np.ndarray:
+        """
+        New global parameters from the current ones and this round's aggregate (flat vectors).
+        """
+        delta = aggregate - current
+
+        if self.optimizer == ServerOptimizer.FEDAVG:
+            return current + self.lr * delta
+
+        m, v = self._moments(delta)
+
+        if self.optimizer == ServerOptimizer.FEDAVGM:
+            m *= self.momentum
+            m += delta
+            return current + self.lr * m
+
+        m *= self.momentum
+        m += (1.0 - self.momentum) * delta
+
+        delta_sq = np.square(delta)
+        if self.optimizer == ServerOptimizer.FEDADAM:
+            v *= self.beta2
+            v += (1.0 - self.beta2) * delta_sq
+        else:
+            v -= (1.0 - self.beta2) * delta_sq * np.sign(v - delta_sq)
+
+        return current + self.lr * m / (np.sqrt(v) + self.tau)
@@ -0,0 +1,596 @@
+from __future__ import annotations
+
+import io
+import logging
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from logging import INFO
+from typing import Literal
+
+import numpy as np
+from flwr.common import Array, ArrayRecord, ConfigRecord, Message, MetricRecord, RecordDict, log
+from flwr.serverapp import Grid
+from flwr.serverapp.strategy import FedAvg, Result
+from flwr.serverapp.strategy.strategy_utils import log_strategy_start_info
+
+from fedlearn.common.config import ConvergenceSettings
+from fedlearn.hpo.aggregation import ArenaAggregator, Reducer, weighted_mean
+from fedlearn.hpo.server_optimizers import FedOptimizer
+
+logger = logging.getLogger(__name__)
+
+MetricSource = Literal["train", "evaluate"]
+
+# Constants
+
+BUFFER_POLL_INTERVAL = 0.05  # seconds between pulls while BufferedFedAvg waits for updates
+
+
+def cast_arrays(arrays: ArrayRecord, dtype: np.dtype | type) -> ArrayRecord:
+    """
+    Return arrays converted to dtype (the same record if nothing needs converting).
+    """
+    dtype = np.dtype(dtype)
+    if all(np.dtype(arr.dtype) == dtype for arr in arrays.values()):
+        return arrays
+
+    return ArrayRecord({key: Array(arr.numpy().astype(dtype)) for key, arr in arrays.items()})
+
+
+@dataclass
+class MonitoredResult(Result):
+    """
+    Result that also records the round at which convergence stopped the run (if it did).
+    """
+    converged_round: int | None = None
+    stopped_round: int | None = None
+
+
+@dataclass
+class ConvergenceDetector:
+    """
+    Track one aggregated metric and report convergence once it stops improving.
+
+    After warmup_rounds, the run is considered converged when the metric has not improved on its
+    best value by at least min_delta for patience consecutive rounds. source selects whether the
+    aggregated train or evaluate metrics are watched.
+    """
+    settings: ConvergenceSettings
+    source: MetricSource = "evaluate"
+
+    best: float | None = field(init=False, default=None)
+    best_round: int = field(init=False, default=0)
+    stale_rounds: int = field(init=False, default=0)
+    converged_round: int | None = field(init=False, default=None)
+
+    def _improved(self, value: float) -> bool:
+        if self.best is None:
+            return True
+        if self.settings.direction == "max":
+            return value > self.best + self.settings.min_delta
+        return value < self.best - self.settings.min_delta
+
+    def update(self, server_round: int, metrics: MetricRecord | None) -> bool:
+        """
+        Feed one round of aggregated metrics; return True once converged.
+        """
+        if self.converged_round is not None:
+            return True
+
+        value = None if metrics is None else metrics.get(self.settings.metric)
+        if not isinstance(value, (int, float)):
+            return False
+
+        if self._improved(float(value)):
+            self.best = float(value)
+            self.best_round = server_round
+            self.stale_rounds = 0
+        elif server_round > self.settings.warmup_rounds:
+            self.stale_rounds += 1
+
+        if server_round > self.settings.warmup_rounds and self.stale_rounds >= self.settings.patience:
+            self.converged_round = server_round
+            logger.info(
+                "Convergence detected: round=%d %s %s=%.6f best_round=%d (patience=%d, min_delta=%g)",
+                server_round,
+                self.source,
+                self.settings.metric,
+                self.best,
+                self.best_round,
+                self.settings.patience,
+                self.settings.min_delta,
+            )
+            return True
+
+        return False
+
+
+class MonitoredFedAvg(FedAvg):
+    """
+    FedAvg with convergence detection, early termination and reduced-precision transport.
+
+    start() runs the same train/evaluate loop as Strategy.start, feeds each round's aggregated
+    metrics to the optional ConvergenceDetector and, when terminate-on-convergence is set,
+    stops after the round in which convergence is detected.
+
+    Model arrays are sent to clients in transport_dtype (e.g. float32 to halve bandwidth).
+    Client replies are aggregated by an ArenaAggregator: written into a reused float64
+    (n_clients, n_params) buffer and reduced in one call (the num-examples weighted mean by
+    default, or a robust reducer), so the global model stays in float64. An optional
+    FedOptimizer (FedAvgM / FedAdam / FedYogi) then turns the aggregate into the new global
+    model; its state is reset at the start of every run.
+    """
+
+    def __init__(
+            self,
+            *,
+            convergence: ConvergenceDetector | None = None,
+            transport_dtype: np.dtype | type | str = np.float64,
+            reducer: Reducer = weighted_mean,
+            server_optimizer: FedOptimizer | None = None,
+            **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.convergence = convergence
+        self.transport_dtype = np.dtype(transport_dtype)
+        self.arena = ArenaAggregator(reducer)
+        self.server_optimizer = server_optimizer
+
+    def configure_train(
+            self,
+            server_round: int,
+            arrays: ArrayRecord,
+            config: ConfigRecord,
+            grid: Grid,
+    ) -> Iterable[Message]:
+        return super().configure_train(server_round, cast_arrays(arrays, self.transport_dtype), config, grid)
+
+    def configure_evaluate(
+            self,
+            server_round: int,
+            arrays: ArrayRecord,
+            config: ConfigRecord,
+            grid: Grid,
+    ) -> Iterable[Message]:
+        return super().configure_evaluate(server_round, cast_arrays(arrays, self.transport_dtype), config, grid)
+
+    def _example_weights(self, contents: list[RecordDict]) -> np.ndarray:
+        """
+        weighted_by_key (num-examples) of each reply, read from its MetricRecord.
+        """
+        return np.array(
+            [float(next(iter(c.metric_records.values()))[self.weighted_by_key]) for c in contents],
+            dtype=np.float64,
+        )
+
+    def aggregate_train(
+            self,
+            server_round: int,
+            replies: Iterable[Message],
+    ) -> tuple[ArrayRecord | None, MetricRecord | None]:
+        valid, _ = self._check_and_log_replies(replies, is_train=True)
+        if not valid:
+            return None, None
+
+        contents = [msg.content for msg in valid]
+        arrays = self.arena.aggregate(
+            [c[self.arrayrecord_key] for c in contents],
+            self._example_weights(contents),
+        )
+        metrics = self.train_metrics_aggr_fn(contents, self.weighted_by_key)
+
+        return arrays, metrics
+
+    def _server_step(self, current: np.ndarray, aggregate: np.ndarray) -> np.ndarray:
+        """
+        Apply the server optimizer to flat (current global, aggregate) parameters.
+        """
+        if self.server_optimizer is None or self.server_optimizer.identity:
+            return aggregate
+        return self.server_optimizer.step(current, aggregate)
+
+    def _observe_round(
+            self,
+            server_round: int,
+            train_metrics: MetricRecord | None,
+            evaluate_metrics: MetricRecord | None,
+    ) -> bool:
+        """
+        Return True if the run should stop after this round.
+        """
+        if self.convergence is None:
+            return False
+
+        metrics = train_metrics if self.convergence.source == "train" else evaluate_metrics
+        converged = self.convergence.update(server_round, metrics)
+
+        return converged and self.convergence.settings.terminate
+
+    def _train_round(
+            self,
+            grid: Grid,
+            server_round: int,
+            arrays: ArrayRecord,
+            train_config: ConfigRecord,
+            timeout: float,
+    ) -> tuple[ArrayRecord | None, MetricRecord | None]:
+        """
+        One synchronous training round: send to the sampled nodes and wait for all replies.
+        """
+        replies = grid.send_and_receive(
+            messages=self.configure_train(server_round, arrays, train_config, grid),
+            timeout=timeout,
+        )
+        agg_arrays, agg_metrics = self.aggregate_train(server_round, replies)
+
+        if agg_arrays is not None and self.server_optimizer is not None and not self.server_optimizer.identity:
+            new = self._server_step(self.arena.flatten(arrays), self.arena.flatten(agg_arrays))
+            agg_arrays = self.arena.unflatten(new)
+
+        return agg_arrays, agg_metrics
+
+    def _evaluate_round(
+            self,
+            grid: Grid,
+            server_round: int,
+            arrays: ArrayRecord,
+            evaluate_config: ConfigRecord,
+            timeout: float,
+    ) -> MetricRecord | None:
+        """
+        One synchronous evaluation round on the sampled nodes.
+        """
+        replies = grid.send_and_receive(
+            messages=self.configure_evaluate(server_round, arrays, evaluate_config, grid),
+            timeout=timeout,
+        )
+        return self.aggregate_evaluate(server_round, replies)
+
+    def _end_run(
+            self,
+            grid: Grid,
+            last_round: int,
+            arrays: ArrayRecord,
+            evaluate_config: ConfigRecord,
+            timeout: float,
+            result: MonitoredResult,
+    ) -> None:
+        """
+        Hook run after the last round (nothing to do for synchronous FedAvg).
+        """
+
+    def _abort_run(self, grid: Grid, timeout: float) -> None:
+        """
+        Hook run when a round raises (e.g. a pruned trial), before the exception leaves start().
+
+        Nothing is left in flight after a synchronous round, so there is nothing to clean up.
+        """
+
+    def start(
+            self,
+            grid: Grid,
+            initial_arrays: ArrayRecord,
+            num_rounds: int = 3,
+            timeout: float = 3600,
+            train_config: ConfigRecord | None = None,
+            evaluate_config: ConfigRecord | None = None,
+            evaluate_fn: Callable[[int, ArrayRecord], MetricRecord | None] | None = None,
+    ) -> MonitoredResult:
+        log(INFO, "Starting %s strategy:", self.__class__.__name__)
+        log_strategy_start_info(num_rounds, initial_arrays, train_config, evaluate_config)
+        self.summary()
+        log(INFO, "")
+
+        train_config = ConfigRecord() if train_config is None else train_config
+        evaluate_config = ConfigRecord() if evaluate_config is None else evaluate_config
+        result = MonitoredResult()
+
+        if self.server_optimizer is not None:
+            self.server_optimizer.reset()
+
+        t_start = time.time()
+        if evaluate_fn:
+            res = evaluate_fn(0, initial_arrays)
+            log(INFO, "Initial global evaluation results: %s", res)
+            if res is not None:
+                result.evaluate_metrics_serverapp[0] = res
+
+        arrays = initial_arrays
+        current_round = 0
+
+        try:
+            for current_round in range(1, num_rounds + 1):
+                log(INFO, "")
+                log(INFO, "[ROUND %s/%s]", current_round, num_rounds)
+
+                # training (clientapp-side)
+                agg_arrays, agg_train_metrics = self._train_round(grid, current_round, arrays, train_config, timeout)
+
+                if agg_arrays is not None:
+                    result.arrays = agg_arrays
+                    arrays = agg_arrays
+                if agg_train_metrics is not None:
+                    log(INFO, "\t└──> Aggregated MetricRecord: %s", agg_train_metrics)
+                    result.train_metrics_clientapp[current_round] = agg_train_metrics
+
+                # evaluation (clientapp-side)
+                agg_evaluate_metrics = self._evaluate_round(grid, current_round, arrays, evaluate_config, timeout)
+
+                if agg_evaluate_metrics is not None:
+                    log(INFO, "\t└──> Aggregated MetricRecord: %s", agg_evaluate_metrics)
+                    result.evaluate_metrics_clientapp[current_round] = agg_evaluate_metrics
+
+                # evaluation (serverapp-side)
+                if evaluate_fn:
+                    log(INFO, "Global evaluation")
+                    res = evaluate_fn(current_round, arrays)
+                    log(INFO, "\t└──> MetricRecord: %s", res)
+                    if res is not None:
+                        result.evaluate_metrics_serverapp[current_round] = res
+
+                stop = self._observe_round(current_round, agg_train_metrics, agg_evaluate_metrics)
+
+                if self.convergence is not None:
+                    result.converged_round = self.convergence.converged_round
+
+                if stop:
+                    result.stopped_round = current_round
+                    log(INFO, "")
+                    log(INFO, "Terminating on convergence after round %s/%s", current_round, num_rounds)
+                    break
+        except BaseException:
+            # e.g. optuna.TrialPruned from on_evaluate: release what the round left in flight
+            self._abort_run(grid, timeout)
+            raise
+
+        self._end_run(grid, current_round, arrays, evaluate_config, timeout, result)
+
+        log(INFO, "")
+        log(INFO, "Strategy execution finished in %.2fs", time.time() - t_start)
+        log(INFO, "")
+        log(INFO, "Final results:")
+        log(INFO, "")
+        for line in io.StringIO(str(result)):
+            log(INFO, "\t%s", line.strip("\n"))
+        log(INFO, "")
+
+        return result
+
+
+class BufferedFedAvg(MonitoredFedAvg):
+    """
+    Buffered asynchronous FedAvg (FedBuff-style): aggregate as soon as buffer_size updates arrive.
+
+    Sampled nodes train continuously. When a node's update has been consumed it receives the
+    newest global model, while slower nodes keep training on the version they started from,
+    so rounds advance at the pace of the fastest buffer_size nodes (K of N). Each update
+    contributes its delta against its starting version, weighted by num-examples times
+    (1 + staleness) ** -staleness_exponent, where staleness counts the aggregations since that
+    version. With buffer_size equal to the number of nodes every update is fresh and a round
+    is exactly FedAvg.
+
+    A node whose update is buffered for the next round is not sent a new model until that
+    update is aggregated. Per-round evaluation is a separate message and runs on all sampled
+    nodes, including those still training. After the last round, or when a round raises
+    (e.g. a pruned HPO trial), the in-flight updates are drained and discarded.
+    """
+
+    def __init__(
+            self,
+            *,
+            buffer_size: int = 2,
+            staleness_exponent: float = 0.5,
+            **kwargs,
+    ):
+        super().__init__(**kwargs)
+
+        if buffer_size < 1:
+            raise ValueError(f"buffer_size must be >= 1, got {buffer_size}")
+        if staleness_exponent < 0.0:
+            raise ValueError(f"staleness_exponent must be >= 0, got {staleness_exponent}")
+
+        self.buffer_size = int(buffer_size)
+        self.staleness_exponent = float(staleness_exponent)
+
+        self._in_flight: dict[str, tuple[int, int]] = {}  # message id -> (node id, start version)
+        self._overflow: list[tuple[Message, int]] = []  # arrived beyond the last buffer
+        self._versions: dict[int, np.ndarray] = {}  # version -> flat global parameters (float64)
+
+    def _busy_nodes(self) -> set[int]:
+        """
+        Nodes still training or whose update waits in the overflow for the next aggregation.
+        """
+        busy = {node_id for node_id, _ in self._in_flight.values()}
+        busy.update(reply.metadata.src_node_id for reply, _ in self._overflow)
+        return busy
+
+    def _dispatch(
+            self,
+            grid: Grid,
+            server_round: int,
+            arrays: ArrayRecord,
+            train_config: ConfigRecord,
+    ) -> None:
+        """
+        Send the current global model (version server_round - 1) to every idle sampled node.
+        """
+        busy = self._busy_nodes()
+        # own config copy per dispatch: configure_train writes the round into it
+        messages = [
+            msg for msg in self.configure_train(server_round, arrays, ConfigRecord(dict(train_config)), grid)
+            if msg.metadata.dst_node_id not in busy
+        ]
+        if not messages:
+            return
+
+        for msg_id, msg in zip(grid.push_messages(messages), messages):
+            self._in_flight[msg_id] = (msg.metadata.dst_node_id, server_round - 1)
+
+    def _collect(self, grid: Grid, timeout: float) -> list[tuple[Message, int]]:
+        """
+        Wait until buffer_size updates are buffered (or timeout); return (reply, start version) pairs.
+        """
+        buffer, self._overflow = self._overflow[:self.buffer_size], self._overflow[self.buffer_size:]
+        deadline = time.monotonic() + timeout
+
+        while len(buffer) < min(self.buffer_size, len(buffer) + len(self._in_flight)):
+            for reply in grid.pull_messages(list(self._in_flight)):
+                node_id, version = self._in_flight.pop(reply.metadata.reply_to_message_id)
+
+                if reply.has_error():
+                    logger.warning("Dropping failed update from node %d: %s", node_id, reply.error.reason)
+                elif len(buffer) < self.buffer_size:
+                    buffer.append((reply, version))
+                else:
+                    self._overflow.append((reply, version))
+
+            if len(buffer) >= self.buffer_size or not self._in_flight:
+                break
+            if time.monotonic() > deadline:
+                logger.warning("Timed out with %d of %d buffered updates", len(buffer), self.buffer_size)
+                break
+
+            time.sleep(BUFFER_POLL_INTERVAL)
+
+        return buffer
+
+    def _train_round(
+            self,
+            grid: Grid,
+            server_round: int,
+            arrays: ArrayRecord,
+            train_config: ConfigRecord,
+            timeout: float,
+    ) -> tuple[ArrayRecord | None, MetricRecord | None]:
+        version = server_round - 1
+        self._versions[version] = self.arena.flatten(arrays)
+
+        self._dispatch(grid, server_round, arrays, train_config)
+        buffer = self._collect(grid, timeout)
+        if not buffer:
+            return None, None
+
+        # failed replies never reach the buffer; this validates the contents and logs the round
+        replies = [reply for reply, _ in buffer]
+        self._check_and_log_replies(replies, is_train=True)
+        contents = [reply.content for reply in replies]
+
+        staleness = np.array([version - start for _, start in buffer], dtype=np.float64)
+        weights = self._example_weights(contents) * (1.0 + staleness) ** -self.staleness_exponent
+
+        # global + reduced deltas of each update against the version it started from
+        rows = self.arena.load([c[self.arrayrecord_key] for c in contents])
+        for row, (_, start) in zip(rows, buffer):
+            row -= self._versions[start]
+        current = self._versions[version]
+        new = self._server_step(current, current + self.arena.reduce(rows, weights))
+
+        logger.info(
+            "Buffered round %d: %d updates, staleness=%s, in flight=%d",
+            server_round,
+            len(buffer),
+            staleness.astype(int).tolist(),
+            len(self._in_flight),
+        )
+
+        # keep only versions that in-flight or pending updates still refer to
+        live = {start for _, start in self._in_flight.values()} | {start for _, start in self._overflow}
+        for old in [v for v in self._versions if v not in live and v != version]:
+            del self._versions[old]
+
+        metrics = self.train_metrics_aggr_fn(contents, self.weighted_by_key)
+
+        return self.arena.unflatten(new), metrics
+
+    def _drain(self, grid: Grid, timeout: float) -> int:
+        """
+        Pull and discard every in-flight update so all nodes are idle again; return how many were dropped.
+        """
+        drained = 0
+        deadline = time.monotonic() + timeout
+        while self._in_flight and time.monotonic() <= deadline:
+            for reply in grid.pull_messages(list(self._in_flight)):
+                self._in_flight.pop(reply.metadata.reply_to_message_id, None)
+                drained += 1
+            if self._in_flight:
+                time.sleep(BUFFER_POLL_INTERVAL)
+
+        drained += len(self._overflow)
+        self._in_flight.clear()
+        self._overflow.clear()
+        self._versions.clear()
+
+        return drained
+
+    def _abort_run(self, grid: Grid, timeout: float) -> None:
+        logger.info("Run aborted; discarded %d in-flight updates", self._drain(grid, timeout))
+
+    def _end_run(
+            self,
+            grid: Grid,
+            last_round: int,
+            arrays: ArrayRecord,
+            evaluate_config: ConfigRecord,
+            timeout: float,
+            result: MonitoredResult,
+    ) -> None:
+        # drain updates that can no longer be aggregated so every node is idle again
+        logger.info("Discarded %d late updates after round %d", self._drain(grid, timeout), last_round)
+
+
+class TrialFedAvg(MonitoredFedAvg):
+    """
+    FedAvg bound to a single HPO trial.
+
+    Every message is tagged with the trial's group id, so several trials can share one Grid
+    concurrently while keeping their message routing separate. If given, on_evaluate is called
+    with each round's aggregated evaluate metrics (e.g. to report them to the HPO sampler); an
+    exception raised there stops the run.
+    """
+
+    def __init__(
+            self,
+            *,
+            trial_number: int,
+            on_evaluate: Callable[[int, MetricRecord], None] | None = None,
+            **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.trial_number = int(trial_number)
+        self.group_id = f"hpo-trial-{self.trial_number}"
+        self.on_evaluate = on_evaluate
+
+    def _construct_messages(
+            self,
+            record: RecordDict,
+            node_ids: list[int],
+            message_type: str,
+    ) -> Iterable[Message]:
+        return [
+            Message(
+                content=record,
+                message_type=message_type,
+                dst_node_id=node_id,
+                group_id=self.group_id,
+            )
+            for node_id in node_ids
+        ]
+
+    def aggregate_evaluate(
+            self,
+            server_round: int,
+            replies: Iterable[Message],
+    ) -> MetricRecord | None:
+        mrec = super().aggregate_evaluate(server_round, replies)
+
+        if mrec is not None and self.on_evaluate is not None:
+            self.on_evaluate(int(server_round), mrec)
+
+        return mrec
+
+
+class BufferedTrialFedAvg(BufferedFedAvg, TrialFedAvg):
+    """
+    TrialFedAvg with buffered asynchronous aggregation.
+    """
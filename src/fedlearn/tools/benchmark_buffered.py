@@ -0,0 +1,216 @@
+"""
+Benchmark buffered asynchronous aggregation (FedBuff-style) against synchronous FedAvg.
+
+This script:
+  - Runs the real ClientApp train / evaluate handlers in-process on worker threads,
+    behind a small Grid; every training reply of client i is held back by --delays[i]
+    seconds to simulate stragglers (slow hardware or links)
+  - Runs MonitoredFedAvg (sync) and BufferedFedAvg (--buffer-size of the clients per round)
+    from the same initial parameters for --rounds rounds each
+  - Scores the global model on the pooled validation splits after every round and records
+    the wall-clock time at which it was produced (scoring time excluded)
+  - Reports the wall-clock time each strategy needs to reach --target-auc
+
+Run:
+    python benchmark_buffered.py [--rounds 20] [--target-auc 0.55] [--delays 0,0,1.0]
+                                 [--buffer-size 2] [--staleness-exponent 0.5] [--local-epochs 1]
+                                 [--learning-rate constant] [--eta0 0.001]
+"""
+
+import argparse
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from flwr.app import Context
+from flwr.common import ArrayRecord, Message, MetricRecord, RecordDict
+from flwr.serverapp import Grid
+
+from fedlearn.common.config import DataSplit, HParams
+from fedlearn.common.data_split import CLIENT_KEYS
+from fedlearn.common.features import get_client_processed_split
+from fedlearn.common.metrics import binary_roc_auc
+from fedlearn.common.model import get_model, get_model_params, set_initial_params
+from fedlearn.hpo import client_app
+from fedlearn.hpo.strategies import BufferedFedAvg, MonitoredFedAvg
+
+
+class LocalGrid(Grid):
+    """
+    In-process Grid: node i runs the ClientApp for partition i - 1 in a worker thread.
+    """
+
+    def __init__(self, run_config: dict, delays: list[float]):
+        self.run_config = run_config
+        self.delays = delays
+        self._replies: dict[str, Message] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=4 * len(CLIENT_KEYS))
+
+    @property
+    def run(self):
+        return None
+
+    def set_run(self, run_id: int) -> None:
+        pass
+
+    def create_message(self, content, message_type, dst_node_id, group_id, ttl=None) -> Message:
+        return Message(content=content, message_type=message_type, dst_node_id=dst_node_id, group_id=group_id)
+
+    def get_node_ids(self) -> list[int]:
+        return list(range(1, len(CLIENT_KEYS) + 1))
+
+    def _handle(self, message: Message) -> None:
+        partition_id = message.metadata.dst_node_id - 1
+        context = Context(
+            run_id=1,
+            node_id=message.metadata.dst_node_id,
+            node_config={"partition-id": partition_id},
+            state=RecordDict(),
+            run_config=self.run_config,
+        )
+
+        if message.metadata.message_type == "train":
+            reply = client_app.train(message, context)
+            time.sleep(self.delays[partition_id])
+        else:
+            reply = client_app.evaluate(message, context)
+
+        with self._lock:
+            self._replies[message.metadata.message_id] = reply
+
+    def push_messages(self, messages) -> list[str]:
+        ids = []
+        for message in messages:
+            message.metadata.__dict__["_message_id"] = str(uuid.uuid4())
+            ids.append(message.metadata.message_id)
+            self._pool.submit(self._handle, message)
+        return ids
+
+    def pull_messages(self, message_ids) -> list[Message]:
+        with self._lock:
+            return [self._replies.pop(i) for i in list(message_ids) if i in self._replies]
+
+    def send_and_receive(self, messages, *, timeout=None) -> list[Message]:
+        pending = set(self.push_messages(messages))
+        replies = []
+        while pending:
+            got = self.pull_messages(pending)
+            replies.extend(got)
+            pending -= {reply.metadata.reply_to_message_id for reply in got}
+            if pending:
+                time.sleep(0.005)
+        return replies
+
+    def wait_idle(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+def _run_strategy(strategy, run_config: dict, delays: list[float], hp: HParams, rounds: int, val: tuple):
+    """
+    Run one strategy; return [(round, seconds since start, validation ROC-AUC)].
+    """
+    X_val, y_val = val
+    grid = LocalGrid(run_config, delays)
+
+    model = get_model(hp)
+    set_initial_params(model)
+
+    trace = []
+    scoring = 0.0
+    start = time.perf_counter()
+
+    def score(server_round: int, arrays: ArrayRecord) -> MetricRecord | None:
+        nonlocal scoring
+        at = time.perf_counter()
+        coef, intercept = arrays.to_numpy_ndarrays()
+        scores = np.concatenate([np.asarray(X @ coef.ravel()).ravel() + intercept[0] for X in X_val])
+        auc = binary_roc_auc(y_val == 1, scores)
+        scoring += time.perf_counter() - at
+        trace.append((server_round, at - start - scoring, auc))
+        return MetricRecord({"roc_auc": auc})
+
+    cfg = hp.to_config(train_split=DataSplit.TRAIN, eval_split=DataSplit.VALIDATION)
+    strategy.start(
+        grid=grid,
+        initial_arrays=ArrayRecord(get_model_params(model)),
+        num_rounds=rounds,
+        train_config=cfg,
+        evaluate_config=cfg,
+        evaluate_fn=score,
+    )
+    grid.wait_idle()
+
+    return trace
+
+
+def _time_to_target(trace, target: float) -> tuple[int, float] | None:
+    for server_round, seconds, auc in trace:
+        if auc >= target:
+            return server_round, seconds
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare buffered asynchronous aggregation with FedAvg.")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--target-auc", type=float, default=0.55, help="validation ROC-AUC to reach")
+    parser.add_argument("--delays", default="0,0,1.0", help="seconds added to each client's training reply")
+    parser.add_argument("--buffer-size", type=int, default=2)
+    parser.add_argument("--staleness-exponent", type=float, default=0.5)
+    parser.add_argument("--local-epochs", type=int, default=1)
+    parser.add_argument("--penalty", choices=["l2", "l1", "elasticnet"], default="l2")
+    parser.add_argument("--learning-rate", choices=["optimal", "constant", "adaptive"], default="constant")
+    parser.add_argument("--eta0", type=float, default=0.001, help="used by constant | adaptive")
+    args = parser.parse_args()
+
+    delays = [float(d) for d in args.delays.split(",")]
+    if len(delays) != len(CLIENT_KEYS):
+        raise ValueError(f"--delays needs {len(CLIENT_KEYS)} values, got {len(delays)}")
+
+    hp = HParams(
+        local_epochs=args.local_epochs,
+        penalty=args.penalty,
+        class_weight_cfg="none",
+        sgd_learning_rate=args.learning_rate,
+        sgd_eta0_cfg=args.eta0,
+    )
+    run_config = {"num-server-rounds": args.rounds}
+    print(f"Hyperparameters: {hp}, delays={delays}")
+
+    print("Loading validation splits ...")
+    splits = [get_client_processed_split(key, DataSplit.VALIDATION) for key in CLIENT_KEYS]
+    val = ([X for X, _ in splits], np.concatenate([y for _, y in splits]))
+
+    strategies = {
+        "sync": MonitoredFedAvg(),
+        "buffered": BufferedFedAvg(buffer_size=args.buffer_size, staleness_exponent=args.staleness_exponent),
+    }
+
+    traces = {}
+    for name, strategy in strategies.items():
+        print(f"Running {args.rounds} rounds with {name} aggregation ...")
+        traces[name] = _run_strategy(strategy, run_config, delays, hp, args.rounds, val)
+
+    print("\n--------------------------------------------")
+    print(f"{'round':>5} " + " ".join(f"{name + ' auc':>14} {name + ' s':>12}" for name in strategies))
+    for r in range(1, args.rounds + 1):
+        row = " ".join(f"{traces[name][r][2]:>14.4f} {traces[name][r][1]:>12.2f}" for name in strategies)
+        print(f"{r:>5} {row}")
+    print("--------------------------------------------\n")
+
+    reached = {name: _time_to_target(trace, args.target_auc) for name, trace in traces.items()}
+    for name, hit in reached.items():
+        if hit is None:
+            print(f"{name}: did not reach ROC-AUC {args.target_auc} in {args.rounds} rounds")
+        else:
+            print(f"{name}: reached ROC-AUC {args.target_auc} at round {hit[0]} after {hit[1]:.2f}s")
+
+    if reached["sync"] is not None and reached["buffered"] is not None:
+        print(f"Speedup to target: x{reached['sync'][1] / max(reached['buffered'][1], 1e-12):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,26 +5,36 @@ This script:
   - Reconstructs the federated client partitions
   - Applies the same 60/20/20 train/val/test per client
   - Unions all client-local training splits
-  - Fits the shared preprocessor ONLY on that union
+  - Fits the shared preprocessor ONLY on that union, in the dense or sparse (CSR) layout
   - Computes:
       - n_features (after preprocessing)
       - classes (unique values of prolonged_stay from training data)
       - intercept (zero vector of length n_classes)
+      - feature_layout (dense | sparse, the layout the saved preprocessor produces)
   - Saves:
       - configs/model_meta.json
       - configs/preprocessor.pkl
+  - Exports each client's preprocessed splits to the memory-mapped feature store:
+      - data/feature_store/<client>/X.npy, y.npy
+      - data/feature_store/manifest.json (incl. each split's row count and patientunitstayid hash)
+
+Re-run this whenever the DuckDB data changes (refreshed database or re-run materialize_splits):
+clients ignore a feature store whose recorded rows no longer match DuckDB.
 
 Run:
-    python compute_model_metadata.py
+    python compute_model_metadata.py [--feature-layout dense|sparse]
 """
 
+import argparse
 import json
 from pathlib import Path
 
 import joblib
 import numpy as np
 
+from fedlearn.common.config import FeatureLayout
 from fedlearn.common.data_split import get_client_train_union
+from fedlearn.common.features import FEATURE_STORE_DIR, export_feature_store
 from fedlearn.common.preprocessing import build_preprocessor
 
 # Constants
@@ -37,6 +47,15 @@ PREPROC_PATH = CONFIG_DIR / "preprocessor.pkl"
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Fit the shared preprocessor and compute model metadata.")
+    parser.add_argument(
+        "--feature-layout",
+        choices=[layout.value for layout in FeatureLayout],
+        default=FeatureLayout.DENSE.value,
+        help="output layout of the fitted preprocessor (default: dense)",
+    )
+    layout = FeatureLayout(parser.parse_args().feature_layout)
+
     # Ensure config directory exists
     if not CONFIG_DIR.exists():
         print(f"Config directory '{CONFIG_DIR}' does not exist, creating it ...")
@@ -47,8 +66,8 @@ def main():
 
     print(f"count = {len(X_train):,}")
 
-    print("Fitting preprocessing pipeline ...")
-    preprocessor = build_preprocessor()
+    print(f"Fitting preprocessing pipeline ({layout.value} layout) ...")
+    preprocessor = build_preprocessor(sparse=layout is FeatureLayout.SPARSE)
     preprocessor.fit(X_train)
 
     print("Transforming training data to compute feature dimension ...")
@@ -66,12 +85,14 @@ def main():
     print(f"Computed feature dimension: {n_features}")
     print(f"Classes: {classes_list}")
     print(f"Initial intercept (zeros): {intercept}")
+    print(f"Feature layout: {layout.value}")
     print("--------------------------------------------\n")
 
     meta = {
         "n_features": int(n_features),
         "classes": classes_list,
         "intercept": intercept,
+        "feature_layout": layout.value,
     }
 
     print(f"Saving model metadata to {META_PATH}")
@@ -81,6 +102,10 @@ def main():
     print(f"Saving fitted preprocessor to {PREPROC_PATH}")
     joblib.dump(preprocessor, PREPROC_PATH)
 
+    print(f"Exporting preprocessed client splits to {FEATURE_STORE_DIR}")
+    manifest_path = export_feature_store(preprocessor, layout=layout)
+    print(f"Saved feature store manifest to {manifest_path}")
+
     print("Done!")
 
 
@@ -0,0 +1,44 @@
+"""
+Materialize the per-client train/val/test split assignment in DuckDB.
+
+This script:
+  - Reconstructs the federated client partitions
+  - Applies the same seeded, stratified 60/20/20 train/val/test split per client
+  - Writes one row per patientunitstayid (client_key, split, split_rank) to the client_splits table
+  - Records the split settings, partition sizes and stay-id hashes in client_splits_meta
+
+Client loaders then read only the split they need (WHERE split = ?). Re-run this after the
+DuckDB view is rebuilt; until then loaders fall back to splitting partitions in memory.
+An exported feature store is ignored once its rows no longer match; re-run
+compute_model_metadata to re-export it.
+
+Run:
+    python materialize_splits.py
+"""
+
+import duckdb
+
+from fedlearn.common.data_split import DUCKDB_PATH, SPLIT_TABLE, materialize_splits
+
+
+def main():
+    print(f"Materializing client splits into {DUCKDB_PATH} ...")
+
+    conn = duckdb.connect(DUCKDB_PATH)
+    try:
+        counts = materialize_splits(conn)
+    finally:
+        conn.close()
+
+    print("\n--------------------------------------------")
+    for client_key, sizes in counts.items():
+        summary = ", ".join(f"{split}={n:,}" for split, n in sizes.items())
+        print(f"{client_key}: {summary}")
+    print("--------------------------------------------\n")
+
+    print(f"Saved split assignment to table {SPLIT_TABLE}")
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()